@@ -0,0 +1,433 @@
+"""Rough throughput numbers for the ciphers in ciphers.py.
+
+Run with ``python benchmark.py`` (add ``--sizes 1K 1M`` to skip the slow
+100 MB case, and ``--buffer-size 1G`` to also encrypt 1 GB in place).
+"""
+
+import argparse
+import os
+import random
+import string
+import time
+import tracemalloc
+
+import ciphers
+
+SIZES = {"1K": 1 << 10, "1M": 1 << 20, "100M": 100 << 20}
+BUFFER_SIZES = {"1M": 1 << 20, "100M": 100 << 20, "1G": 1 << 30}
+SUBSTITUTION_KEY = "QWERTYUIOPASDFGHJKLZXCVBNM"
+
+
+def sample_text(size, seed=0):
+    """Printable ASCII with roughly English-like letter/space density."""
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + "      .,"
+    block = "".join(rng.choice(alphabet) for _ in range(1 << 16))
+    return (block * (size // len(block) + 1))[:size]
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def per_char(rule, message, *params):
+    """The original one-character-at-a-time loop, for comparison."""
+    return "".join(rule(char, *params) for char in message)
+
+
+def bench_translation(sizes):
+    key = SUBSTITUTION_KEY
+    mapping = ciphers.SubstitutionCipher("", key).substitution_dict
+    cases = [
+        (
+            "Caesar",
+            lambda m: ciphers.CaesarCipher(m, 3).encrypt(),
+            lambda m: per_char(ciphers._caesar_char, m, 3),
+        ),
+        (
+            "Affine",
+            lambda m: ciphers.AffineCipher(m, 7).encrypt(),
+            lambda m: per_char(ciphers._affine_char, m, 5, 7),
+        ),
+        (
+            "Atbash",
+            lambda m: ciphers.AtbashCipher(m).encrypt(),
+            lambda m: per_char(ciphers._atbash_char, m.upper()),
+        ),
+        (
+            "Substitution",
+            lambda m: ciphers.SubstitutionCipher(m, key).encrypt(),
+            lambda m: "".join(
+                mapping.get(c.upper(), c) if c.isalpha() else c for c in m
+            ),
+        ),
+    ]
+    print(
+        f"{'cipher':<14}{'size':>6}{'table MB/s':>14}{'loop MB/s':>12}{'speedup':>10}"
+    )
+    for label in sizes:
+        size = SIZES[label]
+        message = sample_text(size)
+        # The per-character loop is far too slow to repeat at 100 MB
+        repeat = 3 if size <= SIZES["1M"] else 1
+        for name, fast, slow in cases:
+            fast_time = timed(lambda: fast(message), repeat)
+            slow_time = timed(lambda: slow(message), repeat)
+            mb = size / (1 << 20)
+            print(
+                f"{name:<14}{label:>6}{mb / fast_time:>14.1f}"
+                f"{mb / slow_time:>12.1f}{slow_time / fast_time:>9.1f}x"
+            )
+
+
+def vigenere_loop(message, key):
+    """The original zip-over-extended-key loop, for comparison."""
+    extended = (key * (len(message) // len(key) + 1))[: len(message)]
+    return "".join(
+        ciphers._caesar_char(m, ord(k.upper()) - ord("A"))
+        for m, k in zip(message, extended)
+    )
+
+
+def bench_vigenere(sizes):
+    print(
+        f"{'key length':<14}{'size':>6}{'stride MB/s':>14}{'loop MB/s':>12}{'speedup':>10}"
+    )
+    for label in sizes:
+        size = SIZES[label]
+        message = sample_text(size)
+        repeat = 3 if size <= SIZES["1M"] else 1
+        for key in ("LEMON", "CIPHERCATKEYWORDS" * 4):
+            fast_time = timed(
+                lambda: ciphers.VigenereCipher(message, key).encrypt(), repeat
+            )
+            slow_time = timed(lambda: vigenere_loop(message, key), repeat)
+            mb = size / (1 << 20)
+            print(
+                f"{len(key):<14}{label:>6}{mb / fast_time:>14.1f}"
+                f"{mb / slow_time:>12.1f}{slow_time / fast_time:>9.1f}x"
+            )
+
+
+def bench_parallel(sizes, workers):
+    print(
+        f"{'cipher':<14}{'size':>6}{'1 proc MB/s':>14}{f'{workers} procs MB/s':>16}{'speedup':>10}"
+    )
+    for label in sizes:
+        size = SIZES[label]
+        message = sample_text(size)
+        for cipher in (
+            ciphers.CaesarCipher(message, 3),
+            ciphers.VigenereCipher(message, "LEMON"),
+        ):
+            single = timed(lambda: ciphers.parallel_encrypt(cipher, workers=1), 1)
+            multi = timed(
+                lambda: ciphers.parallel_encrypt(cipher, workers, threshold=0), 1
+            )
+            mb = size / (1 << 20)
+            print(
+                f"{type(cipher).__name__:<14}{label:>6}{mb / single:>14.1f}"
+                f"{mb / multi:>16.1f}{single / multi:>9.1f}x"
+            )
+
+
+def transposition_loop(message, columns):
+    """The original column-by-column string concatenation, for comparison."""
+    padded = message.ljust((len(message) + columns - 1) // columns * columns)
+    encrypted = [""] * columns
+    for column in range(columns):
+        for index in range(column, len(padded), columns):
+            encrypted[column] += padded[index]
+    return "".join(encrypted)
+
+
+def bench_transposition(sizes):
+    print(f"{'mode':<14}{'size':>6}{'slice MB/s':>14}{'loop MB/s':>12}{'speedup':>10}")
+    for label in sizes:
+        size = SIZES[label]
+        message = sample_text(size)
+        repeat = 3 if size <= SIZES["1M"] else 1
+        mb = size / (1 << 20)
+        slow_time = timed(lambda: transposition_loop(message, 8), repeat)
+        for mode, keyed in (("columnar", False), ("keyed", True)):
+            cipher = ciphers.TranspositionCipher(message, "CIPHERCT", keyed)
+            encrypt_time = timed(cipher.encrypt, repeat)
+            encrypted = ciphers.TranspositionCipher(cipher.encrypt(), "CIPHERCT", keyed)
+            decrypt_time = timed(encrypted.decrypt, repeat)
+            print(
+                f"{mode + ' enc':<14}{label:>6}{mb / encrypt_time:>14.1f}"
+                f"{mb / slow_time:>12.1f}{slow_time / encrypt_time:>9.1f}x"
+            )
+            print(f"{mode + ' dec':<14}{label:>6}{mb / decrypt_time:>14.1f}")
+
+
+def bench_batch(count=100_000):
+    rng = random.Random(1)
+    messages = [sample_text(rng.randrange(8, 64), seed) for seed in range(1000)]
+    messages = (messages * (count // len(messages) + 1))[:count]
+    cases = [
+        (
+            "Caesar",
+            lambda m: ciphers.CaesarCipher(m, 3),
+            ciphers.CaesarCipher.with_key(3),
+        ),
+        (
+            "Vigenere",
+            lambda m: ciphers.VigenereCipher(m, "LEMON"),
+            ciphers.VigenereCipher.with_key("LEMON"),
+        ),
+        (
+            "Substitution",
+            lambda m: ciphers.SubstitutionCipher(m, "QWERTYUIOPASDFGHJKLZXCVBNM"),
+            ciphers.SubstitutionCipher.with_key("QWERTYUIOPASDFGHJKLZXCVBNM"),
+        ),
+        (
+            "Transposition",
+            lambda m: ciphers.TranspositionCipher(m, "KEY"),
+            ciphers.TranspositionCipher.with_key("KEY"),
+        ),
+    ]
+    print(f"{'cipher':<14}{'batch msg/s':>14}{'object msg/s':>14}{'speedup':>10}")
+    for name, per_object, keyed in cases:
+        batch_time = timed(lambda: list(keyed.encrypt_batch(messages)))
+        object_time = timed(lambda: [per_object(m).encrypt() for m in messages])
+        print(
+            f"{name:<14}{count / batch_time:>14.0f}{count / object_time:>14.0f}"
+            f"{object_time / batch_time:>9.1f}x"
+        )
+
+
+def bench_live(sizes, edits=1000):
+    cases = [
+        ("Caesar", ciphers.CaesarCipher.with_key(3)),
+        ("Vigenere", ciphers.VigenereCipher.with_key("LEMON")),
+        ("Transposition", ciphers.TranspositionCipher.with_key("CIPHERCT")),
+        ("Morse", ciphers.MorseCodeCipher),
+    ]
+    print(f"{'cipher':<14}{'size':>6}{'edit us':>10}{'full us':>12}{'speedup':>10}")
+    for label in sizes:
+        size = SIZES[label]
+        message = sample_text(size)
+        typed = message + "x"
+        for name, cipher in cases:
+            full = (
+                cipher.encode if cipher is ciphers.MorseCodeCipher else cipher.encrypt
+            )
+            live = ciphers.LiveEncrypter(cipher)
+            live.update(message)
+
+            def type_ahead():
+                # Type a character at the end and delete it again
+                for _ in range(edits // 2):
+                    live.update(typed, size, 0)
+                    live.update(message, size, 0)
+
+            edit_time = timed(type_ahead, 1) / edits
+            full_time = timed(lambda: full(message), 1)
+            print(
+                f"{name:<14}{label:>6}{edit_time * 1e6:>10.1f}"
+                f"{full_time * 1e6:>12.0f}{full_time / edit_time:>9.0f}x"
+            )
+
+
+def bench_pipeline(sizes):
+    key = "QWERTYUIOPASDFGHJKLZXCVBNM"
+    families = {
+        "mono": [
+            ciphers.AtbashCipher.with_key(),
+            ciphers.CaesarCipher.with_key(3),
+            ciphers.SubstitutionCipher.with_key(key),
+            ciphers.AffineCipher.with_key(7),
+            ciphers.CaesarCipher.with_key(11),
+            ciphers.SubstitutionCipher.with_key(key[::-1]),
+        ],
+        "vigenere": [
+            ciphers.AtbashCipher.with_key(),
+            ciphers.VigenereCipher.with_key("LEMON"),
+            ciphers.CaesarCipher.with_key(3),
+            ciphers.VigenereCipher.with_key("CIPHER"),
+            ciphers.SubstitutionCipher.with_key(key),
+            ciphers.AffineCipher.with_key(7),
+        ],
+        "transposition": [
+            ciphers.TranspositionCipher.with_key("AB"),
+            ciphers.TranspositionCipher.with_key("KEY"),
+            ciphers.TranspositionCipher.with_key("CAT", keyed=True),
+            ciphers.TranspositionCipher.with_key("ZEBRA", keyed=True),
+            ciphers.TranspositionCipher.with_key("AB"),
+            ciphers.TranspositionCipher.with_key("LEMON"),
+        ],
+    }
+    print(
+        f"{'chain':<14}{'stages':>7}{'size':>6}{'fused MB/s':>12}"
+        f"{'naive MB/s':>12}{'speedup':>10}"
+    )
+    for label in sizes:
+        size = SIZES[label]
+        message = sample_text(size)
+        repeat = 3 if size <= SIZES["1M"] else 1
+        mb = size / (1 << 20)
+        for family, stages in families.items():
+            for count in range(2, len(stages) + 1):
+                chain = stages[:count]
+                pipeline = ciphers.Pipeline(chain)
+
+                def naive():
+                    text = message
+                    for stage in chain:
+                        text = stage.encrypt(text)
+                    return text
+
+                fused_time = timed(lambda: pipeline.encrypt(message), repeat)
+                naive_time = timed(naive, repeat)
+                print(
+                    f"{family:<14}{count:>7}{label:>6}{mb / fused_time:>12.1f}"
+                    f"{mb / naive_time:>12.1f}{naive_time / fused_time:>9.1f}x"
+                )
+
+
+def hill_loop(message, matrix):
+    """A plain per-block matrix multiplication loop, for comparison."""
+    size = len(matrix)
+    letters = [ord(c) - ord("A") for c in message.upper() if "A" <= c <= "Z"]
+    letters += [ord("X") - ord("A")] * (-len(letters) % size)
+    result = []
+    for start in range(0, len(letters), size):
+        block = letters[start : start + size]
+        for row in matrix:
+            total = sum(k * value for k, value in zip(row, block))
+            result.append(chr(ord("A") + total % 26))
+    return "".join(result)
+
+
+def bench_hill(sizes):
+    print(
+        f"{'key size':<14}{'size':>6}{'block MB/s':>14}{'loop MB/s':>12}{'speedup':>10}"
+    )
+    keys = {2: "HILL", 3: "GYBNQKURP", 5: "CIPHERCATKEYMATRIXHILLSBL"}
+    for label in sizes:
+        size = SIZES[label]
+        message = sample_text(size).replace(" ", "").replace(".", "").replace(",", "")
+        repeat = 3 if size <= SIZES["1M"] else 1
+        mb = len(message) / (1 << 20)
+        for n, key in keys.items():
+            keyed = ciphers.HillCipher.with_key(key)
+            matrix = keyed.cipher.matrix
+            fast_time = timed(lambda: keyed.encrypt(message), repeat)
+            slow_time = timed(lambda: hill_loop(message, matrix), repeat)
+            print(
+                f"{f'{n}x{n}':<14}{label:>6}{mb / fast_time:>14.1f}"
+                f"{mb / slow_time:>12.1f}{slow_time / fast_time:>9.1f}x"
+            )
+
+
+def playfair_loop(message, key):
+    """Row and column geometry for every pair, for comparison."""
+    square = "".join(dict.fromkeys(key + "ABCDEFGHIKLMNOPQRSTUVWXYZ"))
+    letters = [c for c in message.upper().replace("J", "I") if "A" <= c <= "Z"]
+    result = []
+    index = 0
+    while index < len(letters):
+        a = letters[index]
+        if index + 1 < len(letters) and letters[index + 1] != a:
+            b = letters[index + 1]
+            index += 2
+        else:
+            b = "Q" if a == "X" else "X"
+            index += 1
+        row_a, column_a = divmod(square.index(a), 5)
+        row_b, column_b = divmod(square.index(b), 5)
+        if row_a == row_b:
+            column_a, column_b = (column_a + 1) % 5, (column_b + 1) % 5
+        elif column_a == column_b:
+            row_a, row_b = (row_a + 1) % 5, (row_b + 1) % 5
+        else:
+            column_a, column_b = column_b, column_a
+        result.append(square[row_a * 5 + column_a] + square[row_b * 5 + column_b])
+    return "".join(result)
+
+
+def bench_playfair(sizes):
+    print(f"{'text':<14}{'size':>6}{'table MB/s':>14}{'loop MB/s':>12}{'speedup':>10}")
+    keyed = ciphers.PlayfairCipher.with_key("MONARCHY")
+    for label in sizes:
+        size = SIZES[label]
+        text = sample_text(size)
+        repeat = 3 if size <= SIZES["1M"] else 1
+        for name, message in (
+            ("letters", text.replace(" ", "").replace(".", "").replace(",", "")),
+            ("with spaces", text),
+        ):
+            mb = len(message) / (1 << 20)
+            fast_time = timed(lambda: keyed.encrypt(message), repeat)
+            slow_time = timed(lambda: playfair_loop(message, "MONARCHY"), repeat)
+            print(
+                f"{name:<14}{label:>6}{mb / fast_time:>14.1f}"
+                f"{mb / slow_time:>12.1f}{slow_time / fast_time:>9.1f}x"
+            )
+
+
+def bench_buffers(label):
+    """In-place encryption of a bytearray, with the peak memory traced while
+    it runs as a multiple of the input (which is traced too)."""
+    size = BUFFER_SIZES[label]
+    block = sample_text(1 << 16).encode("ascii")
+    cases = [
+        ("Caesar", ciphers.CaesarCipher.with_key(3)),
+        ("Affine", ciphers.AffineCipher.with_key(7)),
+        ("Atbash", ciphers.AtbashCipher.with_key()),
+        ("Substitution", ciphers.SubstitutionCipher.with_key(SUBSTITUTION_KEY)),
+        ("Vigenere", ciphers.VigenereCipher.with_key("LEMON")),
+    ]
+    print(f"{'cipher':<14}{'size':>6}{'in-place MB/s':>15}{'peak':>10}")
+    tracemalloc.start()
+    data = bytearray(block) * (size // len(block))
+    for name, keyed in cases:
+        keyed.encrypt_buffer(data[:1000])  # Build the tables first
+        tracemalloc.reset_peak()
+        elapsed = timed(lambda: keyed.encrypt_buffer(data), 1)
+        peak = tracemalloc.get_traced_memory()[1] / len(data)
+        print(
+            f"{name:<14}{label:>6}{len(data) / (1 << 20) / elapsed:>15.1f}"
+            f"{peak:>9.3f}x"
+        )
+    tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=list(SIZES))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--buffer-size", choices=BUFFER_SIZES, help="run the in-place benchmark"
+    )
+    args = parser.parse_args()
+    bench_translation(args.sizes)
+    print()
+    bench_vigenere(args.sizes)
+    print()
+    bench_transposition(args.sizes)
+    print()
+    bench_parallel(args.sizes, args.workers)
+    print()
+    bench_batch()
+    print()
+    bench_live(args.sizes)
+    print()
+    bench_pipeline(args.sizes)
+    print()
+    bench_hill(args.sizes)
+    print()
+    bench_playfair(args.sizes)
+    if args.buffer_size:
+        print()
+        bench_buffers(args.buffer_size)
+
+
+if __name__ == "__main__":
+    main()
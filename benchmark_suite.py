@@ -0,0 +1,373 @@
+"""Benchmark suite and regression gate for every cipher in ciphers.py.
+
+    python benchmark_suite.py run -o baseline.json
+    python benchmark_suite.py run --sizes 100 10K 1M -o new.json
+    python benchmark_suite.py compare baseline.json new.json
+
+Every cipher class is run in both directions over input sizes from 100 B
+to 100 MB, three character mixes (ASCII letters, letters with digits and
+punctuation, non-ASCII text) and several key lengths. For each case the
+results hold the throughput in MB/s of UTF-8 input, the tracemalloc peak
+while it runs and that peak per input byte ("alloc_per_byte", about 1 for
+a cipher that only allocates its result).
+
+Timings on a shared or virtual machine drift by tens of percent between
+processes, far more than between repeats in one process. So ``run`` runs
+the suite ``--rounds`` times, each in a fresh process, and keeps the best
+time of each case; its noise is how far apart the rounds were.
+
+``compare`` matches cases by id and exits with status 1 if any got slower,
+or used more memory, by more than the thresholds. A case only counts as
+slower by more than its noise in both results files, each at least
+``NOISE_FLOOR`` and at least the median noise of that file, so unchanged
+code passes on a noisy machine, at the cost of missing small slowdowns
+there.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import ciphers
+
+SIZES = {"100": 100, "10K": 10_000, "1M": 1_000_000, "100M": 100_000_000}
+
+MIXES = {
+    "letters": string.ascii_letters,
+    "punctuation": string.ascii_letters + string.digits + string.punctuation + "  ",
+    # Only BMP characters, so Python stores the text at two bytes per character
+    "unicode": string.ascii_letters + "äöüßéèêçñåøæœ¿¡€—…“”«»ΩπЖжあい中文 ",
+}
+
+SUBSTITUTION_KEY = "QWERTYUIOPASDFGHJKLZXCVBNM"
+NOISE_FLOOR = 0.05  # Smallest noise assumed for a case, as a fraction
+
+
+def random_key(length, seed=0):
+    rng = random.Random(seed)
+    return "".join(rng.choice(string.ascii_uppercase) for _ in range(length))
+
+
+def object_case(cls, *args):
+    """Encrypt and decrypt through the class the way the GUI uses it."""
+    return (
+        lambda text: cls(text, *args).encrypt(),
+        lambda text: cls(text, *args).decrypt(),
+    )
+
+
+def pipeline_case():
+    pipeline = ciphers.Pipeline(
+        [
+            ciphers.CaesarCipher.with_key(3),
+            ciphers.VigenereCipher.with_key("LEMON"),
+            ciphers.TranspositionCipher.with_key("ZEBRA", keyed=True),
+        ]
+    )
+    return pipeline.encrypt, pipeline.decrypt
+
+
+def cases():
+    """(cipher, key label, encrypt, decrypt) for everything benchmarked."""
+    yield ("CaesarCipher", "shift3", *object_case(ciphers.CaesarCipher, 3))
+    yield ("AffineCipher", "shift7", *object_case(ciphers.AffineCipher, 7))
+    yield ("AtbashCipher", "-", *object_case(ciphers.AtbashCipher))
+    yield (
+        "SubstitutionCipher",
+        "key26",
+        *object_case(ciphers.SubstitutionCipher, SUBSTITUTION_KEY),
+    )
+    for length in (1, 5, 26, 100):
+        key = random_key(length)
+        yield (
+            "VigenereCipher",
+            f"key{length}",
+            *object_case(ciphers.VigenereCipher, key),
+        )
+    for keyed in (False, True):
+        name = "TranspositionCipher" + ("(keyed)" if keyed else "")
+        for length in (2, 8, 32):
+            key = random_key(length, seed=length)
+            yield (
+                name,
+                f"key{length}",
+                *object_case(ciphers.TranspositionCipher, key, keyed),
+            )
+    for key in ("HILL", "GYBNQKURP"):
+        yield (
+            "HillCipher",
+            f"key{len(key)}",
+            *object_case(ciphers.HillCipher, key),
+        )
+    yield ("PlayfairCipher", "key8", *object_case(ciphers.PlayfairCipher, "MONARCHY"))
+    yield (
+        "MorseCodeCipher",
+        "-",
+        ciphers.MorseCodeCipher.encode,
+        ciphers.MorseCodeCipher.decode,
+    )
+    yield ("Pipeline", "caesar+vigenere+transposition", *pipeline_case())
+
+
+def sample_text(mix, size, seed=0):
+    """Random text from a character mix, about ``size`` bytes as UTF-8."""
+    rng = random.Random(seed)
+    block = "".join(rng.choice(MIXES[mix]) for _ in range(1 << 16))
+    count = size * len(block) // len(block.encode())
+    return (block * (count // len(block) + 1))[: max(count, 1)]
+
+
+def decrypt_input(name, encrypt, text, size):
+    ciphertext = encrypt(text)
+    if name == "MorseCodeCipher":
+        # Morse is several times longer than its text, cut it back to size
+        # (at a letter boundary)
+        end = ciphertext.rfind(" ", 0, size)
+        ciphertext = ciphertext[: end if end > 0 else size]
+    return ciphertext
+
+
+def measure(func, text, repeat):
+    """(seconds, noise, tracemalloc peak in bytes) for one call of func(text).
+
+    The time is the best of ``repeat`` runs and the noise how far the median
+    run was from it, as a fraction.
+    """
+    timer = timeit.Timer(lambda: func(text))
+    number, elapsed = timer.autorange()
+    if elapsed < 1:
+        times = sorted(timer.repeat(repeat, number))
+    else:
+        times = [elapsed]  # Slow enough to be timed reliably once
+    seconds = times[0] / number
+    noise = times[len(times) // 2] / times[0] - 1
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    result = func(text)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    del result
+    return seconds, noise, peak
+
+
+def selected(name, only):
+    """Whether ``--cipher`` picks a case, e.g. TranspositionCipher also
+    picks TranspositionCipher(keyed)."""
+    return not only or name in only or name.split("(")[0] in only
+
+
+def run(sizes, mixes, repeat, only=None):
+    results = []
+    for size_label in sizes:
+        size = SIZES[size_label]
+        for mix in mixes:
+            text = sample_text(mix, size)
+            for name, key, encrypt, decrypt in cases():
+                if not selected(name, only):
+                    continue
+                encrypt(text[:1000])  # Build any cached tables first
+                inputs = {
+                    "encrypt": text,
+                    "decrypt": decrypt_input(name, encrypt, text, size),
+                }
+                for direction, func in (("encrypt", encrypt), ("decrypt", decrypt)):
+                    data = inputs.pop(direction)
+                    nbytes = len(data.encode())
+                    seconds, noise, peak = measure(func, data, repeat)
+                    del data
+                    result = {
+                        "id": f"{name}/{direction}/{mix}/{key}/{size_label}",
+                        "cipher": name,
+                        "direction": direction,
+                        "mix": mix,
+                        "key": key,
+                        "size": size_label,
+                        "bytes": nbytes,
+                        "seconds": seconds,
+                        "mb_per_s": nbytes / seconds / 1e6,
+                        "noise": noise,
+                        "peak_bytes": peak,
+                        "alloc_per_byte": peak / nbytes,
+                    }
+                    results.append(result)
+                    print(
+                        f"{result['id']:<60}{result['mb_per_s']:>10.1f} MB/s"
+                        f"{peak / 1e6:>10.2f} MB{result['alloc_per_byte']:>7.2f}/B",
+                        flush=True,
+                    )
+            del text
+    return results
+
+
+def run_rounds(args):
+    """Run the suite ``args.rounds`` times in fresh processes and merge the
+    results, keeping the fastest round of each case and the spread between
+    the rounds as its noise."""
+    command = [sys.executable, __file__, "run", "--rounds", "1"]
+    command += ["--sizes", *args.sizes, "--mixes", *args.mixes]
+    command += ["--repeat", str(args.repeat)]
+    if args.cipher:
+        command += ["--cipher", *args.cipher]
+    merged = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for round_number in range(args.rounds):
+            print(f"Round {round_number + 1} of {args.rounds}", flush=True)
+            output = f"{folder}/round{round_number}.json"
+            subprocess.run([*command, "-o", output], check=True)
+            with open(output, encoding="utf-8") as file:
+                for result in json.load(file)["results"]:
+                    merged.setdefault(result["id"], []).append(result)
+    results = []
+    for runs in merged.values():
+        best = min(runs, key=lambda result: result["seconds"])
+        slowest = max(result["seconds"] for result in runs)
+        within = max(result["noise"] for result in runs)
+        best["noise"] = max(slowest / best["seconds"] - 1, within)
+        best["peak_bytes"] = min(result["peak_bytes"] for result in runs)
+        best["alloc_per_byte"] = best["peak_bytes"] / best["bytes"]
+        results.append(best)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def noise_floor(report):
+    """Smallest noise to assume for a case in a results file: NOISE_FLOOR,
+    or the median noise of its cases if the whole run was noisier."""
+    noises = sorted(result.get("noise", 0) for result in report["results"])
+    return max(NOISE_FLOOR, noises[len(noises) // 2] if noises else 0)
+
+
+def compare(baseline, current, threshold, memory_threshold):
+    """Print the cases that changed beyond the thresholds (in percent) and
+    return the number of regressions.
+
+    A case has to slow down by more than the threshold and by more than its
+    noise in both results files together, each at least ``noise_floor``.
+    """
+    old = {result["id"]: result for result in baseline["results"]}
+    old_floor, new_floor = noise_floor(baseline), noise_floor(current)
+    if max(old_floor, new_floor) > NOISE_FLOOR:
+        print(
+            f"Noisy runs (median noise {100 * old_floor:.0f}% and "
+            f"{100 * new_floor:.0f}%): only larger changes are reported"
+        )
+    regressions = 0
+    matched = 0
+    for result in current["results"]:
+        before = old.get(result["id"])
+        if before is None:
+            continue
+        matched += 1
+        speed = (result["mb_per_s"] / before["mb_per_s"] - 1) * 100
+        noise = 100 * (
+            max(result.get("noise", 0), new_floor)
+            + max(before.get("noise", 0), old_floor)
+        )
+        allowed = max(threshold, noise)
+        memory = (result["peak_bytes"] / max(before["peak_bytes"], 1) - 1) * 100
+        notes = []
+        if speed < -allowed:
+            notes.append(f"{speed:+.1f}% speed")
+        if memory > memory_threshold and result["peak_bytes"] > 4096:
+            notes.append(f"{memory:+.1f}% memory")
+        if notes:
+            regressions += 1
+            print(f"REGRESSION {result['id']}: {', '.join(notes)}")
+        elif speed > allowed:
+            print(f"improved   {result['id']}: {speed:+.1f}% speed")
+    print(
+        f"{matched} cases compared, {regressions} regressions "
+        f"(threshold {threshold}% speed, {memory_threshold}% memory)"
+    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark every cipher and compare against a baseline."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-o", "--output", help="write the results as JSON")
+    run_parser.add_argument("--sizes", nargs="+", choices=SIZES, default=list(SIZES))
+    run_parser.add_argument("--mixes", nargs="+", choices=MIXES, default=list(MIXES))
+    run_parser.add_argument(
+        "--cipher",
+        nargs="+",
+        help="only these classes, e.g. CaesarCipher or TranspositionCipher(keyed)",
+    )
+    run_parser.add_argument(
+        "--repeat", type=int, default=5, help="timings per case in each round"
+    )
+    run_parser.add_argument(
+        "--rounds", type=int, default=3, help="processes to run the suite in"
+    )
+    compare_parser = commands.add_parser(
+        "compare", help="flag regressions against a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=10, help="allowed slowdown in percent"
+    )
+    compare_parser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=10,
+        help="allowed growth of peak memory in percent",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        with open(args.current, encoding="utf-8") as file:
+            current = json.load(file)
+        regressions = compare(baseline, current, args.threshold, args.memory_threshold)
+        return 1 if regressions else 0
+
+    if args.repeat < 3:
+        parser.error("--repeat must be at least 3 to estimate the noise")
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1")
+    if args.rounds > 1:
+        results = run_rounds(args)
+    else:
+        results = run(args.sizes, args.mixes, args.repeat, args.cipher)
+    if args.output:
+        report = {
+            "meta": {
+                "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
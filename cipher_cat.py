@@ -1,16 +1,41 @@
 import tkinter as tk
-from tkinter import ttk
-from PIL import Image, ImageTk
+from tkinter import filedialog, ttk
 from ciphers import (
+    CHUNK_SIZE,
     CaesarCipher,
     VigenereCipher,
     SubstitutionCipher,
     AffineCipher,
     TranspositionCipher,
+    AtbashCipher,
+    HillCipher,
+    PlayfairCipher,
     MorseCodeCipher,
+    LiveEncrypter,
+    Pipeline,
 )  # Ensure these modules are implemented
+import instrumentation
+from result_cache import (
+    HISTORY_LIMIT,
+    ResultCache,
+    ResultKey,
+    history_entry,
+    message_digest,
+)
+import codecs
+import hashlib
+import io
+import mmap
 import os
+import shutil
 import sys
+import tempfile
+import threading
+import time
+
+STARTED = time.perf_counter()
+# Set CIPHER_CAT_TIMING=1 to print start-up and window-switch times
+REPORT_TIMING = bool(os.environ.get("CIPHER_CAT_TIMING"))
 
 
 def resource_path(relative_path):
@@ -23,11 +48,340 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def asset_cache_dir():
+    """Per-user folder for pre-scaled copies of the images."""
+    base = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(base, "cipher_cat", "assets")
+
+
+photo_cache = {}  # (image path, size) -> PhotoImage, shared by every window
+
+
+def load_photo(relative_path, size):
+    """Get a PhotoImage of an image scaled to ``size``.
+
+    Each image is decoded and scaled once per process. The scaled copy is
+    also saved to the asset cache, so later launches load it straight into
+    Tk without PIL (PPM for opaque images since Tk reads it fastest, PNG
+    when transparency has to be kept).
+    """
+    key = (relative_path, size)
+    if key not in photo_cache:
+        photo_cache[key] = load_scaled_photo(relative_path, size)
+    return photo_cache[key]
+
+
+def load_scaled_photo(relative_path, size):
+    with open(resource_path(relative_path), "rb") as file:
+        data = file.read()
+    # Keyed by content: a PyInstaller one-file build re-extracts the images
+    # on every launch, so their modification times are not stable
+    digest = hashlib.sha1(data).hexdigest()[:16]
+    name = f"{os.path.splitext(os.path.basename(relative_path))[0]}-{digest}"
+    name += f"-{size[0]}x{size[1]}"
+    for extension in (".ppm", ".png"):
+        cached = os.path.join(asset_cache_dir(), name + extension)
+        if os.path.exists(cached):
+            try:
+                return tk.PhotoImage(file=cached)
+            except tk.TclError:
+                pass  # Damaged cache file, scale the image again below
+
+    # PIL is only needed when the cache is cold
+    from PIL import Image, ImageTk
+
+    image = Image.open(io.BytesIO(data)).resize(size, Image.LANCZOS)
+    opaque = "A" not in image.getbands() or image.getchannel("A").getextrema()[0] == 255
+    extension, saved = (".ppm", image.convert("RGB")) if opaque else (".png", image)
+    cached = os.path.join(asset_cache_dir(), name + extension)
+    try:
+        os.makedirs(asset_cache_dir(), exist_ok=True)
+        temporary = f"{cached}.{os.getpid()}.tmp"
+        saved.save(temporary, format=extension[1:].upper(), compress_level=1)
+        os.replace(temporary, cached)
+    except OSError:
+        pass  # Caching is only an optimisation
+    return ImageTk.PhotoImage(image)
+
+
 # Global variables to hold the image references
 bg_photo_initial = None
 bg_photo = None
 global_selected_cipher = None  # Initialize global_selected_cipher
 cipher_window = None  # Initialize cipher_window
+cipher_job = None  # The CipherJob currently running, if any
+
+POLL_INTERVAL = 16  # Milliseconds between progress updates (about 60 fps)
+LIVE_DELAY = 150  # Milliseconds after the last key press before a live update
+RESULT_ROWS, RESULT_COLUMNS = 4, 50  # Text that fits in the RESULT box
+input_path = None  # File opened from the File menu, used instead of the message
+result_cache = None  # ResultCache of message results, opened with the cipher window
+history_panel = None  # HistoryPanel of the cipher window
+message_hash = None  # message_digest of the message, until it changes
+message_edits = 0  # Changes to the message, to tell if it changed during a job
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # Already gone, or still open on Windows
+
+
+class CipherJob:
+    """Runs a streaming cipher method over a message in a worker thread.
+
+    The message is fed to ``transform`` (e.g. ``iter_encrypt``) in chunks,
+    so the worker can report progress and notice a cancel request between
+    chunks while the Tk main thread keeps handling events.
+    """
+
+    def __init__(self, transform, message, chunk_size=CHUNK_SIZE):
+        self.transform = transform
+        self.message = message
+        self.chunk_size = chunk_size
+        self.processed = 0
+        self.total = len(message)
+        self.pieces = []
+        self.error = None
+        self.finished = False
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def progress(self):
+        return self.processed / self.total if self.total else 1.0
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def result(self):
+        return "".join(self.pieces)
+
+    def _chunks(self):
+        for start in range(0, len(self.message), self.chunk_size):
+            if self._cancel.is_set():
+                return
+            yield self.message[start : start + self.chunk_size]
+            self.processed = min(start + self.chunk_size, len(self.message))
+
+    def _run(self):
+        try:
+            self._process()
+        except Exception as error:
+            self.error = error
+        finally:
+            self.finished = True
+
+    def _process(self):
+        for piece in self.transform(self._chunks()):
+            if self._cancel.is_set():
+                break
+            self.write(piece)
+
+    def write(self, piece):
+        self.pieces.append(piece)
+
+
+class CachedCipherJob(CipherJob):
+    """A CipherJob that looks for its result in the result cache first, and
+    stores it there and in the history when it is new.
+
+    Hashing the message and writing the store happen in the worker thread
+    too. ``key`` is the ResultKey, with ``digest`` None if the message has
+    not been hashed yet; ``edits`` is message_edits when the job started.
+    """
+
+    def __init__(self, transform, message, key, edits):
+        super().__init__(transform, message)
+        self.key = key
+        self.edits = edits
+        self.cached = False  # Whether the result came from the cache
+        self.entry = None  # HistoryEntry of the operation once finished
+
+    def _process(self):
+        if self.key.digest is None:
+            self.key = self.key._replace(digest=message_digest(self.message))
+        result = result_cache.get(self.key)
+        if result is not None:
+            self.cached = True
+            self.processed = self.total
+        else:
+            super()._process()
+            if self._cancel.is_set():
+                return
+            result = self.result()
+            result_cache.put(self.key, result)
+        self.pieces = [result]  # Joined once, not again by the main thread
+        self.entry = result_cache.record(self.key, self.message, result)
+
+
+class FileCipherJob(CipherJob):
+    """A CipherJob that reads a UTF-8 file and writes the result to another.
+
+    The input is memory-mapped and decoded a chunk at a time, and each
+    piece of output goes straight to ``output_path``, so neither file has
+    to fit in memory (except for transposition, which needs every column).
+    """
+
+    def __init__(self, transform, path, output_path, chunk_size=CHUNK_SIZE):
+        super().__init__(transform, "", chunk_size)
+        self.path = path
+        self.output_path = output_path
+        self.total = os.path.getsize(path)
+
+    def _chunks(self):
+        if not self.total:
+            return  # Empty files cannot be memory-mapped
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        released = 0
+        with open(self.path, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            for start in range(0, len(data), self.chunk_size):
+                if self._cancel.is_set():
+                    return
+                yield decoder.decode(data[start : start + self.chunk_size])
+                self.processed = min(start + self.chunk_size, len(data))
+                done = start // mmap.PAGESIZE * mmap.PAGESIZE
+                if hasattr(mmap, "MADV_DONTNEED") and done > released:
+                    # Let the pages already read go, or the whole file ends
+                    # up counted as resident memory
+                    data.madvise(mmap.MADV_DONTNEED, released, done - released)
+                    released = done
+        yield decoder.decode(b"", final=True)
+
+    def _run(self):
+        super()._run()
+        if self.error is not None or self.cancelled:
+            remove_file(self.output_path)
+
+    def _process(self):
+        with open(self.output_path, "w", encoding="utf-8", newline="") as self.output:
+            super()._process()
+
+    def write(self, piece):
+        self.output.write(piece)
+
+
+class FileViewer:
+    """Shows part of a UTF-8 file of any size in a Text widget.
+
+    The file is memory-mapped and only the rows that fit in the widget are
+    decoded and inserted. Long lines are split at every ``columns`` bytes
+    of the file. Scrolling moves a byte offset instead of using a line
+    index, so memory use does not grow with the file.
+    """
+
+    def __init__(self, text, scrollbar, path, rows, columns, temporary=False):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.rows = rows
+        self.columns = columns
+        self.offset = 0
+        self.open(path, temporary)
+        self.text.config(yscrollcommand="")
+        self.scrollbar.config(command=self.scroll)
+
+    def open(self, path, temporary=False):
+        self.path = path
+        self.temporary = temporary  # Deleted on close, unless saved
+        self.size = os.path.getsize(path)
+        self.file = open(path, "rb")
+        self.data = b""
+        if self.size:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offset = min(self.offset, self.size)
+        self.render()
+
+    def close(self, keep=False):
+        if self.size:
+            self.data.close()
+        self.file.close()
+        if self.temporary and not keep:
+            remove_file(self.path)
+
+    def save(self, path):
+        """Save a copy of the file, moving it if it was only temporary."""
+        if self.temporary:
+            self.close(keep=True)
+            shutil.move(self.path, path)
+            self.open(path)
+        else:
+            shutil.copyfile(self.path, path)
+
+    def _char_start(self, position):
+        # UTF-8 continuation bytes are 0b10xxxxxx
+        while 0 < position < self.size and self.data[position] & 0xC0 == 0x80:
+            position -= 1
+        return position
+
+    def _row_end(self, start):
+        """End of the row starting at ``start``, and where the next starts."""
+        # Rows end at a newline or at the next multiple of self.columns, so
+        # every row start can be found from any position without a search
+        boundary = self._char_start((start // self.columns + 1) * self.columns)
+        if boundary <= start:
+            boundary = self._char_start((start // self.columns + 2) * self.columns)
+        boundary = min(boundary, self.size)
+        newline = self.data.find(b"\n", start, boundary)
+        if newline != -1:
+            return newline, newline + 1
+        return boundary, boundary
+
+    def _row_start(self, position):
+        """Start of the row holding the byte at ``position``."""
+        start = self._char_start(position // self.columns * self.columns)
+        boundary = self._char_start((position // self.columns + 1) * self.columns)
+        if boundary <= position:
+            start = boundary
+        return max(start, self.data.rfind(b"\n", start, position) + 1)
+
+    def render(self):
+        rows = []
+        start = self.offset
+        while len(rows) < self.rows and start < self.size:
+            end, following = self._row_end(start)
+            rows.append(self.data[start:end].decode("utf-8", "replace"))
+            start = following
+        self.text.config(state="normal")
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(rows))
+        self.text.config(state="disabled")
+        if self.size:
+            self.scrollbar.set(self.offset / self.size, start / self.size)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll(self, action, amount, unit=None):
+        """Scrollbar command, also used for the mouse wheel."""
+        if not self.size:
+            return
+        if action == "moveto":
+            position = min(max(int(float(amount) * self.size), 0), self.size - 1)
+            self.offset = self._row_start(position)
+        else:
+            steps = int(amount) * (self.rows if unit == "pages" else 1)
+            for _ in range(abs(steps)):
+                if steps > 0:
+                    following = self._row_end(self.offset)[1]
+                    if following >= self.size:
+                        break
+                    self.offset = following
+                elif self.offset:
+                    self.offset = self._row_start(self.offset - 1)
+        self.render()
 
 
 def create_rounded_rectangle(canvas, x1, y1, x2, y2, radius=25, **kwargs):
@@ -77,25 +431,23 @@ def create_rounded_rectangle(canvas, x1, y1, x2, y2, radius=25, **kwargs):
 
 
 def open_cipher_window():
-    global cipher_window, content_frame, bg_photo
+    global cipher_window, content_frame, bg_photo, message_var, live_var, input_var
+    global status_var, result_cache, history_panel
 
     if cipher_window is not None:
-        cipher_window.destroy()
+        cipher_window.deiconify()  # Built already, just show it again
+        return
 
     cipher_window = tk.Toplevel()  # Use Toplevel to allow multiple windows
     cipher_window.title("Cipher GUI")
+    cipher_window.protocol("WM_DELETE_WINDOW", go_back)
 
     # Set the size of the window to 1920x1080 and prevent resizing
     cipher_window.geometry("1920x1080")
     cipher_window.resizable(False, False)
 
-    # Load the background image
-    bg_image_original = Image.open(resource_path("images/CIpherCat.png"))
-
-    bg_image_resized = bg_image_original.resize(
-        (1920, 1080), Image.LANCZOS
-    )  # Set size to match window
-    bg_photo = ImageTk.PhotoImage(bg_image_resized)
+    # Load the background image, scaled to match the window
+    bg_photo = load_photo("images/CIpherCat.png", (1920, 1080))
 
     # Create and place the background label
     background_label = tk.Label(cipher_window, image=bg_photo, bg="white")
@@ -108,17 +460,41 @@ def open_cipher_window():
         x=750, rely=0.5, anchor="center"
     )  # Adjusted x value to move frame more to the left
 
-    # Initialize the GUI for the default cipher
-    update_cipher_options(None)
+    # File menu for working on files too big for the message box
+    menu_bar = tk.Menu(cipher_window)
+    file_menu = tk.Menu(menu_bar, tearoff=0)
+    file_menu.add_command(label="Open...", command=open_input_file)
+    file_menu.add_command(label="Save Result As...", command=save_result)
+    file_menu.add_command(label="Clear History", command=lambda: history_panel.clear())
+    file_menu.add_separator()
+    file_menu.add_command(label="Close File", command=lambda: set_input_file(None))
+    menu_bar.add_cascade(label="File", menu=file_menu)
+    cipher_window.config(menu=menu_bar)
+
+    # Every cipher screen shares the message, so it survives switching
+    message_var = tk.StringVar(cipher_window)
+    input_var = tk.StringVar(cipher_window)
+    message_var.trace_add("write", message_written)
+    live_var = tk.BooleanVar(cipher_window, value=False)
+
+    # Earlier results, kept between runs
+    result_cache = ResultCache()
+    history_panel = HistoryPanel(cipher_window)
+    history_panel.frame.place(x=1550, rely=0.5, anchor="center")
+
+    # Status bar with the time and speed of the last cipher operation
+    status_var = tk.StringVar(cipher_window)
+    tk.Label(
+        cipher_window,
+        textvariable=status_var,
+        anchor="w",
+        bg="#efefef",
+        font=("Lucida Console", 11),
+        padx=10,
+    ).place(relx=0, rely=1, relwidth=1, anchor="sw")
 
     # Add the Back button with image
-    back_image = Image.open(
-        resource_path("images/back_button_image.png")
-    )  # Load image for back button
-    back_image_resized = back_image.resize(
-        (150, 100), Image.LANCZOS
-    )  # Resize if needed
-    back_photo = ImageTk.PhotoImage(back_image_resized)
+    back_photo = load_photo("images/back_button_image.png", (150, 100))
     back_button = tk.Button(
         cipher_window, image=back_photo, command=go_back, bd=0, bg="#efefef"
     )
@@ -127,226 +503,709 @@ def open_cipher_window():
 
 
 def go_back():
-    global cipher_window, global_selected_cipher
+    global global_selected_cipher
 
+    stop_cipher_job()
     if cipher_window:
-        cipher_window.destroy()
-        cipher_window = None  # Reset the cipher window global variable
+        cipher_window.withdraw()  # Kept for next time instead of destroyed
 
     global_selected_cipher = None  # Reset the selected cipher
     initial_window.deiconify()  # Show the initial window again
 
 
-def update_cipher_options(event=None):  # Add default parameter for event
-    cipher_type = global_selected_cipher
-
-    # Clear existing widgets in the content frame
-    for widget in content_frame.winfo_children():
-        widget.destroy()  # Use destroy instead of pack_forget
+class CipherScreen:
+    """The widgets for one cipher, built once and then shown or hidden."""
 
     # Define a custom font
     custom_font = ("ISOCPEUR", 24)
     entry_font = ("Lucida Console", 14)
 
-    # Add widgets based on the selected cipher
-    tk.Label(content_frame, text="MESSAGE", font=custom_font).pack(
-        padx=10, pady=10, anchor="center"
-    )
+    button_style = {
+        "font": ("ISOCTEUR", 12),
+        "bg": "black",
+        "fg": "white",
+        "activebackground": "grey",
+        "activeforeground": "white",
+        "width": 7,
+        "height": 1,
+        "relief": "flat",
+    }
 
-    global message_entry
-    canvas_message = tk.Canvas(
-        content_frame, width=500, height=50, bg="#efefef", highlightthickness=0
-    )
-    canvas_message.pack(padx=10, pady=10, anchor="center")
-    create_rounded_rectangle(canvas_message, 0, 0, 500, 50, radius=20, fill="#3d3d3d")
-
-    message_entry = tk.Entry(
-        canvas_message,
-        width=50,
-        font=entry_font,
-        bg="#3d3d3d",
-        fg="white",
-        insertbackground="white",
-        relief="flat",
-    )
-    message_entry.place(x=5, y=5, width=490, height=40)
+    def __init__(self, parent, cipher_type):
+        self.cipher_type = cipher_type
+        self.frame = tk.Frame(parent, bg="#efefef")
+        self.shift_entry = None
+        self.key_entry = None
+
+        self.add_label("MESSAGE")
+        self.message_entry = self.add_entry(textvariable=message_var)
+        # Report every edit, so live mode knows which part of the message
+        # changed without comparing it with the old one
+        self.message_entry.config(
+            validate="key",
+            validatecommand=(
+                self.frame.register(self.note_edit),
+                "%d",
+                "%i",
+                "%S",
+            ),
+        )
+        self.message_entry.bind("<KeyRelease>", schedule_live_update)
+        # Name of the opened file, which is used instead of the message
+        tk.Label(self.frame, textvariable=input_var, font=self.entry_font).pack(
+            anchor="center"
+        )
 
-    # Only show key entry if necessary
-    if cipher_type in ["Caesar Cipher", "Affine Cipher"]:
-        tk.Label(content_frame, text="SHIFT", font=custom_font).pack(
-            padx=10, pady=10, anchor="center"
+        # Only show key entry if necessary
+        if cipher_type in ["Caesar Cipher", "Affine Cipher"]:
+            self.add_label("SHIFT")
+            self.shift_entry = self.add_entry()
+            self.shift_entry.bind("<KeyRelease>", key_changed)
+
+        if cipher_type in [
+            "Vigenere Cipher",
+            "Substitution Cipher",
+            "Transposition Cipher",
+            "Hill Cipher",
+            "Playfair Cipher",
+        ]:
+            self.add_label("Key:")
+            self.key_entry = self.add_entry()
+            self.key_entry.bind("<KeyRelease>", key_changed)
+
+        if cipher_type == "Cipher Chain":
+            self.add_chain_builder()
+
+        # Add Encrypt, Cancel and Decrypt buttons
+        button_frame = tk.Frame(self.frame, bg="#efefef")
+        button_frame.pack(padx=10, pady=10, anchor="center")
+        self.encrypt_button = self.add_button(
+            button_frame, "ENCRYPT", lambda: perform_cipher("Encrypt"), side="left"
+        )
+        self.decrypt_button = self.add_button(
+            button_frame, "DECRYPT", lambda: perform_cipher("Decrypt"), side="right"
+        )
+        self.cancel_button = self.add_button(
+            button_frame, "CANCEL", cancel_cipher_job, side="left", state="disabled"
         )
 
-        global shift_entry
-        canvas_shift = tk.Canvas(
-            content_frame, width=500, height=50, bg="#efefef", highlightthickness=0
+        self.progress_bar = ttk.Progressbar(
+            self.frame, orient="horizontal", length=500, mode="determinate"
+        )
+        self.progress_bar.pack(padx=10, pady=(0, 10), anchor="center")
+
+        tk.Checkbutton(
+            self.frame,
+            text="LIVE",
+            variable=live_var,
+            command=key_changed,
+            font=self.button_style["font"],
+        ).pack(anchor="center")
+
+        self.add_label("RESULT")
+        canvas_result = tk.Canvas(
+            self.frame, width=600, height=100, bg="#efefef", highlightthickness=0
+        )
+        canvas_result.pack(padx=10, pady=10, anchor="center")
+        create_rounded_rectangle(
+            canvas_result, 0, 0, 600, 100, radius=20, fill="#3d3d3d"
         )
-        canvas_shift.pack(padx=10, pady=10, anchor="center")
-        create_rounded_rectangle(canvas_shift, 0, 0, 500, 50, radius=20, fill="#3d3d3d")
 
-        shift_entry = tk.Entry(
-            canvas_shift,
-            width=50,
-            font=entry_font,
+        self.result_text = tk.Text(
+            canvas_result,
+            height=4,
+            width=60,
+            wrap=tk.WORD,
+            font=self.entry_font,
             bg="#3d3d3d",
             fg="white",
             insertbackground="white",
             relief="flat",
         )
-        shift_entry.place(x=5, y=5, width=490, height=40)
-
-    if cipher_type in [
-        "Vigenere Cipher",
-        "Substitution Cipher",
-        "Transposition Cipher",
-    ]:
-        tk.Label(content_frame, text="Key:", font=custom_font).pack(
+        self.result_text.place(x=5, y=5, width=570, height=90)
+        self.result_scrollbar = ttk.Scrollbar(canvas_result, orient="vertical")
+        self.result_scrollbar.place(x=577, y=5, width=18, height=90)
+        self.use_text_scrolling()
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.result_text.bind(sequence, self.wheel)
+        self.viewer = None  # FileViewer while the result is a file
+
+    def add_label(self, text):
+        tk.Label(self.frame, text=text, font=self.custom_font).pack(
             padx=10, pady=10, anchor="center"
         )
 
-        global key_entry
-        canvas_key = tk.Canvas(
-            content_frame, width=500, height=50, bg="#efefef", highlightthickness=0
+    def add_entry(self, **options):
+        canvas = tk.Canvas(
+            self.frame, width=500, height=50, bg="#efefef", highlightthickness=0
         )
-        canvas_key.pack(padx=10, pady=10, anchor="center")
-        create_rounded_rectangle(canvas_key, 0, 0, 500, 50, radius=20, fill="#3d3d3d")
+        canvas.pack(padx=10, pady=10, anchor="center")
+        create_rounded_rectangle(canvas, 0, 0, 500, 50, radius=20, fill="#3d3d3d")
 
-        key_entry = tk.Entry(
-            canvas_key,
+        entry = tk.Entry(
+            canvas,
             width=50,
-            font=entry_font,
+            font=self.entry_font,
             bg="#3d3d3d",
             fg="white",
             insertbackground="white",
             relief="flat",
+            **options,
         )
-        key_entry.place(x=5, y=5, width=490, height=40)
+        entry.place(x=5, y=5, width=490, height=40)
+        return entry
 
-    # Add Encrypt and Decrypt buttons
-    global encrypt_button, decrypt_button, result_label, result_text
-    button_frame = tk.Frame(content_frame, bg="#efefef")
-    button_frame.pack(padx=10, pady=10, anchor="center")
+    def add_button(self, parent, text, command, side, **options):
+        canvas = tk.Canvas(
+            parent, width=105, height=40, bg="#efefef", highlightthickness=0
+        )
+        canvas.pack(side=side, padx=10)
+        create_rounded_rectangle(canvas, 0, 0, 105, 40, radius=10, fill="black")
 
-    button_style = {
-        "font": ("ISOCTEUR", 12),
-        "bg": "black",
-        "fg": "white",
-        "activebackground": "grey",
-        "activeforeground": "white",
-        "width": 7,
-        "height": 1,
-        "relief": "flat",
-    }
+        button = tk.Button(
+            canvas, text=text, command=command, **self.button_style, **options
+        )
+        button.place(x=5, y=5, width=95, height=30)
+        return button
+
+    def add_chain_builder(self):
+        self.chain = []  # with_key ciphers, applied in order
+        self.add_label("CHAIN")
+        row = tk.Frame(self.frame, bg="#efefef")
+        row.pack(padx=10, pady=10, anchor="center")
+        self.stage_choice = ttk.Combobox(
+            row,
+            values=list(CHAIN_STAGES),
+            state="readonly",
+            width=14,
+            font=self.entry_font,
+        )
+        self.stage_choice.current(0)
+        self.stage_choice.pack(side="left", padx=5)
+        # Shift or key word for the stage, if it needs one
+        self.stage_key = tk.Entry(
+            row,
+            width=16,
+            font=self.entry_font,
+            bg="#3d3d3d",
+            fg="white",
+            insertbackground="white",
+            relief="flat",
+        )
+        self.stage_key.pack(side="left", padx=5)
+        self.add_button(row, "ADD", self.add_stage, side="left")
+        self.add_button(row, "REMOVE", self.remove_stage, side="left")
+
+        self.chain_list = tk.Listbox(
+            self.frame,
+            height=4,
+            width=40,
+            font=self.entry_font,
+            bg="#3d3d3d",
+            fg="white",
+            relief="flat",
+        )
+        self.chain_list.pack(padx=10, pady=10, anchor="center")
 
-    canvas_encrypt = tk.Canvas(
-        button_frame, width=105, height=40, bg="#efefef", highlightthickness=0
-    )
-    canvas_encrypt.pack(side="left", padx=10)
-    create_rounded_rectangle(canvas_encrypt, 0, 0, 105, 40, radius=10, fill="black")
-
-    encrypt_button = tk.Button(
-        canvas_encrypt,
-        text="ENCRYPT",
-        command=lambda: perform_cipher("Encrypt"),
-        **button_style,
-    )
-    encrypt_button.place(x=5, y=5, width=95, height=30)
+    def add_stage(self):
+        name, key = self.stage_choice.get(), self.stage_key.get()
+        try:
+            self.chain.append(CHAIN_STAGES[name](key))
+        except ValueError as error:
+            self.show_result(f"{name}: {error}")
+            return
+        self.chain_list.insert(tk.END, f"{name} {key}".strip())
+        key_changed()
+
+    def remove_stage(self):
+        """Remove the selected stage, or the last one."""
+        selection = self.chain_list.curselection()
+        index = selection[0] if selection else len(self.chain) - 1
+        if index >= 0:
+            del self.chain[index]
+            self.chain_list.delete(index)
+            key_changed()
+
+    def note_edit(self, action, index, text):
+        """Record where the entry is about to change the message."""
+        global pending_edit
+
+        length = self.message_entry.index(tk.END)
+        index = int(index)
+        if action == "1":  # Insertion
+            pending_edit = (index, length - index)
+        elif action == "0":  # Deletion
+            pending_edit = (index, length - index - len(text))
+        return True
+
+    def show(self):
+        self.frame.pack()
+
+    def hide(self):
+        self.frame.pack_forget()
+
+    def use_text_scrolling(self):
+        self.result_scrollbar.config(command=self.result_text.yview)
+        self.result_text.config(yscrollcommand=self.result_scrollbar.set)
+
+    def wheel(self, event):
+        if self.viewer is None:
+            return None  # The Text scrolls itself
+        down = event.num == 5 or event.delta < 0
+        self.viewer.scroll("scroll", 3 if down else -3, "units")
+        return "break"
+
+    def close_viewer(self):
+        if self.viewer is not None:
+            self.viewer.close()
+            self.viewer = None
+            self.result_text.config(state="normal")
+            self.use_text_scrolling()
+
+    def show_result(self, text):
+        self.close_viewer()
+        self.result_text.delete(1.0, tk.END)
+        self.result_text.insert(tk.END, text)
+
+    def show_file(self, path, temporary=False):
+        """Show a result file of any size, reading only the visible rows."""
+        self.close_viewer()
+        self.viewer = FileViewer(
+            self.result_text,
+            self.result_scrollbar,
+            path,
+            RESULT_ROWS,
+            RESULT_COLUMNS,
+            temporary,
+        )
 
-    canvas_decrypt = tk.Canvas(
-        button_frame, width=105, height=40, bg="#efefef", highlightthickness=0
-    )
-    canvas_decrypt.pack(side="right", padx=10)
-    create_rounded_rectangle(canvas_decrypt, 0, 0, 105, 40, radius=10, fill="black")
-
-    decrypt_button = tk.Button(
-        canvas_decrypt,
-        text="DECRYPT",
-        command=lambda: perform_cipher("Decrypt"),
-        **button_style,
-    )
-    decrypt_button.place(x=5, y=5, width=95, height=30)
 
-    tk.Label(content_frame, text="RESULT", font=custom_font).pack(
-        padx=10, pady=10, anchor="center"
-    )
+class HistoryPanel:
+    """Earlier results from the result cache, searchable, to show again or
+    save."""
 
-    canvas_result = tk.Canvas(
-        content_frame, width=600, height=100, bg="#efefef", highlightthickness=0
-    )
-    canvas_result.pack(padx=10, pady=10, anchor="center")
-    create_rounded_rectangle(canvas_result, 0, 0, 600, 100, radius=20, fill="#3d3d3d")
-
-    result_text = tk.Text(
-        canvas_result,
-        height=4,
-        width=60,
-        wrap=tk.WORD,
-        font=entry_font,
-        bg="#3d3d3d",
-        fg="white",
-        insertbackground="white",
-        relief="flat",
-    )
-    result_text.place(x=5, y=5, width=590, height=90)
+    def __init__(self, parent):
+        self.entries = []  # HistoryEntry for each row of the list
+        self.frame = tk.Frame(parent, bg="#efefef", padx=20, pady=20)
+        tk.Label(self.frame, text="HISTORY", font=CipherScreen.custom_font).pack(
+            padx=10, pady=10, anchor="center"
+        )
+        self.search_var = tk.StringVar(parent)
+        self.search_var.trace_add("write", self.refresh)
+        tk.Entry(
+            self.frame,
+            textvariable=self.search_var,
+            width=40,
+            font=CipherScreen.entry_font,
+            bg="#3d3d3d",
+            fg="white",
+            insertbackground="white",
+            relief="flat",
+        ).pack(padx=10, pady=10, anchor="center")
+        self.listbox = tk.Listbox(
+            self.frame,
+            height=20,
+            width=40,
+            font=CipherScreen.entry_font,
+            bg="#3d3d3d",
+            fg="white",
+            relief="flat",
+        )
+        self.listbox.pack(padx=10, pady=10, anchor="center")
+        self.listbox.bind("<Double-Button-1>", self.show)
+        row = tk.Frame(self.frame, bg="#efefef")
+        row.pack(padx=10, pady=10, anchor="center")
+        for text, command in (("SHOW", self.show), ("SAVE", self.save)):
+            tk.Button(
+                row, text=text, command=command, **CipherScreen.button_style
+            ).pack(side="left", padx=10)
+        self.refresh()
+
+    @staticmethod
+    def describe(entry):
+        when = time.strftime("%d %b %H:%M", time.localtime(entry.time))
+        message = " ".join(entry.message.split())
+        return f"{when} {entry.direction} {entry.cipher} {entry.key}: {message}"
+
+    def refresh(self, *args):
+        self.entries = result_cache.history(self.search_var.get())
+        self.listbox.delete(0, tk.END)
+        for entry in self.entries:
+            self.listbox.insert(tk.END, self.describe(entry))
+
+    def add(self, entry):
+        """Show a new entry at the top, without searching the store again."""
+        if not entry.matches(self.search_var.get()):
+            return
+        self.entries.insert(0, entry)
+        self.listbox.insert(0, self.describe(entry))
+        if len(self.entries) > HISTORY_LIMIT:
+            self.entries.pop()
+            self.listbox.delete(tk.END)
+
+    def clear(self):
+        result_cache.clear_history()
+        self.refresh()
+
+    def selected_result(self):
+        """The full result of the selected entry, or None after showing why
+        there is none."""
+        selection = self.listbox.curselection()
+        if not selection:
+            current_screen.show_result("Select a result in the history first.")
+            return None
+        result = result_cache.get(self.entries[selection[0]].result_key)
+        if result is None:
+            current_screen.show_result("That result is no longer in the cache.")
+        return result
+
+    def show(self, event=None):
+        result = self.selected_result()
+        if result is not None:
+            stop_cipher_job()
+            stop_live_update()
+            current_screen.show_result(result)
+
+    def save(self):
+        result = self.selected_result()
+        if result is None:
+            return
+        path = ask_save_path()
+        if not path:
+            return
+        try:
+            save_text(path, result)
+        except OSError as error:
+            current_screen.show_result(f"Error: {error}")
 
 
-def perform_cipher(action):
+cipher_screens = {}  # Cipher type -> CipherScreen, built the first time it is shown
+current_screen = None
+live_encrypter = None  # Keeps the live result in step with the message
+NO_EDIT = (sys.maxsize, sys.maxsize)
+# (start, tail) of the message edited since the last live update, see
+# LiveEncrypter.update, or None if unknown
+live_edit = NO_EDIT
+pending_edit = None  # Edit reported by the message entry but not yet written
+live_update_id = None
+
+
+def update_cipher_options(event=None):  # Add default parameter for event
+    """Show the screen for the selected cipher, building it on first use."""
+    global current_screen
+
     cipher_type = global_selected_cipher
-    message = message_entry.get()
+    stop_cipher_job()
+    key_changed()
+
+    screen = cipher_screens.get(cipher_type)
+    if screen is None:
+        screen = cipher_screens[cipher_type] = CipherScreen(content_frame, cipher_type)
+    if screen is not current_screen:
+        if current_screen is not None:
+            current_screen.hide()
+        screen.show()
+        current_screen = screen
+
+
+def parse_shift(text):
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError("Shift must be an integer.") from None
+
+
+# Stage name -> cipher for the text typed in the chain builder's key box
+CHAIN_STAGES = {
+    "Atbash": lambda key: AtbashCipher.with_key(),
+    "Caesar": lambda key: CaesarCipher.with_key(parse_shift(key)),
+    "Vigenere": VigenereCipher.with_key,
+    "Substitution": SubstitutionCipher.with_key,
+    "Affine": lambda key: AffineCipher.with_key(parse_shift(key)),
+    "Transposition": TranspositionCipher.with_key,
+    "Hill": HillCipher.with_key,
+    "Playfair": PlayfairCipher.with_key,
+}
+
+
+# Attributes a cipher's output depends on, for the key in the result cache;
+# the other ciphers only depend on ``key``
+KEY_ATTRIBUTES = {
+    CaesarCipher: ("shift",),
+    AffineCipher: ("a", "b"),
+    AtbashCipher: (),
+    TranspositionCipher: ("order",),
+}
+
+
+def cipher_key(cipher):
+    """The key of a cipher from make_cipher for its ResultKey.
+
+    It is built from the classes and keys of the ciphers, as Pipeline
+    fuses them, rather than from what the screen shows for them.
+    """
+    if cipher is MorseCodeCipher:
+        return ""
+    if isinstance(cipher, Pipeline):
+        stages = (
+            (
+                cipher_key(stage)
+                if isinstance(stage, Pipeline)
+                else f"{type(stage.cipher).__name__}({cipher_key(stage)})"
+            )
+            for stage in cipher.stages
+        )
+        return "[{}]".format(", ".join(stages))
+    cipher = cipher.cipher
+    attributes = KEY_ATTRIBUTES.get(type(cipher), ("key",))
+    return ", ".join(repr(getattr(cipher, name)) for name in attributes)
+
+
+def make_cipher(screen):
+    """The cipher for a screen with its key, or MorseCodeCipher for Morse."""
+    cipher_type = screen.cipher_type
 
     # Get shift value if applicable
     shift = None
-    if cipher_type in ["Caesar Cipher", "Affine Cipher"] and "shift_entry" in globals():
-        shift = shift_entry.get()
-        try:
-            shift = int(shift)
-        except ValueError:
-            result_text.delete(1.0, tk.END)
-            result_text.insert(tk.END, "Shift must be an integer.")
-            return
+    if screen.shift_entry is not None:
+        shift = parse_shift(screen.shift_entry.get())
 
     # Get key value if applicable
     key = None
-    if (
-        cipher_type
-        in ["Vigenere Cipher", "Substitution Cipher", "Transposition Cipher"]
-        and "key_entry" in globals()
-    ):
-        key = key_entry.get()
-
-    # Select the cipher based on the global selection
-    cipher = None
+    if screen.key_entry is not None:
+        key = screen.key_entry.get()
+
+    # Select the cipher based on the screen
     if cipher_type == "Caesar Cipher":
-        cipher = CaesarCipher(message, shift)
+        return CaesarCipher.with_key(shift)
     elif cipher_type == "Vigenere Cipher":
-        cipher = VigenereCipher(message, key)
+        return VigenereCipher.with_key(key)
     elif cipher_type == "Substitution Cipher":
-        cipher = SubstitutionCipher(message, key)
+        return SubstitutionCipher.with_key(key)
     elif cipher_type == "Affine Cipher":
-        cipher = AffineCipher(message, shift)
+        return AffineCipher.with_key(shift)
     elif cipher_type == "Transposition Cipher":
-        cipher = TranspositionCipher(message, key)
+        return TranspositionCipher.with_key(key)
+    elif cipher_type == "Hill Cipher":
+        return HillCipher.with_key(key)
+    elif cipher_type == "Playfair Cipher":
+        return PlayfairCipher.with_key(key)
     elif cipher_type == "Morse Code":
+        return MorseCodeCipher
+    elif cipher_type == "Cipher Chain":
+        if not screen.chain:
+            raise ValueError("Add at least one cipher to the chain.")
+        # Neighbouring stages are fused into single passes
+        return Pipeline(screen.chain)
+    raise ValueError("Unknown cipher type.")
+
+
+def perform_cipher(action):
+    screen = current_screen
+    try:
+        cipher = make_cipher(screen)
+    except ValueError as error:
+        screen.show_result(str(error))
+        return
+
+    # Perform the encryption or decryption
+    if cipher is MorseCodeCipher:
         if action == "Encrypt":
-            result = MorseCodeCipher.encode(message)
+            transform = MorseCodeCipher.iter_encode
         else:
-            result = MorseCodeCipher.decode(message)
-        result_text.delete(1.0, tk.END)
-        result_text.insert(tk.END, result)
+            transform = MorseCodeCipher.iter_decode
+    elif action == "Encrypt":
+        transform = cipher.iter_encrypt
+    else:
+        transform = cipher.iter_decrypt
+
+    if input_path is None:
+        started = time.perf_counter()
+        key = ResultKey(screen.cipher_type, action, cipher_key(cipher), message_hash)
+        # Only a result already in memory is used here; hashing the message
+        # or reading the store is left to the job
+        result = None if message_hash is None else result_cache.peek(key)
+        if result is None:
+            job = CachedCipherJob(transform, message_var.get(), key, message_edits)
+            start_cipher_job(job)
+            return
+        # Done before, so no need to run the cipher again
+        stop_cipher_job()
+        stop_live_update()
+        screen.show_result(result)
+        elapsed = (time.perf_counter() - started) * 1e6
+        status_var.set(
+            f"{action}: {len(result):,} characters from the cache in {elapsed:.0f} µs"
+        )
+        message = message_var.get()
+        history_panel.add(history_entry(key, message, result))
+        threading.Thread(
+            target=result_cache.record, args=(key, message, result), daemon=True
+        ).start()
+        return
+    # Files go straight to a temporary file, kept if the result is saved
+    descriptor, output_path = tempfile.mkstemp(prefix="cipher_cat-", suffix=".txt")
+    os.close(descriptor)
+    try:
+        job = FileCipherJob(transform, input_path, output_path)
+    except OSError as error:
+        remove_file(output_path)
+        screen.show_result(f"Error: {error}")
         return
+    start_cipher_job(job)
+
+
+def message_written(*args):
+    """Trace on the message, widening the edited span."""
+    global live_edit, pending_edit, message_hash, message_edits
+
+    message_hash = None
+    message_edits += 1
+    if pending_edit is None or live_edit is None:
+        live_edit = None  # Not typed, so compare with the old message
     else:
-        result_text.delete(1.0, tk.END)
-        result_text.insert(tk.END, "Unknown cipher type.")
+        live_edit = min(live_edit[0], pending_edit[0]), min(
+            live_edit[1], pending_edit[1]
+        )
+    pending_edit = None
+    schedule_live_update()
+
+
+def key_changed(event=None):
+    """The key or shift changed, so the live result starts over."""
+    global live_encrypter
+
+    live_encrypter = None
+    schedule_live_update()
+
+
+def stop_live_update():
+    """Forget the live result, which is about to be replaced."""
+    global live_encrypter, live_update_id
+
+    live_encrypter = None
+    if live_update_id is not None:
+        initial_window.after_cancel(live_update_id)
+        live_update_id = None
+
+
+def schedule_live_update(event=None):
+    """Debounce live updates until typing pauses for LIVE_DELAY."""
+    global live_update_id
+
+    if live_update_id is not None:
+        initial_window.after_cancel(live_update_id)
+        live_update_id = None
+    if live_var.get():
+        live_update_id = initial_window.after(LIVE_DELAY, update_live_result)
+
+
+def update_live_result():
+    """Apply only the changed part of the encryption to the RESULT box."""
+    global live_encrypter, live_edit, live_update_id
+
+    live_update_id = None
+    screen = current_screen
+    if screen is None or not live_var.get() or cipher_job is not None:
+        return
+    if input_path is not None:
+        return  # Encrypt and Decrypt use the file instead of the message
+    edit, live_edit = live_edit, NO_EDIT
+    try:
+        if live_encrypter is None:
+            live_encrypter = LiveEncrypter(make_cipher(screen))
+            screen.show_result("")
+            edit = None
+        if edit is None:
+            edits = live_encrypter.update(message_var.get())
+        else:
+            edits = live_encrypter.update(message_var.get(), *edit)
+    except Exception as error:
+        live_encrypter = None
+        screen.show_result(f"Error: {error}")
         return
+    for start, end, text in edits:
+        screen.result_text.delete(f"1.0 + {start} chars", f"1.0 + {end} chars")
+        screen.result_text.insert(f"1.0 + {start} chars", text)
+    show_last_operation()
 
-    # Perform the encryption or decryption
-    if action == "Encrypt":
-        result = cipher.encrypt()
+
+def show_last_operation():
+    operation = instrumentation.metrics.last
+    if operation is not None:
+        status_var.set(operation.describe())
+
+
+def start_cipher_job(job):
+    """Run the cipher in the background, keeping the window responsive."""
+    global cipher_job
+
+    stop_cipher_job()
+    key_changed()  # The job replaces the live result
+    cipher_job = job
+    set_job_controls(current_screen, running=True)
+    cipher_job.start()
+    initial_window.after(POLL_INTERVAL, poll_cipher_job, cipher_job, current_screen)
+
+
+def poll_cipher_job(job, screen):
+    global cipher_job, message_hash
+
+    if job is not cipher_job:
+        return  # Cancelled by going back or switching ciphers
+    screen.progress_bar["value"] = 100 * job.progress
+    if not job.finished:
+        initial_window.after(POLL_INTERVAL, poll_cipher_job, job, screen)
+        return
+
+    cipher_job = None
+    set_job_controls(screen, running=False)
+    if isinstance(job, FileCipherJob) and job.cancelled:
+        remove_file(job.output_path)  # In case it finished before noticing
+    if job.error is not None:
+        screen.show_result(f"Error: {job.error}")
+    elif job.cancelled:
+        screen.show_result("Cancelled.")
+    elif isinstance(job, FileCipherJob):
+        screen.show_file(job.output_path, temporary=True)
+        show_last_operation()
     else:
-        result = cipher.decrypt()
+        result = job.result()
+        screen.show_result(result)
+        show_last_operation()
+        if isinstance(job, CachedCipherJob):
+            if job.edits == message_edits:
+                message_hash = job.key.digest
+            if job.cached:
+                status_var.set(
+                    f"{job.key.direction}: {len(result):,} characters from the cache"
+                )
+            history_panel.add(job.entry)
+
+
+def cancel_cipher_job():
+    if cipher_job is not None:
+        cipher_job.cancel()
 
-    result_text.delete(1.0, tk.END)
-    result_text.insert(tk.END, result)
+
+def stop_cipher_job():
+    """Cancel any running job and forget it, re-enabling its screen."""
+    global cipher_job
+
+    if cipher_job is not None:
+        cipher_job.cancel()
+        cipher_job = None
+        if current_screen is not None:
+            set_job_controls(current_screen, running=False)
+
+
+def set_job_controls(screen, running):
+    state = "disabled" if running else "normal"
+    screen.encrypt_button.config(state=state)
+    screen.decrypt_button.config(state=state)
+    screen.cancel_button.config(state="normal" if running else "disabled")
+    if running:
+        screen.progress_bar["value"] = 0
 
 
 def select_cipher(cipher_type):
@@ -354,74 +1213,160 @@ def select_cipher(cipher_type):
     global_selected_cipher = cipher_type
 
     # Hide initial screen and show cipher window
+    started = time.perf_counter()
     initial_window.withdraw()  # Hide the initial window
     open_cipher_window()
+    update_cipher_options()
+    if REPORT_TIMING:
+        cipher_window.update_idletasks()
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"Opened {cipher_type} in {elapsed:.1f} ms", file=sys.stderr)
+
+
+def open_input_file():
+    path = filedialog.askopenfilename(
+        parent=cipher_window,
+        title="Open a text file to encrypt or decrypt",
+        filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+    )
+    if path:
+        set_input_file(path)
+
+
+def set_input_file(path):
+    """Use a UTF-8 file instead of the message (None to go back to it)."""
+    global input_path
+
+    input_path = path
+    if path is None:
+        input_var.set("")
+        key_changed()
+        return
+    size = os.path.getsize(path)
+    if size < 1 << 20:
+        size = f"{size / (1 << 10):.1f} KB"
+    else:
+        size = f"{size / (1 << 20):.1f} MB"
+    input_var.set(f"File: {os.path.basename(path)} ({size})")
+
+
+def ask_save_path():
+    return filedialog.asksaveasfilename(
+        parent=cipher_window,
+        title="Save the result",
+        defaultextension=".txt",
+        filetypes=[("Text files", "*.txt"), ("All files", "*.*")],
+    )
+
+
+def save_text(path, text):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        file.write(text)
+
+
+def save_result():
+    screen = current_screen
+    path = ask_save_path()
+    if not path:
+        return
+    try:
+        if screen.viewer is not None:
+            screen.viewer.save(path)
+        else:
+            save_text(path, screen.result_text.get(1.0, "end-1c"))
+    except OSError as error:
+        screen.show_result(f"Error: {error}")
 
 
 def exit_application():
+    stop_cipher_job()
+    for screen in cipher_screens.values():
+        screen.close_viewer()  # Removes temporary result files
+    if result_cache is not None:
+        result_cache.close()
     initial_window.destroy()  # Close the initial window and exit the application
 
 
-# Create the initial window for cipher selection
-initial_window = tk.Tk()
-initial_window.title("Select Cipher")
+def build_initial_window():
+    global initial_window, bg_photo_initial
 
-# Set the size of the window and prevent resizing
-initial_window.geometry("1920x1080")
-initial_window.resizable(False, False)
+    # Create the initial window for cipher selection
+    initial_window = tk.Tk()
+    initial_window.title("Select Cipher")
 
-# Load the background image for the initial window
-bg_image_initial = Image.open(resource_path("images/CIpherCat1.png"))
+    # Set the size of the window and prevent resizing
+    initial_window.geometry("1920x1080")
+    initial_window.resizable(False, False)
 
-bg_image_initial = bg_image_initial.resize(
-    (1920, 1080), Image.LANCZOS
-)  # Set size to match window
-bg_photo_initial = ImageTk.PhotoImage(bg_image_initial)
+    # Load the background image for the initial window, scaled to match it
+    bg_photo_initial = load_photo("images/CIpherCat1.png", (1920, 1080))
 
-# Create and place the background label for the initial window
-background_label_initial = tk.Label(initial_window, image=bg_photo_initial, bg="white")
-background_label_initial.place(x=0, y=0, relwidth=1, relheight=1)
+    # Create and place the background label for the initial window
+    background_label_initial = tk.Label(
+        initial_window, image=bg_photo_initial, bg="white"
+    )
+    background_label_initial.place(x=0, y=0, relwidth=1, relheight=1)
+
+    # Create a frame to hold the content and align it to the center vertically
+    initial_frame = tk.Frame(initial_window, bg="#efefef", padx=20, pady=20)
+    initial_frame.place(
+        x=675,
+        y=75,
+        rely=0.5,
+        anchor="center",  # Center horizontally with adjusted x value
+    )
 
-# Create a frame to hold the content and align it to the center vertically
-initial_frame = tk.Frame(initial_window, bg="#efefef", padx=20, pady=20)
-initial_frame.place(
-    x=675, y=75, rely=0.5, anchor="center"  # Center horizontally with adjusted x value
-)
+    # Create and place text options for cipher selection, three to a column
+    cipher_buttons_frame = tk.Frame(initial_frame, bg="#efefef")
+    cipher_buttons_frame.grid(row=0, column=0, padx=10, pady=10)
 
-# Create and place text options for cipher selection in a 3x2 grid
-cipher_buttons_frame = tk.Frame(initial_frame, bg="#efefef")
-cipher_buttons_frame.grid(row=0, column=0, padx=10, pady=10)
-
-cipher_buttons = [
-    "Caesar Cipher",
-    "Vigenere Cipher",
-    "Substitution Cipher",
-    "Affine Cipher",
-    "Transposition Cipher",
-    "Morse Code",
-]
-
-for idx, cipher in enumerate(cipher_buttons):
-    label = tk.Label(
-        cipher_buttons_frame,
-        text=cipher,
-        font=("ISOCPEUR", 30),
-        bg="#efefef",
-        cursor="hand2",
+    cipher_buttons = [
+        "Caesar Cipher",
+        "Vigenere Cipher",
+        "Substitution Cipher",
+        "Affine Cipher",
+        "Transposition Cipher",
+        "Hill Cipher",
+        "Playfair Cipher",
+        "Morse Code",
+        "Cipher Chain",
+    ]
+
+    for idx, cipher in enumerate(cipher_buttons):
+        label = tk.Label(
+            cipher_buttons_frame,
+            text=cipher,
+            font=("ISOCPEUR", 30),
+            bg="#efefef",
+            cursor="hand2",
+        )
+        label.grid(row=idx % 3, column=idx // 3, padx=10, pady=10)
+        label.bind("<Button-1>", lambda e, c=cipher: select_cipher(c))
+
+    # Add Exit button with image
+    exit_photo = load_photo("images/exit.png", (150, 75))
+    exit_button = tk.Button(
+        initial_window, image=exit_photo, command=exit_application, bd=0, bg="#efefef"
     )
-    label.grid(row=idx % 3, column=idx // 3, padx=10, pady=10)
-    label.bind("<Button-1>", lambda e, c=cipher: select_cipher(c))
-
-# Add Exit button with image
-exit_image = Image.open(resource_path("images/exit.png"))
-# Load image for exit button
-exit_image_resized = exit_image.resize((150, 75), Image.LANCZOS)  # Resize if needed
-exit_photo = ImageTk.PhotoImage(exit_image_resized)
-exit_button = tk.Button(
-    initial_window, image=exit_photo, command=exit_application, bd=0, bg="#efefef"
-)
-exit_button.place(x=30, y=950)  # Positioning the button at the bottom-left corner
-exit_button.image = exit_photo  # Keep a reference to avoid garbage collection
+    exit_button.place(x=30, y=950)  # Positioning the button at the bottom-left corner
+    exit_button.image = exit_photo  # Keep a reference to avoid garbage collection
+    return initial_window
+
+
+def main():
+    instrumentation.enable()  # For the status bar of the cipher window
+    build_initial_window()
+    if REPORT_TIMING:
+        initial_window.after_idle(
+            lambda: print(
+                f"First frame after {(time.perf_counter() - STARTED) * 1000:.1f} ms",
+                file=sys.stderr,
+            )
+        )
+
+    # Start the main event loop
+    initial_window.mainloop()
+
 
-# Start the main event loop
-initial_window.mainloop()
+if __name__ == "__main__":
+    main()
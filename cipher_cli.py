@@ -0,0 +1,170 @@
+"""Command-line front end for the ciphers, without the GUI.
+
+Examples:
+
+    python -m cipher_cli encrypt --cipher vigenere --key LEMON < in.txt > out.txt
+    python -m cipher_cli decrypt --cipher caesar --shift 3 out.txt
+    python -m cipher_cli encrypt --cipher morse -o morse.txt in.txt
+
+Input is read from the given files (or stdin) and written to stdout (or
+``--output``) in chunks, so files of any size can be processed.
+
+``--profile`` runs under cProfile and prints a pstats report to stderr (or
+saves the raw stats with ``--profile-output``), and ``--metrics`` prints
+the cipher call counts and throughput recorded by instrumentation.
+"""
+
+import argparse
+import sys
+
+import ciphers
+
+# Cipher name -> (factory taking the parsed arguments, required option)
+CIPHERS = {
+    "caesar": (lambda args: ciphers.CaesarCipher("", args.shift), "shift"),
+    "vigenere": (lambda args: ciphers.VigenereCipher("", args.key), "key"),
+    "substitution": (lambda args: ciphers.SubstitutionCipher("", args.key), "key"),
+    "affine": (lambda args: ciphers.AffineCipher("", args.shift), "shift"),
+    "transposition": (
+        lambda args: ciphers.TranspositionCipher("", args.key, args.keyed),
+        "key",
+    ),
+    "atbash": (lambda args: ciphers.AtbashCipher(""), None),
+    "hill": (lambda args: ciphers.HillCipher("", args.key), "key"),
+    "playfair": (lambda args: ciphers.PlayfairCipher("", args.key), "key"),
+    "morse": (lambda args: ciphers.MorseCodeCipher, None),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cipher_cli", description="Encrypt or decrypt text with a classic cipher."
+    )
+    parser.add_argument("action", choices=["encrypt", "decrypt"])
+    parser.add_argument("files", nargs="*", help="input files (default: stdin)")
+    parser.add_argument("-c", "--cipher", required=True, choices=CIPHERS)
+    parser.add_argument(
+        "-k",
+        "--key",
+        help="key word (vigenere, substitution, transposition, hill, playfair)",
+    )
+    parser.add_argument("-s", "--shift", type=int, help="shift value (caesar, affine)")
+    parser.add_argument(
+        "--keyed",
+        action="store_true",
+        help="transposition: read columns in the alphabetical order of the key",
+    )
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=ciphers.CHUNK_SIZE,
+        help="characters per chunk",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print a cProfile report of the run to stderr",
+    )
+    parser.add_argument(
+        "--profile-output", help="save the raw cProfile stats to this file"
+    )
+    parser.add_argument(
+        "--metrics",
+        choices=["text", "json", "prometheus"],
+        help="print cipher call counts and throughput to stderr",
+    )
+    return parser
+
+
+def read_inputs(files, chunk_size):
+    if not files:
+        yield from ciphers.read_chunks(sys.stdin, chunk_size)
+        return
+    for path in files:
+        with open(path, encoding="utf-8") as file:
+            yield from ciphers.read_chunks(file, chunk_size)
+
+
+def run(args, output):
+    cipher = CIPHERS[args.cipher][0](args)
+    if args.cipher == "morse":
+        method = cipher.iter_encode if args.action == "encrypt" else cipher.iter_decode
+    else:
+        method = getattr(cipher, "iter_" + args.action)
+    for piece in method(read_inputs(args.files, args.chunk_size)):
+        output.write(piece)
+
+
+def run_to_output(args):
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            run(args, output)
+    else:
+        run(args, sys.stdout)
+
+
+def profiled(args):
+    # Imported here, only needed with --profile
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run_to_output, args)
+    finally:
+        if args.profile_output:
+            profiler.dump_stats(args.profile_output)
+        if args.profile:
+            stats = pstats.Stats(profiler, stream=sys.stderr)
+            stats.sort_stats("cumulative").print_stats(25)
+
+
+def print_metrics(style):
+    # Imported here, only needed with --metrics
+    import instrumentation
+
+    metrics = instrumentation.metrics
+    if style == "prometheus":
+        sys.stderr.write(metrics.prometheus())
+    elif style == "json":
+        import json
+
+        json.dump(metrics.snapshot(), sys.stderr, indent=1)
+        sys.stderr.write("\n")
+    else:
+        for row in metrics.snapshot():
+            print(
+                f"{row['cipher']} {row['direction']}: {row['calls']} calls, "
+                f"{row['size']:,} characters in {row['seconds']:.3f} s "
+                f"({row['mb_per_s']:.1f} MB/s)",
+                file=sys.stderr,
+            )
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_intermixed_args(argv)
+    required = CIPHERS[args.cipher][1]
+    if required and getattr(args, required) is None:
+        parser.error(f"--{required} is required for the {args.cipher} cipher")
+    if args.metrics:
+        # Imported here so that runs without --metrics start up quickly
+        import instrumentation
+
+        instrumentation.enable()
+    try:
+        if args.profile or args.profile_output:
+            profiled(args)
+        else:
+            run_to_output(args)
+    except (OSError, ValueError) as error:
+        parser.exit(1, f"cipher_cli: error: {error}\n")
+    finally:
+        if args.metrics:
+            print_metrics(args.metrics)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Load generator for cipher_server.
+
+Start the server, then run e.g.
+
+    python cipher_loadgen.py --requests 100000 --concurrency 10000
+
+Small messages are sent over a pool of connections with up to
+``--concurrency`` requests in flight at once, and the client-side latency
+percentiles and request rate are printed along with the server's own
+stats. ``--spawn`` starts a server in a subprocess for the run.
+"""
+
+import argparse
+import asyncio
+import random
+import string
+import subprocess
+import sys
+import time
+
+from cipher_server import CipherClient
+
+CASES = [
+    {"cipher": "caesar", "shift": 3},
+    {"cipher": "vigenere", "key": "LEMON"},
+    {"cipher": "substitution", "key": "QWERTYUIOPASDFGHJKLZXCVBNM"},
+    {"cipher": "transposition", "key": "KEY"},
+    {"cipher": "atbash"},
+    {"cipher": "morse"},
+]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[
+        min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    ]
+
+
+async def connect(args, retries=50):
+    for _ in range(retries):
+        try:
+            return await CipherClient.connect(args.host, args.port, args.unix)
+        except OSError:
+            await asyncio.sleep(0.1)  # The spawned server may still be starting
+    return await CipherClient.connect(args.host, args.port, args.unix)
+
+
+async def run_load(args):
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + "    .,"
+    messages = [
+        "".join(rng.choice(alphabet) for _ in range(rng.randrange(8, args.length)))
+        for _ in range(1000)
+    ]
+    clients = [await connect(args) for _ in range(args.connections)]
+    numbers = iter(range(args.requests))
+    latencies = []
+    errors = 0
+
+    async def worker():
+        # One of --concurrency loops, each keeping one request in flight
+        nonlocal errors
+        for number in numbers:
+            case = CASES[number % len(CASES)] if args.mixed else CASES[0]
+            client = clients[number % len(clients)]
+            start = time.perf_counter()
+            response = await client.call(
+                action="encrypt", message=messages[number % len(messages)], **case
+            )
+            latencies.append(time.perf_counter() - start)
+            errors += not response["ok"]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    stats = await clients[0].stats()
+    for client in clients:
+        await client.close()
+
+    latencies.sort()
+    print(
+        f"{args.requests} requests, {args.concurrency} in flight, "
+        f"{args.connections} connections"
+    )
+    print(f"{args.requests / elapsed:.0f} requests/s over {elapsed:.2f} s")
+    print(
+        f"latency p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, "
+        f"max {latencies[-1] * 1000:.2f} ms"
+    )
+    print(f"errors: {errors}")
+    print(
+        f"server: {stats['requests']} requests, {stats['batches']} batches "
+        f"(mean {stats['mean_batch']:.1f} messages), "
+        f"p50 {stats['latency']['all']['p50_us']} us, "
+        f"p99 {stats['latency']['all']['p99_us']} us (bucket upper bounds)"
+    )
+    return errors == 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket instead")
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=10_000)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--length", type=int, default=64, help="longest message")
+    parser.add_argument(
+        "--mixed", action="store_true", help="spread requests over several ciphers"
+    )
+    parser.add_argument(
+        "--spawn", action="store_true", help="start a server for the run"
+    )
+    args = parser.parse_args(argv)
+    server = None
+    if args.spawn:
+        command = [sys.executable, "-m", "cipher_server", "--port", str(args.port)]
+        if args.unix:
+            command += ["--unix", args.unix]
+        server = subprocess.Popen(command)
+    try:
+        ok = asyncio.run(run_load(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
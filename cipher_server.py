@@ -0,0 +1,604 @@
+"""Local cipher service, so other programs can use the ciphers without
+starting Python for every message.
+
+    python -m cipher_server --port 8765
+    python -m cipher_server --unix /tmp/cipher_cat.sock
+
+The protocol is length-prefixed frames over TCP (localhost by default) or
+a Unix socket. Each frame is a 4-byte big-endian length and a payload. A
+request is one JSON frame:
+
+    {"id": 1, "cipher": "caesar", "shift": 3, "action": "encrypt",
+     "message": "attack at dawn"}
+
+and gets a JSON frame back with the same id, ``{"id": 1, "ok": true,
+"result": "dwwdfn dw gdzq"}`` or ``{"id": 1, "ok": false, "error":
+"..."}``. Requests can be pipelined; responses may come back in any order.
+The cipher fields are those of cipher_cli (``key``, ``shift``, ``keyed``),
+plus ``"cipher": "chain"`` with a list of ``stages`` for a Pipeline.
+``{"action": "stats"}`` returns request counts, requests per second and
+latency percentiles.
+
+Large bodies can be streamed: send ``"stream": true`` and no message,
+then the text as UTF-8 frames of any size and an empty frame. The reply
+is a ``{"id": ..., "stream": true}`` frame, the result as frames, an empty
+frame and a final ``{"id": ..., "ok": ...}`` frame.
+
+Small requests that arrive together for the same cipher and key are run
+as one batch of at most ``--large`` characters; large ones go to a process
+pool so the event loop keeps serving everyone else.
+"""
+
+import argparse
+import asyncio
+import codecs
+import collections
+import functools
+import json
+import struct
+import sys
+import time
+import types
+
+import cipher_cli
+import ciphers
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME = 64 << 20  # Longer messages have to be streamed
+LARGE_MESSAGE = 1 << 16  # Characters above which a request goes to the pool
+STREAM_BUFFER = 8  # Chunks buffered each way while streaming
+STREAM_ABORTED = object()  # Put in a stream's inbox if the body never ends
+
+
+class ProtocolError(Exception):
+    pass
+
+
+async def read_frame(reader):
+    (size,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if size > MAX_FRAME:
+        raise ProtocolError(f"Frame of {size} bytes is too long.")
+    return await reader.readexactly(size)
+
+
+class FrameWriter:
+    """Writes frames to a stream, sending all the frames written in one pass
+    of the event loop together instead of one system call each."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.frames = []
+
+    def write(self, payload):
+        if not self.frames:
+            asyncio.get_running_loop().call_soon(self.flush)
+        self.frames += (FRAME_HEADER.pack(len(payload)), payload)
+
+    def write_json(self, message):
+        self.write(json.dumps(message).encode())
+
+    def flush(self):
+        if self.frames:
+            frames, self.frames = self.frames, []
+            self.writer.writelines(frames)
+
+    async def drain(self):
+        await self.writer.drain()
+
+    async def send(self, payload):
+        """Write and wait for room; streams call this for every piece."""
+        self.write(payload)
+        self.flush()
+        await self.writer.drain()
+
+
+def cipher_spec(request):
+    """The hashable part of a request that picks the cipher and its key."""
+    key, shift, stages = request.get("key"), request.get("shift"), request.get("stages")
+    if not isinstance(key, (str, type(None))):
+        raise ValueError("Key must be a string.")
+    if not isinstance(shift, (int, type(None))):
+        raise ValueError("Shift must be an integer.")
+    return (
+        request.get("cipher"),
+        key,
+        shift,
+        bool(request.get("keyed")),
+        json.dumps(stages, sort_keys=True) if stages is not None else None,
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def build_cipher(spec):
+    """A with_key cipher (or MorseCodeCipher, or a Pipeline) for a spec."""
+    name, key, shift, keyed, stages = spec
+    if name == "chain":
+        chain = [
+            build_cipher(cipher_spec(stage)) for stage in json.loads(stages or "[]")
+        ]
+        if ciphers.MorseCodeCipher in chain:
+            raise ValueError("Morse code cannot be part of a chain.")
+        return ciphers.Pipeline(chain)
+    if name not in cipher_cli.CIPHERS:
+        raise ValueError(f"Unknown cipher: {name!r}")
+    factory, required = cipher_cli.CIPHERS[name]
+    args = types.SimpleNamespace(key=key, shift=shift, keyed=keyed)
+    if required and getattr(args, required) is None:
+        raise ValueError(f"{required!r} is required for the {name} cipher")
+    cipher = factory(args)
+    if cipher is ciphers.MorseCodeCipher:
+        return cipher
+    return ciphers.KeyedCipher(cipher)
+
+
+def cipher_methods(cipher, action):
+    """(single, batch, streaming) methods of a cipher for an action."""
+    if action not in ("encrypt", "decrypt"):
+        raise ValueError(f"Unknown action: {action!r}")
+    if cipher is ciphers.MorseCodeCipher:
+        if action == "encrypt":
+            return cipher.encode, cipher.encode_many, cipher.iter_encode
+        return cipher.decode, cipher.decode_many, cipher.iter_decode
+    return (
+        getattr(cipher, action),
+        getattr(cipher, action + "_batch"),
+        getattr(cipher, "iter_" + action),
+    )
+
+
+def run_large(spec, action, message):
+    """Process pool entry point (ciphers are rebuilt, not pickled)."""
+    return cipher_methods(build_cipher(spec), action)[0](message)
+
+
+class LatencyHistogram:
+    """Latencies counted in power-of-two microsecond buckets."""
+
+    BUCKETS = 32
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        micros = int(seconds * 1e6)
+        self.counts[min(micros.bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction, in µs."""
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= wanted:
+                return 1 << bucket
+        return 0
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count * 1e6 if self.count else 0,
+            "p50_us": self.percentile(0.5),
+            "p90_us": self.percentile(0.9),
+            "p99_us": self.percentile(0.99),
+            "buckets_us": {1 << b: n for b, n in enumerate(self.counts) if n},
+        }
+
+
+class ServerStats:
+    WINDOW = 10  # Seconds of history behind "recent_rps"
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.latency = collections.defaultdict(LatencyHistogram)
+        self.recent = collections.deque()  # (second, requests in that second)
+        self.batches = 0
+        self.batched = 0
+        self.pooled = 0
+        self.streams = 0
+
+    def record(self, cipher, action, seconds):
+        self.latency["all"].add(seconds)
+        self.latency[f"{cipher}.{action}"].add(seconds)
+        second = int(time.monotonic())
+        if self.recent and self.recent[-1][0] == second:
+            self.recent[-1][1] += 1
+        else:
+            self.recent.append([second, 1])
+            while self.recent[0][0] <= second - self.WINDOW:
+                self.recent.popleft()
+
+    def summary(self):
+        now = time.monotonic()
+        window = [n for second, n in self.recent if second > now - self.WINDOW]
+        requests = self.latency["all"].count
+        return {
+            "uptime": now - self.started,
+            "requests": requests,
+            "rps": requests / (now - self.started),
+            "recent_rps": sum(window) / self.WINDOW,
+            "batches": self.batches,
+            "mean_batch": self.batched / self.batches if self.batches else 0,
+            "pooled": self.pooled,
+            "streams": self.streams,
+            "latency": {
+                name: histogram.summary() for name, histogram in self.latency.items()
+            },
+        }
+
+
+class CipherServer:
+    def __init__(self, workers=None, large=LARGE_MESSAGE, batch_delay=0.0):
+        self.workers = workers
+        self.large = large
+        self.batch_delay = batch_delay
+        self.stats = ServerStats()
+        # (spec, action) -> batch still taking requests, see submit
+        self._pending = {}
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # Imported here, it is only needed once a big request comes in
+            import concurrent.futures
+
+            self._pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        """Serve one connection until the client closes it."""
+        loop = asyncio.get_running_loop()
+        frames = FrameWriter(writer)
+        lock = asyncio.Lock()  # Held while a stream is being written
+        pending = set()
+        try:
+            while True:
+                try:
+                    request = json.loads((await read_frame(reader)).decode())
+                except asyncio.IncompleteReadError:
+                    break
+                if not isinstance(request, dict):
+                    raise ProtocolError("Requests must be JSON objects.")
+                if request.get("stream"):
+                    # The body follows on this connection, so read it now
+                    await self.stream(request, reader, frames, lock)
+                    continue
+                try:
+                    future = self.submit(request)
+                except Exception as error:
+                    future = loop.create_future()
+                    future.set_exception(error)
+                future.add_done_callback(
+                    functools.partial(
+                        self.reply, request, frames, lock, time.perf_counter()
+                    )
+                )
+                pending.add(future)
+                future.add_done_callback(pending.discard)
+                await frames.drain()
+        except (ProtocolError, ValueError, ConnectionError, EOFError):
+            pass  # Garbled or dropped connection, nothing to reply to
+        finally:
+            if pending:
+                await asyncio.wait(pending)
+            async with lock:  # Replies held back by a stream go first
+                frames.flush()
+            writer.close()
+
+    def submit(self, request):
+        """Start a request and return a future for its result."""
+        loop = asyncio.get_running_loop()
+        if request.get("action") == "stats":
+            future = loop.create_future()
+            future.set_result(self.stats.summary())
+            return future
+        message = request.get("message")
+        if not isinstance(message, str):
+            raise ValueError("Message must be a string.")
+        spec, action = cipher_spec(request), request.get("action")
+        cipher_methods(build_cipher(spec), action)  # Fail fast on bad requests
+        if len(message) >= self.large:
+            self.stats.pooled += 1
+            return loop.run_in_executor(self.pool, run_large, spec, action, message)
+        # Join the batch for this cipher and key, starting one if needed. A
+        # batch is closed at ``large`` characters, so running one blocks the
+        # loop no longer than the largest message that is not pooled
+        future = loop.create_future()
+        batch = self._pending.get((spec, action))
+        if batch is None or batch.size + len(message) > self.large:
+            batch = self._pending[(spec, action)] = types.SimpleNamespace(
+                size=0, items=[]
+            )
+            loop.call_later(self.batch_delay, self._run_batch, spec, action, batch)
+        batch.size += len(message)
+        batch.items.append((message, future))
+        return future
+
+    def reply(self, request, frames, lock, started, future):
+        response = {"id": request.get("id"), "ok": future.exception() is None}
+        if response["ok"]:
+            response["result"] = future.result()
+        else:
+            response["error"] = str(future.exception())
+        if lock.locked():
+            # A stream is being written on this connection, wait for it
+            async def write_later():
+                async with lock:
+                    frames.write_json(response)
+
+            asyncio.ensure_future(write_later())
+        else:
+            frames.write_json(response)
+        if request.get("action") != "stats":
+            self.stats.record(
+                request.get("cipher"),
+                request.get("action"),
+                time.perf_counter() - started,
+            )
+
+    def _run_batch(self, spec, action, batch):
+        if self._pending.get((spec, action)) is batch:
+            del self._pending[(spec, action)]
+        self.stats.batches += 1
+        self.stats.batched += len(batch.items)
+        single, many, _ = cipher_methods(build_cipher(spec), action)
+        try:
+            results = list(many([message for message, _ in batch.items]))
+        except Exception:
+            # One bad message must not fail the others
+            results = []
+            for message, _ in batch.items:
+                try:
+                    results.append(single(message))
+                except Exception as error:
+                    results.append(error)
+        for (_, future), result in zip(batch.items, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def stream(self, request, reader, frames, lock):
+        """Stream a request body through a cipher in a worker thread.
+
+        Chunks are passed both ways through small queues, so a slow client
+        or cipher holds the other side back instead of filling memory.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self.stats.streams += 1
+        inbox = asyncio.Queue(STREAM_BUFFER)
+        outbox = asyncio.Queue(STREAM_BUFFER)
+
+        def call(coroutine):
+            return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+        def work():
+            ended = False  # Whether chunks() has taken the end of the body
+
+            def chunks():
+                nonlocal ended
+                decoder = codecs.getincrementaldecoder("utf-8")()
+                while (chunk := call(inbox.get())) is not None:
+                    if chunk is STREAM_ABORTED:
+                        ended = True
+                        raise ConnectionError("The client left mid-stream.")
+                    yield decoder.decode(chunk)
+                ended = True
+                yield decoder.decode(b"", final=True)
+
+            try:
+                method = cipher_methods(
+                    build_cipher(cipher_spec(request)), request.get("action")
+                )[2]
+                for piece in method(chunks()):
+                    if piece:
+                        call(outbox.put(piece.encode()))
+            except Exception as error:
+                # Swallow the rest of the body so the connection stays usable
+                # (the cipher may fail after reading all of it, e.g. on a
+                # short last block)
+                while not ended and call(inbox.get()) is not None:
+                    pass
+                return error
+            finally:
+                call(outbox.put(None))
+
+        async def send():
+            async with lock:
+                frames.write_json({"id": request.get("id"), "stream": True})
+                while (piece := await outbox.get()) is not None:
+                    await frames.send(piece)
+                frames.write(b"")
+                # Shielded: cancelling send must not cancel the worker, which
+                # still needs its queues served until it returns
+                error = await asyncio.shield(worker)
+                trailer = {"id": request.get("id"), "ok": error is None}
+                if error is not None:
+                    trailer["error"] = str(error)
+                frames.write_json(trailer)
+                await frames.drain()
+
+        worker = loop.run_in_executor(None, work)
+        sender = asyncio.create_task(send())
+        try:
+            while chunk := await read_frame(reader):
+                await inbox.put(chunk)
+        except BaseException:
+            # Dropped or garbled mid-stream: stop the worker, throwing away
+            # whatever it still sends, and release the lock held by send
+            sender.cancel()
+            while not inbox.empty():
+                inbox.get_nowait()
+            inbox.put_nowait(STREAM_ABORTED)
+            discard = asyncio.create_task(self._discard(outbox))
+            await asyncio.wait([worker, sender])
+            discard.cancel()
+            raise
+        await inbox.put(None)
+        await sender
+        self.stats.record(
+            request.get("cipher"), request.get("action"), time.perf_counter() - started
+        )
+
+    @staticmethod
+    async def _discard(queue):
+        while True:
+            await queue.get()
+
+
+class CipherClient:
+    """asyncio client for the service, e.g.
+
+    ``client = await CipherClient.connect(port=8765)`` then
+    ``await client.request(cipher="caesar", shift=3, action="encrypt",
+    message="hello")``. Requests may be awaited concurrently; they are
+    pipelined over the one connection.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.frames = FrameWriter(writer)
+        self._next_id = 0
+        self._waiting = {}  # id -> future for the response
+        self._send_lock = asyncio.Lock()
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765, unix=None):
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def close(self):
+        self.frames.flush()
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._receiver.cancel()
+
+    def _new_request(self):
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+        return self._next_id, future
+
+    async def _receive(self):
+        try:
+            while True:
+                response = json.loads(await read_frame(self.reader))
+                future = self._waiting.pop(response.get("id"), None)
+                if response.get("stream"):
+                    # Hand the stream's frames over until its trailer
+                    queue = future.result()
+                    while piece := await read_frame(self.reader):
+                        await queue.put(piece)
+                    await queue.put(json.loads(await read_frame(self.reader)))
+                elif future is not None:
+                    future.set_result(response)
+        except (asyncio.IncompleteReadError, ConnectionError) as error:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(str(error)))
+
+    async def call(self, **request):
+        """Send a request and return the whole response."""
+        request["id"], future = self._new_request()
+        payload = json.dumps(request).encode()
+        if self._send_lock.locked():  # Wait for a stream to finish sending
+            async with self._send_lock:
+                self.frames.write(payload)
+        else:
+            self.frames.write(payload)
+        await self.frames.drain()
+        return await future
+
+    async def request(self, **request):
+        response = await self.call(**request)
+        if not response["ok"]:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    async def stats(self):
+        return await self.request(action="stats")
+
+    async def stream(self, chunks, **request):
+        """Stream an iterable of text chunks through a cipher, yielding the
+        result as it arrives."""
+        request_id, future = self._new_request()
+        queue = asyncio.Queue(STREAM_BUFFER)
+        future.set_result(queue)  # Picked up by _receive
+
+        async def send():
+            async with self._send_lock:
+                self.frames.write_json(dict(request, id=request_id, stream=True))
+                for chunk in chunks:
+                    await self.frames.send(chunk.encode())
+                self.frames.write(b"")
+                await self.frames.drain()
+
+        sender = asyncio.create_task(send())
+        while isinstance(piece := await queue.get(), bytes):
+            yield piece.decode()
+        await sender
+        if not piece["ok"]:
+            raise ValueError(piece["error"])
+
+
+async def serve(args):
+    server = CipherServer(args.workers, args.large, args.batch_delay / 1000)
+    if args.unix:
+        listener = await asyncio.start_unix_server(server.handle, args.unix)
+    else:
+        listener = await asyncio.start_server(server.handle, args.host, args.port)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"cipher_server: listening on {where}", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="cipher_server", description="Serve the ciphers over a local socket."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket instead")
+    parser.add_argument("--workers", type=int, help="processes for large messages")
+    parser.add_argument(
+        "--large",
+        type=int,
+        default=LARGE_MESSAGE,
+        help="characters from which a message goes to the process pool",
+    )
+    parser.add_argument(
+        "--batch-delay",
+        type=float,
+        default=0.0,
+        help="milliseconds to wait for more requests to batch together",
+    )
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
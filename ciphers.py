@@ -1,29 +1,167 @@
+import bisect
+import copy
+import functools
+import itertools
+import math
+import os
+import re
+import sys
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+CHUNK_SIZE = 1 << 16  # Characters per chunk when streaming files
+
+
+class _TranslationTable(dict):
+    """Mapping for ``str.translate`` built from a per-character rule.
+
+    The ASCII range is precomputed; any other character is run through the
+    rule on first sight and remembered, so the output matches the original
+    character-by-character loops exactly.
+    """
+
+    def __init__(self, rule, *params):
+        self.rule = rule
+        self.params = params
+        super().__init__((o, rule(chr(o), *params)) for o in range(128))
+        ascii_map = "".join(self[o] for o in range(128))
+        self.ascii = None
+        if len(ascii_map) == 128 and ascii_map.isascii():
+            # Pure ASCII input can go through the much faster bytes.translate
+            self.ascii = bytes.maketrans(bytes(range(128)), ascii_map.encode("ascii"))
+
+    def __missing__(self, ordinal):
+        value = self[ordinal] = self.rule(chr(ordinal), *self.params)
+        return value
+
+
+@functools.lru_cache(maxsize=256)
+def _translation_table(rule, *params):
+    """Build (or fetch from the cache) the table for a cipher and its key."""
+    return _TranslationTable(rule, *params)
+
+
+def _translate(message, table):
+    if table.ascii is not None and message.isascii():
+        return message.encode("ascii").translate(table.ascii).decode("ascii")
+    return message.translate(table)
+
+
+def _translate_upper(message, table):
+    return _translate(message.upper(), table)
+
+
+def read_chunks(file, chunk_size=CHUNK_SIZE):
+    """Yield successive ``chunk_size`` pieces of an open text file."""
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_translate(chunks, table):
+    for chunk in chunks:
+        yield _translate(chunk, table)
+
+
+def _vigenere_translate(message, tables):
+    """Apply a repeating list of Caesar tables to ``message``.
+
+    Every key position sees the characters ``message[phase::period]``, which
+    is just a Caesar stream, so each stride is translated with its Caesar
+    table and written back in place. Non-letters still use up a key
+    position because the strides are purely positional.
+    """
+    period = len(tables)
+    if message and not period:
+        raise ValueError("Key must not be empty.")
+    # Key positions past the end of the message have nothing to translate
+    tables = tables[: len(message)]
+    if message.isascii():
+        buffer = bytearray(message, "ascii")
+        for phase, table in enumerate(tables):
+            buffer[phase::period] = buffer[phase::period].translate(table.ascii)
+        return buffer.decode("ascii")
+    result = list(message)
+    for phase, table in enumerate(tables):
+        result[phase::period] = message[phase::period].translate(table)
+    return "".join(result)
+
+
+def _caesar_char(char, shift):
+    if char.isalpha():
+        start = ord("A") if char.isupper() else ord("a")
+        return chr(start + (ord(char) - start + shift) % 26)
+    return char
+
+
+def _affine_char(char, a, shift):
+    if char.isalpha():
+        start = ord("A") if char.isupper() else ord("a")
+        return chr(start + (a * (ord(char) - start) + shift) % 26)
+    return char
+
+
+def _affine_inverse_char(char, a_inv, shift):
+    if char.isalpha():
+        start = ord("A") if char.isupper() else ord("a")
+        return chr(start + a_inv * (ord(char) - start - shift) % 26)
+    return char
+
+
+def _substitution_char(char, key):
+    if char.isalpha():
+        return dict(zip(ALPHABET, key)).get(char.upper(), char)
+    return char
+
+
+def _substitution_inverse_char(char, key):
+    if char.isalpha():
+        return {v: k for k, v in zip(ALPHABET, key)}.get(char.upper(), char)
+    return char
+
+
+def _morse_char(char):
+    return MorseCodeCipher.MORSE_CODE_DICT.get(char, "?") + " "
+
+
+def _atbash_char(char):
+    if char in ALPHABET:
+        return ALPHABET[25 - ALPHABET.index(char)]
+    return char
+
+
 class CaesarCipher:
     def __init__(self, message, shift):
         self.message = message
         self.shift = shift
 
+    def _table(self, sign):
+        return _translation_table(_caesar_char, sign * self.shift % 26)
+
+    @classmethod
+    def with_key(cls, shift):
+        """Cipher for any number of messages with this shift, see KeyedCipher."""
+        return KeyedCipher(cls("", shift))
+
+    def _encrypter(self):
+        return functools.partial(_translate, table=self._table(1))
+
+    def _decrypter(self):
+        return functools.partial(_translate, table=self._table(-1))
+
     def encrypt(self):
-        encrypted_message = []
-        for char in self.message:
-            if char.isalpha():
-                shift = self.shift % 26
-                start = ord("A") if char.isupper() else ord("a")
-                encrypted_message.append(chr(start + (ord(char) - start + shift) % 26))
-            else:
-                encrypted_message.append(char)
-        return "".join(encrypted_message)
+        return _translate(self.message, self._table(1))
 
     def decrypt(self):
-        decrypted_message = []
-        for char in self.message:
-            if char.isalpha():
-                shift = self.shift % 26
-                start = ord("A") if char.isupper() else ord("a")
-                decrypted_message.append(chr(start + (ord(char) - start - shift) % 26))
-            else:
-                decrypted_message.append(char)
-        return "".join(decrypted_message)
+        return _translate(self.message, self._table(-1))
+
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of text chunks (``self.message`` is ignored)."""
+        return _iter_translate(chunks, self._table(1))
+
+    def iter_decrypt(self, chunks):
+        return _iter_translate(chunks, self._table(-1))
 
 
 class VigenereCipher:
@@ -31,42 +169,48 @@ class VigenereCipher:
         self.message = message
         self.key = key
 
-    def _extend_key(self):
-        """Extend the key to match the length of the message."""
-        key = self.key
-        if len(self.key) < len(self.message):
-            key = (self.key * (len(self.message) // len(self.key) + 1))[
-                : len(self.message)
-            ]
-        return key
+    def _tables(self, sign):
+        """Caesar table for each key position."""
+        return [
+            _translation_table(_caesar_char, sign * (ord(k.upper()) - ord("A")) % 26)
+            for k in self.key
+        ]
+
+    @classmethod
+    def with_key(cls, key):
+        """Cipher for any number of messages with this key, see KeyedCipher."""
+        return KeyedCipher(cls("", key))
+
+    def _encrypter(self):
+        return functools.partial(_vigenere_translate, tables=self._tables(1))
+
+    def _decrypter(self):
+        return functools.partial(_vigenere_translate, tables=self._tables(-1))
 
     def encrypt(self):
-        key = self._extend_key()
-        encrypted_message = []
-        for m, k in zip(self.message, key):
-            if m.isalpha():
-                offset = ord("A") if m.isupper() else ord("a")
-                encrypted_char = chr(
-                    (ord(m) - offset + ord(k.upper()) - ord("A")) % 26 + offset
-                )
-                encrypted_message.append(encrypted_char)
-            else:
-                encrypted_message.append(m)
-        return "".join(encrypted_message)
+        return _vigenere_translate(self.message, self._tables(1))
 
     def decrypt(self):
-        key = self._extend_key()
-        decrypted_message = []
-        for m, k in zip(self.message, key):
-            if m.isalpha():
-                offset = ord("A") if m.isupper() else ord("a")
-                decrypted_char = chr(
-                    (ord(m) - offset - (ord(k.upper()) - ord("A")) + 26) % 26 + offset
-                )
-                decrypted_message.append(decrypted_char)
-            else:
-                decrypted_message.append(m)
-        return "".join(decrypted_message)
+        return _vigenere_translate(self.message, self._tables(-1))
+
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of text chunks (``self.message`` is ignored).
+
+        The key phase carries over from one chunk to the next, so the output
+        is the same however the input is split.
+        """
+        return self._iter(chunks, self._tables(1))
+
+    def iter_decrypt(self, chunks):
+        return self._iter(chunks, self._tables(-1))
+
+    @staticmethod
+    def _iter(chunks, tables):
+        phase = 0
+        for chunk in chunks:
+            yield _vigenere_translate(chunk, tables[phase:] + tables[:phase])
+            if tables:
+                phase = (phase + len(chunk)) % len(tables)
 
 
 class SubstitutionCipher:
@@ -76,24 +220,35 @@ class SubstitutionCipher:
         self.alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
         self.substitution_dict = dict(zip(self.alphabet, self.key))
 
+    def _encrypt_table(self):
+        return _translation_table(_substitution_char, self.key)
+
+    def _decrypt_table(self):
+        return _translation_table(_substitution_inverse_char, self.key)
+
+    @classmethod
+    def with_key(cls, key):
+        """Cipher for any number of messages with this key, see KeyedCipher."""
+        return KeyedCipher(cls("", key))
+
+    def _encrypter(self):
+        return functools.partial(_translate, table=self._encrypt_table())
+
+    def _decrypter(self):
+        return functools.partial(_translate, table=self._decrypt_table())
+
     def encrypt(self):
-        encrypted_message = []
-        for char in self.message:
-            if char.isalpha():
-                encrypted_message.append(self.substitution_dict.get(char.upper(), char))
-            else:
-                encrypted_message.append(char)
-        return "".join(encrypted_message)
+        return _translate(self.message, self._encrypt_table())
 
     def decrypt(self):
-        reversed_dict = {v: k for k, v in self.substitution_dict.items()}
-        decrypted_message = []
-        for char in self.message:
-            if char.isalpha():
-                decrypted_message.append(reversed_dict.get(char.upper(), char))
-            else:
-                decrypted_message.append(char)
-        return "".join(decrypted_message)
+        return _translate(self.message, self._decrypt_table())
+
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of text chunks (``self.message`` is ignored)."""
+        return _iter_translate(chunks, self._encrypt_table())
+
+    def iter_decrypt(self, chunks):
+        return _iter_translate(chunks, self._decrypt_table())
 
 
 class AffineCipher:
@@ -103,68 +258,131 @@ class AffineCipher:
         self.a = 5  # Multiplier (must be coprime with 26)
         self.b = shift  # Shift value
 
+    def _encrypt_table(self):
+        return _translation_table(_affine_char, self.a % 26, self.shift % 26)
+
+    def _decrypt_table(self):
+        a_inv = pow(self.a, -1, 26)  # Modular inverse of a
+        return _translation_table(_affine_inverse_char, a_inv, self.shift % 26)
+
+    @classmethod
+    def with_key(cls, shift, a=5):
+        """Cipher for any number of messages with this key, see KeyedCipher."""
+        cipher = cls("", shift)
+        cipher.a = a
+        return KeyedCipher(cipher)
+
+    def _encrypter(self):
+        return functools.partial(_translate, table=self._encrypt_table())
+
+    def _decrypter(self):
+        return functools.partial(_translate, table=self._decrypt_table())
+
     def encrypt(self):
-        encrypted_message = []
-        for char in self.message:
-            if char.isalpha():
-                shift = self.shift % 26
-                a = self.a % 26
-                start = ord("A") if char.isupper() else ord("a")
-                encrypted_message.append(
-                    chr(start + (a * (ord(char) - start) + shift) % 26)
-                )
-            else:
-                encrypted_message.append(char)
-        return "".join(encrypted_message)
+        return _translate(self.message, self._encrypt_table())
 
     def decrypt(self):
-        decrypted_message = []
-        a_inv = pow(self.a, -1, 26)  # Modular inverse of a
-        shift = self.shift % 26
-        for char in self.message:
-            if char.isalpha():
-                start = ord("A") if char.isupper() else ord("a")
-                decrypted_message.append(
-                    chr(start + a_inv * ((ord(char) - start - shift + 26) % 26))
-                )
-            else:
-                decrypted_message.append(char)
-        return "".join(decrypted_message)
+        return _translate(self.message, self._decrypt_table())
+
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of text chunks (``self.message`` is ignored)."""
+        return _iter_translate(chunks, self._encrypt_table())
+
+    def iter_decrypt(self, chunks):
+        return _iter_translate(chunks, self._decrypt_table())
 
 
 class TranspositionCipher:
-    def __init__(self, message, key):
+    def __init__(self, message, key, keyed=False):
         self.message = message
         self.key = len(key)  # Use the length of the key word as the number of columns
+        # Columns are read left to right, or in the alphabetical order of the
+        # key letters for a keyed columnar transposition
+        self.order = list(range(self.key))
+        if keyed:
+            self.order.sort(key=key.upper().__getitem__)
+
+    @classmethod
+    def with_key(cls, key, keyed=False):
+        """Cipher for any number of messages with this key, see KeyedCipher."""
+        return KeyedCipher(cls("", key, keyed))
+
+    def _encrypter(self):
+        return self._encrypt
+
+    def _decrypter(self):
+        return self._decrypt
 
     def encrypt(self):
-        # Pad the message to make sure it fits evenly into columns
-        padded_length = (len(self.message) + self.key - 1) // self.key * self.key
-        padded_message = self.message.ljust(padded_length)
-        encrypted_message = [""] * self.key
-        for column in range(self.key):
-            index = column
-            while index < len(padded_message):
-                encrypted_message[column] += padded_message[index]
-                index += self.key
-        return "".join(encrypted_message)
+        return self._encrypt(self.message)
 
     def decrypt(self):
-        num_of_columns = len(self.message) // self.key
-        num_of_rows = self.key
-        num_of_shaded_boxes = (num_of_columns * num_of_rows) - len(self.message)
-        decrypted_message = [""] * num_of_columns
-        column, row = 0, 0
-        for symbol in self.message:
-            decrypted_message[column] += symbol
-            column += 1
-            if (column == num_of_columns) or (
-                column == num_of_columns - 1
-                and row >= num_of_rows - num_of_shaded_boxes
-            ):
-                column = 0
-                row += 1
-        return "".join(decrypted_message)
+        return self._decrypt(self.message)
+
+    def _encrypt(self, message):
+        # Pad the message to make sure it fits evenly into columns
+        padded_length = (len(message) + self.key - 1) // self.key * self.key
+        padded_message = message.ljust(padded_length)
+        return "".join(padded_message[column :: self.key] for column in self.order)
+
+    def _decrypt(self, message):
+        num_of_rows = len(message) // self.key
+        if message and not num_of_rows:
+            raise ValueError("Message is shorter than the key.")
+        if len(message) % self.key == 0:
+            # Each block of num_of_rows characters is one column of the grid,
+            # so write it straight back into every self.key-th position
+            blocks = (
+                message[index * num_of_rows : (index + 1) * num_of_rows]
+                for index in range(self.key)
+            )
+            if message.isascii():
+                buffer = bytearray(len(message))
+                for column, block in zip(self.order, blocks):
+                    buffer[column :: self.key] = block.encode("ascii")
+                return buffer.decode("ascii")
+            characters = [""] * len(message)
+            for column, block in zip(self.order, blocks):
+                characters[column :: self.key] = block
+            return "".join(characters)
+        if self.order != sorted(self.order):
+            # Put the columns back in their natural order first
+            columns = [""] * self.key
+            for index, column in enumerate(self.order):
+                columns[column] = message[
+                    index * num_of_rows : (index + 1) * num_of_rows
+                ]
+            message = "".join(columns) + message[self.key * num_of_rows :]
+        # Read the grid back row by row
+        return "".join(message[row::num_of_rows] for row in range(num_of_rows))
+
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of text chunks (``self.message`` is ignored).
+
+        The first output column needs the last row of the input, so nothing
+        can be emitted until the input ends. Each chunk is dealt straight
+        into its columns, keeping the column layout across chunk boundaries,
+        so only one copy of the text is held.
+        """
+        columns = [[] for _ in range(self.key)]
+        length = 0
+        for chunk in chunks:
+            for column in range(self.key):
+                columns[column].append(chunk[(column - length) % self.key :: self.key])
+            length += len(chunk)
+        padding = -length % self.key
+        for offset in range(padding):
+            columns[(length + offset) % self.key].append(" ")
+        for column in self.order:
+            yield "".join(columns[column])
+
+    def iter_decrypt(self, chunks):
+        """Decrypt an iterable of text chunks (``self.message`` is ignored).
+
+        The row length depends on the total length, so the ciphertext is
+        collected before anything is emitted.
+        """
+        yield self._decrypt("".join(chunks))
 
 
 class AtbashCipher:
@@ -173,18 +391,468 @@ class AtbashCipher:
         self.alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
         self.atbash_dict = dict(zip(self.alphabet, reversed(self.alphabet)))
 
+    @classmethod
+    def with_key(cls):
+        """Cipher for any number of messages, see KeyedCipher."""
+        return KeyedCipher(cls(""))
+
+    def _encrypter(self):
+        return functools.partial(
+            _translate_upper, table=_translation_table(_atbash_char)
+        )
+
+    _decrypter = _encrypter  # Atbash cipher is symmetric
+
     def encrypt(self):
-        encrypted_message = []
-        for char in self.message.upper():
-            if char in self.atbash_dict:
-                encrypted_message.append(self.atbash_dict[char])
-            else:
-                encrypted_message.append(char)
-        return "".join(encrypted_message)
+        table = _translation_table(_atbash_char)
+        return _translate_upper(self.message, table)
 
     def decrypt(self):
         return self.encrypt()  # Atbash cipher is symmetric
 
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of text chunks (``self.message`` is ignored)."""
+        return _iter_translate(
+            (chunk.upper() for chunk in chunks), _translation_table(_atbash_char)
+        )
+
+    def iter_decrypt(self, chunks):
+        return self.iter_encrypt(chunks)
+
+
+# Tables for the Hill and Playfair ciphers, which work on the letters as bytes
+_ASCII_UPPER = bytes.maketrans(
+    ALPHABET.lower().encode("ascii"), ALPHABET.encode("ascii")
+)
+_LETTER_VALUES = bytes.maketrans(ALPHABET.encode("ascii"), bytes(range(26)))
+_VALUE_LETTERS = bytes(ord("A") + value % 26 for value in range(256))
+_MOD_26 = bytes(value % 26 for value in range(256))
+_PRODUCTS = [bytes(k * value % 26 for value in range(256)) for k in range(26)]
+_LETTER_BYTES = (ALPHABET + ALPHABET.lower()).encode("ascii")
+_NON_LETTER_BYTES = bytes(sorted(set(range(256)) - set(_LETTER_BYTES)))
+_LETTER_MASK = bytes.maketrans(_NON_LETTER_BYTES, bytes(len(_NON_LETTER_BYTES)))
+_LETTER_SEPARATORS = re.compile("([^A-Za-z]+)")
+HILL_PADDING = "X"
+
+
+def _inverse_mod_26(matrix):
+    # Imported here, it pulls in decimal and would slow down every start-up
+    import fractions
+
+    size = len(matrix)
+    # Gauss-Jordan over the rationals gives the determinant and, scaled by
+    # it, the adjugate, which has integer entries
+    rows = [
+        [fractions.Fraction(value) for value in row]
+        + [fractions.Fraction(int(i == j)) for j in range(size)]
+        for i, row in enumerate(matrix)
+    ]
+    determinant = fractions.Fraction(1)
+    for column in range(size):
+        pivot = next((r for r in range(column, size) if rows[r][column]), None)
+        if pivot is None:
+            raise ValueError("Key matrix is not invertible mod 26.")
+        if pivot != column:
+            rows[column], rows[pivot] = rows[pivot], rows[column]
+            determinant = -determinant
+        value = rows[column][column]
+        determinant *= value
+        rows[column] = [entry / value for entry in rows[column]]
+        for r in range(size):
+            factor = rows[r][column]
+            if r != column and factor:
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[column])]
+    determinant = int(determinant)
+    if math.gcd(determinant, 26) != 1:
+        raise ValueError("Key matrix is not invertible mod 26.")
+    scale = pow(determinant, -1, 26)
+    return tuple(
+        tuple(int(entry * determinant) * scale % 26 for entry in row[size:])
+        for row in rows
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _hill_matrix(key):
+    """The key matrix and its inverse mod 26, for a key of n*n letters
+    (read row by row) or a tuple of n rows of n numbers."""
+    if isinstance(key, str):
+        size = math.isqrt(len(key))
+        if not key or size * size != len(key):
+            raise ValueError("Key must have a square number of letters, e.g. 4 or 9.")
+        if not key.isascii() or not key.isalpha():
+            raise ValueError("Key must only contain the letters A-Z.")
+        values = [ord(letter) - ord("A") for letter in key.upper()]
+        matrix = tuple(
+            tuple(values[start : start + size]) for start in range(0, len(key), size)
+        )
+    else:
+        matrix = tuple(tuple(int(value) % 26 for value in row) for row in key)
+        if not matrix or any(len(row) != len(matrix) for row in matrix):
+            raise ValueError("Key matrix must be square.")
+    return matrix, _inverse_mod_26(matrix)
+
+
+def _hill_blocks(letters, matrix):
+    """Multiply each block of ``len(matrix)`` letters (bytes A-Z, a whole
+    number of blocks) by the matrix, mod 26.
+
+    All blocks are done at once, a row of the matrix at a time: the j-th
+    letters of every block, as numbers 0-25, are the bytes of one big
+    integer, so scaling and adding them takes a few integer operations
+    however many blocks there are. A byte never holds more than ten values
+    up to 25, so it does not carry into the next one.
+    """
+    size = len(matrix)
+    count = len(letters) // size
+    if not count:
+        return b""
+    values = letters.translate(_LETTER_VALUES)
+    columns = [values[j::size] for j in range(size)]
+    result = bytearray(len(letters))
+    for i, row in enumerate(matrix):
+        total = terms = 0
+        for column, k in zip(columns, row):
+            if not k:
+                continue
+            if terms == 10:
+                total = int.from_bytes(
+                    total.to_bytes(count, "big").translate(_MOD_26), "big"
+                )
+                terms = 1
+            total += int.from_bytes(column.translate(_PRODUCTS[k]), "big")
+            terms += 1
+        result[i::size] = total.to_bytes(count, "big").translate(_VALUE_LETTERS)
+    return bytes(result)
+
+
+def _split_letters(text):
+    """The letters of ``text`` as capitals in bytes, the lengths of the runs
+    of letters and the separators between the runs (both None if ``text``
+    is all letters)."""
+    if text.isascii():
+        data = text.encode("ascii")
+        letters = data.translate(_ASCII_UPPER, _NON_LETTER_BYTES)
+        if len(letters) == len(data):
+            return letters, None, None
+        # Every separator is one character, which the mask turns into a zero
+        runs = data.translate(_LETTER_MASK).split(b"\0")
+        separators = list(data.translate(None, _LETTER_BYTES).decode("ascii"))
+    else:
+        runs = _LETTER_SEPARATORS.split(text)
+        separators = runs[1::2]
+        runs = runs[::2]
+        letters = "".join(runs).encode("ascii").translate(_ASCII_UPPER)
+    return letters, list(map(len, runs)), separators
+
+
+def _cipher_letters(text, final, process):
+    """Encipher the letters of ``text``, leaving everything else in place.
+
+    ``process(letters, final)`` returns the new letters, how many of the
+    given ones it used (the rest wait for more text unless ``final``) and
+    the index of the letter after which each extra letter it added goes.
+    Returns the result and the rest of ``text``, from the first letter not
+    used.
+    """
+    letters, lengths, separators = _split_letters(text)
+    result, used, extras = process(letters, final)
+    result = result.decode("ascii")
+    rest = ""
+    if used < len(letters):
+        rest = text[used:]
+        if lengths is not None:
+            # Cut the runs at the first letter not used
+            ends = list(itertools.accumulate(lengths))
+            index = bisect.bisect_right(ends, used)
+            rest = text[used + sum(map(len, separators[:index])) :]
+            lengths = lengths[:index] + [used - (ends[index - 1] if index else 0)]
+            separators = separators[:index]
+    if lengths is None:
+        return result, rest
+    if extras:
+        ends = list(itertools.accumulate(lengths))
+        for index in extras:
+            lengths[bisect.bisect_right(ends, index)] += 1
+    ends = list(itertools.accumulate(lengths))
+    parts = [None] * (2 * len(ends) - 1)
+    parts[::2] = map(result.__getitem__, map(slice, [0] + ends, ends))
+    parts[1::2] = separators
+    return "".join(parts), rest
+
+
+def _iter_cipher_letters(chunks, process):
+    rest = ""
+    for chunk in chunks:
+        output, rest = _cipher_letters(rest + chunk, False, process)
+        if output:
+            yield output
+    output = _cipher_letters(rest, True, process)[0]
+    if output:
+        yield output
+
+
+def _cipher_letters_text(message, process):
+    if len(message) <= CHUNK_SIZE:
+        return _cipher_letters(message, True, process)[0]
+    # Split up so the list of letter runs stays small
+    chunks = (
+        message[start : start + CHUNK_SIZE]
+        for start in range(0, len(message), CHUNK_SIZE)
+    )
+    return "".join(_iter_cipher_letters(chunks, process))
+
+
+def _hill_process(letters, final, matrix, pad):
+    """Whole blocks of letters for _cipher_letters; the last one is padded
+    with HILL_PADDING if ``pad`` (encrypting), or is an error."""
+    size = len(matrix)
+    used = len(letters) - len(letters) % size
+    extras = ()
+    if used < len(letters) and final:
+        if not pad:
+            raise ValueError(f"Ciphertext must have a multiple of {size} letters.")
+        padding = size - len(letters) + used
+        extras = [len(letters) - 1] * padding  # Straight after the last letter
+        letters += HILL_PADDING.encode("ascii") * padding
+        used = len(letters)
+    return _hill_blocks(letters[:used], matrix), used, extras
+
+
+class HillCipher:
+    """Hill cipher with an n*n key matrix over the letters mod 26.
+
+    The key is n*n letters read row by row (e.g. ``"GYBNQKURP"``) or a
+    list of n rows of n numbers, and must be invertible mod 26. Every block
+    of n letters is multiplied by the matrix; other characters stay where
+    they are and the letters come out in capitals. The last block is padded
+    with X after the last letter when encrypting.
+    """
+
+    def __init__(self, message, key):
+        self.message = message
+        self.key = key.upper() if isinstance(key, str) else tuple(map(tuple, key))
+        # Both matrices are cached per key
+        self.matrix, self.inverse = _hill_matrix(self.key)
+
+    @classmethod
+    def with_key(cls, key):
+        """Cipher for any number of messages with this key, see KeyedCipher."""
+        return KeyedCipher(cls("", key))
+
+    def _process(self, sign):
+        matrix = self.matrix if sign > 0 else self.inverse
+        return functools.partial(_hill_process, matrix=matrix, pad=sign > 0)
+
+    def _encrypter(self):
+        return functools.partial(_cipher_letters_text, process=self._process(1))
+
+    def _decrypter(self):
+        return functools.partial(_cipher_letters_text, process=self._process(-1))
+
+    def encrypt(self):
+        return _cipher_letters_text(self.message, self._process(1))
+
+    def decrypt(self):
+        return _cipher_letters_text(self.message, self._process(-1))
+
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of text chunks (``self.message`` is ignored).
+
+        A block can be split between chunks, so the text from its first
+        letter on is held back until the next chunk finishes it.
+        """
+        return _iter_cipher_letters(chunks, self._process(1))
+
+    def iter_decrypt(self, chunks):
+        return _iter_cipher_letters(chunks, self._process(-1))
+
+
+PLAYFAIR_FILLER = "X"
+PLAYFAIR_ALTERNATE_FILLER = "Q"  # Splits a doubled X, or pads a final X
+_J_TO_I = bytes.maketrans(b"J", b"I")
+_FILLERS = bytes(  # The filler to put after each letter
+    ord(PLAYFAIR_ALTERNATE_FILLER if value == ord(PLAYFAIR_FILLER) else PLAYFAIR_FILLER)
+    for value in range(256)
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _playfair_tables(key):
+    """Encryption and decryption tables for a key.
+
+    The key square is the key's letters (J as I, repeats dropped) followed
+    by the rest of the alphabet. Each table maps every pair of different
+    letters in it, as the 16-bit number its two bytes read as, to the
+    enciphered pair, so a message is one lookup per pair.
+    """
+    key = key.replace(" ", "")
+    if not key.isascii() or (key and not key.isalpha()):
+        raise ValueError("Key must only contain the letters A-Z.")
+    square = "".join(dict.fromkeys(key.upper().replace("J", "I") + ALPHABET))
+    square = square.replace("J", "")
+    places = {letter: divmod(index, 5) for index, letter in enumerate(square)}
+    tables = ({}, {})
+    for a, b in itertools.permutations(square, 2):
+        (row_a, column_a), (row_b, column_b) = places[a], places[b]
+        pair = int.from_bytes((a + b).encode("ascii"), sys.byteorder)
+        for table, step in zip(tables, (1, -1)):
+            if row_a == row_b:
+                ends = (row_a, (column_a + step) % 5), (row_b, (column_b + step) % 5)
+            elif column_a == column_b:
+                ends = ((row_a + step) % 5, column_a), ((row_b + step) % 5, column_b)
+            else:
+                ends = (row_a, column_b), (row_b, column_a)
+            table[pair] = "".join(square[row * 5 + column] for row, column in ends)
+    return tables
+
+
+def _playfair_digraphs(letters, final):
+    """Split letters into pairs, with a filler between two of the same
+    letter in a pair and after an odd last letter if ``final``.
+
+    Returns the pairs as bytes, how many letters they use and the index of
+    the letter before each filler.
+    """
+    extras = []
+    if len(letters) > 1:
+        # Zero bytes mark letters that are the same as the next one
+        same = (
+            int.from_bytes(letters[:-1], "big") ^ int.from_bytes(letters[1:], "big")
+        ).to_bytes(len(letters) - 1, "big")
+        start = 0
+        runs = same.split(b"\0")[:-1]
+        for index in itertools.accumulate(len(run) + 1 for run in runs):
+            if (index - 1 - start) % 2 == 0:
+                extras.append(index - 1)  # Both letters would be one pair
+                start = index
+    used = len(letters)
+    if (used + len(extras)) % 2:
+        if final:
+            extras.append(used - 1)
+        else:
+            used -= 1
+            letters = letters[:used]
+    if not extras:
+        return letters, used, extras
+    text = letters.decode("ascii")
+    starts = [index + 1 for index in extras]
+    parts = [None] * (2 * len(extras) + 1)
+    parts[::2] = map(text.__getitem__, map(slice, [0] + starts, starts + [None]))
+    parts[1::2] = bytes(map(letters.__getitem__, extras)).translate(_FILLERS).decode()
+    return "".join(parts).encode("ascii"), used, extras
+
+
+def _playfair_process(letters, final, table, encrypting):
+    """Pairs of letters for _cipher_letters, split up with fillers when
+    encrypting."""
+    letters = letters.translate(_J_TO_I)
+    if encrypting:
+        digraphs, used, extras = _playfair_digraphs(letters, final)
+    else:
+        used, extras = len(letters) - len(letters) % 2, ()
+        if final and used < len(letters):
+            raise ValueError("Ciphertext must have an even number of letters.")
+        digraphs = letters[:used]
+    try:
+        result = "".join(map(table.__getitem__, memoryview(digraphs).cast("H")))
+    except KeyError:
+        raise ValueError("Ciphertext has a pair of the same letter.") from None
+    return result.encode("ascii"), used, extras
+
+
+class PlayfairCipher:
+    """Playfair cipher, which enciphers pairs of letters with a 5x5 key
+    square (J is taken as I).
+
+    Two of the same letter in a pair are split with an X (a Q after X),
+    and an odd last letter gets one too. Like HillCipher, other characters
+    stay where they are, added letters go straight after the letter before
+    them and the letters come out in capitals. Decryption leaves the
+    fillers in.
+    """
+
+    def __init__(self, message, key):
+        self.message = message
+        self.key = key.upper()
+        # Cached per key
+        self.tables = _playfair_tables(self.key)
+
+    @classmethod
+    def with_key(cls, key):
+        """Cipher for any number of messages with this key, see KeyedCipher."""
+        return KeyedCipher(cls("", key))
+
+    def _process(self, sign):
+        table = self.tables[0 if sign > 0 else 1]
+        return functools.partial(_playfair_process, table=table, encrypting=sign > 0)
+
+    def _encrypter(self):
+        return functools.partial(_cipher_letters_text, process=self._process(1))
+
+    def _decrypter(self):
+        return functools.partial(_cipher_letters_text, process=self._process(-1))
+
+    def encrypt(self):
+        return _cipher_letters_text(self.message, self._process(1))
+
+    def decrypt(self):
+        return _cipher_letters_text(self.message, self._process(-1))
+
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of text chunks (``self.message`` is ignored).
+
+        A pair can be split between chunks, so its first letter and the
+        text after it are held back until the next chunk.
+        """
+        return _iter_cipher_letters(chunks, self._process(1))
+
+    def iter_decrypt(self, chunks):
+        return _iter_cipher_letters(chunks, self._process(-1))
+
+
+class KeyedCipher:
+    """A cipher with its key already scheduled, for many messages.
+
+    Made by the ``with_key`` class methods, e.g.
+    ``CaesarCipher.with_key(3).encrypt("hello")``. All per-key work
+    (translation tables, shifts, column order) is done once here, so each
+    message costs only the cipher itself. The batch methods return lazy
+    iterators over the results.
+    """
+
+    __slots__ = ("cipher", "_encrypt", "_decrypt")
+
+    def __init__(self, cipher):
+        self.cipher = cipher
+        self._encrypt = cipher._encrypter()
+        self._decrypt = cipher._decrypter()
+
+    def encrypt(self, message):
+        return self._encrypt(message)
+
+    def decrypt(self, message):
+        return self._decrypt(message)
+
+    def encrypt_batch(self, messages):
+        return map(self._encrypt, messages)
+
+    def decrypt_batch(self, messages):
+        return map(self._decrypt, messages)
+
+    def iter_encrypt(self, chunks):
+        return self.cipher.iter_encrypt(chunks)
+
+    def iter_decrypt(self, chunks):
+        return self.cipher.iter_decrypt(chunks)
+
+    def encrypt_buffer(self, data, out=None, position=0):
+        """Encrypt bytes in place, or into ``out``; see translate_buffer."""
+        return translate_buffer(self, 1, data, out, position)
+
+    def decrypt_buffer(self, data, out=None, position=0):
+        return translate_buffer(self, -1, data, out, position)
+
 
 class MorseCodeCipher:
     MORSE_CODE_DICT = {
@@ -226,26 +894,610 @@ class MorseCodeCipher:
         "9": "----.",
         " ": " ",
     }
+    MORSE_DECODE_DICT = {v: k for k, v in MORSE_CODE_DICT.items()}
 
     @staticmethod
     def encode(message):
-        encoded_message = []
-        for char in message.upper():
-            if char in MorseCodeCipher.MORSE_CODE_DICT:
-                encoded_message.append(MorseCodeCipher.MORSE_CODE_DICT[char])
-            else:
-                encoded_message.append(
-                    "?"
-                )  # Handle characters not in Morse code dictionary
-        return " ".join(encoded_message)
+        # Every character becomes its code plus a separating space, except
+        # the last one which gets no trailing space
+        return message.upper().translate(_translation_table(_morse_char))[:-1]
 
     @staticmethod
     def decode(morse_code):
-        reversed_dict = {v: k for k, v in MorseCodeCipher.MORSE_CODE_DICT.items()}
-        decoded_message = []
-        for code in morse_code.split(" "):
-            if code in reversed_dict:
-                decoded_message.append(reversed_dict[code])
-            else:
-                decoded_message.append("?")  # Handle unknown Morse code
-        return "".join(decoded_message)
+        return MorseCodeCipher._decode_codes(morse_code.split(" "))
+
+    @staticmethod
+    def _decode_codes(codes):
+        # Unknown Morse code becomes "?"
+        lookup = MorseCodeCipher.MORSE_DECODE_DICT.get
+        return "".join(map(lookup, codes, itertools.repeat("?")))
+
+    @staticmethod
+    def encode_many(messages):
+        """Encode each message of an iterable, sharing one translation table."""
+        table = _translation_table(_morse_char)
+        return [message.upper().translate(table)[:-1] for message in messages]
+
+    @staticmethod
+    def decode_many(morse_codes):
+        return [MorseCodeCipher.decode(morse_code) for morse_code in morse_codes]
+
+    @staticmethod
+    def iter_encode(chunks):
+        """Encode an iterable of text chunks, yielding Morse code as it goes."""
+        separator = ""
+        for chunk in chunks:
+            if chunk:
+                yield separator + MorseCodeCipher.encode(chunk)
+                separator = " "
+
+    @staticmethod
+    def iter_decode(chunks):
+        """Decode an iterable of Morse code chunks (``str`` or ``bytes``)."""
+        decoder = MorseDecoder()
+        for chunk in chunks:
+            yield decoder.feed(chunk)
+        yield decoder.flush()
+
+
+class MorseDecoder:
+    """Incremental Morse decoder for input that arrives in pieces.
+
+    ``feed`` takes chunks of any size, as ``str`` or ASCII ``bytes``, and
+    returns the text for every code completed so far. A code cut in half by
+    a chunk boundary is held back until the next chunk completes it;
+    ``flush`` decodes whatever is left at the end of the input.
+    """
+
+    def __init__(self):
+        self.pending = ""
+
+    def feed(self, chunk):
+        if not isinstance(chunk, str):
+            # Only ASCII can be valid Morse, and no other byte is a space,
+            # so latin-1 keeps every code boundary where it was
+            chunk = bytes(chunk).decode("latin-1")
+        codes = (self.pending + chunk).split(" ")
+        self.pending = codes.pop()
+        return MorseCodeCipher._decode_codes(codes)
+
+    def flush(self):
+        pending, self.pending = self.pending, ""
+        return MorseCodeCipher._decode_codes([pending])
+
+
+def _common_prefix(a, b, block=4096):
+    """Length of the common prefix of two strings, compared a block at a time."""
+    limit = min(len(a), len(b))
+    length = 0
+    while length < limit:
+        size = min(block, limit - length)
+        if a[length : length + size] != b[length : length + size]:
+            break
+        length += size
+    while length < limit and a[length] == b[length]:
+        length += 1
+    return length
+
+
+def _common_suffix(a, b, limit, block=4096):
+    """Length of the common suffix of two strings, at most ``limit``."""
+    length = 0
+    while length < limit:
+        size = min(block, limit - length)
+        if (
+            a[len(a) - length - size : len(a) - length]
+            != b[len(b) - length - size : len(b) - length]
+        ):
+            break
+        length += size
+    while length < limit and a[len(a) - length - 1] == b[len(b) - length - 1]:
+        length += 1
+    return length
+
+
+class LiveEncrypter:
+    """Keeps the encryption of a message up to date while it is edited.
+
+    ``update`` takes the whole edited message and returns the edits that
+    turn the previous ciphertext into the new one, as ``(start, end, text)``
+    replacements ordered from the back, so they can be applied one after
+    the other (e.g. to a Tk ``Text``) without re-inserting the whole result.
+
+    Character-by-character ciphers (Caesar, Affine, Substitution, Atbash and
+    Morse) only translate the edited span. Vigenère re-encrypts from the
+    edit point in the right key phase, and only up to the end of the edit
+    if the phase of the rest is unchanged. Transposition redoes the edited
+    rows of each column. Any other cipher is re-encrypted in full.
+
+    ``cipher`` is a ``with_key`` cipher, or ``MorseCodeCipher`` for Morse
+    code. A caller that knows where the edits were can pass ``start`` and
+    ``tail``, meaning only ``message[start:len(message) - tail]`` changed,
+    which saves comparing the old and new message.
+    """
+
+    def __init__(self, cipher):
+        self.message = ""
+        self.size = 0  # Length of the current ciphertext
+        self.trim = cipher is MorseCodeCipher
+        template = getattr(cipher, "cipher", None)
+        if self.trim:
+            # Encoded with a space after every character; the last one is
+            # dropped when the edits are returned
+            self.encrypt = functools.partial(
+                _translate_upper, table=_translation_table(_morse_char)
+            )
+            self._edits = self._translate_edits
+        elif isinstance(template, VigenereCipher):
+            self.tables = template._tables(1)
+            self._edits = self._vigenere_edits
+        elif isinstance(template, TranspositionCipher):
+            self.columns = template.key
+            self.order = template.order
+            self._edits = self._transposition_edits
+        else:
+            self.encrypt = cipher.encrypt
+            if isinstance(template, MONOALPHABETIC_CIPHERS):
+                self._edits = self._translate_edits
+
+    def update(self, message, start=None, tail=None):
+        old = self.message
+        limit = min(len(old), len(message))
+        if start is None:
+            start = _common_prefix(old, message)
+            tail = _common_suffix(old, message, limit - start)
+        else:
+            start = min(start, limit)
+            tail = min(tail, limit - start)
+        edits = self._edits(old, message, start, tail)
+        size = self.size + sum(len(text) - (end - begin) for begin, end, text in edits)
+        if self.trim and edits[0][1] == self.size:
+            # The edit reaches the end, where the last space is not shown
+            begin, end, text = edits[0]
+            shown, new_shown = max(self.size - 1, 0), max(size - 1, 0)
+            begin, gap = max(min(begin, shown, new_shown), 0), begin
+            # Everything encoded so far ends in a space, so that is all a
+            # gap between the old and new ends can hold
+            edits = [(begin, shown, (" " * (gap - begin) + text)[: new_shown - begin])]
+        self.message, self.size = message, size
+        return edits
+
+    def _edits(self, old, new, start, tail):
+        return [(0, self.size, self.encrypt(new))]
+
+    def _translate_edits(self, old, new, start, tail):
+        encrypt = self.encrypt
+        # Find where the edit starts in the ciphertext from whichever end
+        # of the message is closer
+        if start <= len(old) - start:
+            begin = len(encrypt(old[:start]))
+        else:
+            begin = self.size - len(encrypt(old[start:]))
+        end = begin + len(encrypt(old[start : len(old) - tail]))
+        return [(begin, end, encrypt(new[start : len(new) - tail]))]
+
+    def _vigenere_edits(self, old, new, start, tail):
+        period = len(self.tables)
+        if period and (len(new) - len(old)) % period:
+            tail = 0  # Everything after the edit has moved to another key phase
+        phase = start % period if period else 0
+        tables = self.tables[phase:] + self.tables[:phase]
+        text = _vigenere_translate(new[start : len(new) - tail], tables)
+        return [(start, len(old) - tail, text)]
+
+    def _transposition_edits(self, old, new, start, tail):
+        columns = self.columns
+        row = start // columns
+        old_rows = -(-len(old) // columns)
+        old_stop, new_stop = old_rows, -(-len(new) // columns)
+        if len(new) == len(old):
+            # Same grid, so rows after the edit are unchanged
+            old_stop = new_stop = -(-(len(new) - tail) // columns)
+        edits = []
+        for index in reversed(range(columns)):
+            column = self.order[index]
+            text = new[row * columns + column : new_stop * columns : columns]
+            begin = index * old_rows + row
+            edits.append(
+                (begin, index * old_rows + old_stop, text.ljust(new_stop - row))
+            )
+        return edits
+
+
+# Ciphers whose output is the concatenation of each character's output
+MONOALPHABETIC_CIPHERS = (
+    CaesarCipher,
+    AffineCipher,
+    SubstitutionCipher,
+    AtbashCipher,
+)
+
+
+MAX_FUSED_PERIOD = 256  # Longest combined key period worth a table per position
+# Fused transpositions read with a stride of the product of their column
+# counts; past about this many characters that is slower than separate passes
+MAX_FUSED_STRIDE = 24
+
+
+def _chain_char(char, funcs):
+    for func in funcs:
+        char = func(char)
+    return char
+
+
+@functools.lru_cache(maxsize=256)
+def _transposition_runs(length, keys):
+    """Where a chain of columnar transpositions reads its output from.
+
+    ``keys`` holds ``(columns, order)`` for each transposition. Returns
+    ``(start, step, count)`` runs that, read one after another from the
+    message, give the output of the whole chain; each transposition turns a
+    run into one strided run per column. Padding added along the way reads
+    spaces (``step`` 0).
+    """
+    runs = [(0, 1, length)] if length else []
+    size = length
+    for columns, order in keys:
+        padded = -(-size // columns) * columns
+        if padded > size:
+            runs.append((length, 0, padded - size))
+        split = []
+        for column in order:
+            offset = 0
+            for start, step, count in runs:
+                first = (column - offset) % columns
+                if first < count:
+                    split.append(
+                        (
+                            start + first * step,
+                            step * columns,
+                            -((first - count) // columns),
+                        )
+                    )
+                offset += count
+        runs, size = split, padded
+    return runs
+
+
+class _PipelineStage:
+    """Stages run one after another, when they cannot be fused."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self, stages):
+        self.stages = stages
+
+    def apply(self, message):
+        for stage, sign in self.stages:
+            message = stage.encrypt(message) if sign > 0 else stage.decrypt(message)
+        return message
+
+    def iter(self, chunks):
+        for stage, sign in self.stages:
+            chunks = (
+                stage.iter_encrypt(chunks) if sign > 0 else stage.iter_decrypt(chunks)
+            )
+        return chunks
+
+
+class _FusedTranslation(_PipelineStage):
+    """Monoalphabetic stages combined into one translation table."""
+
+    __slots__ = ("table",)
+
+    def __init__(self, stages, funcs):
+        super().__init__(stages)
+        self.table = _TranslationTable(_chain_char, tuple(funcs))
+
+    def apply(self, message):
+        return _translate(message, self.table)
+
+    def iter(self, chunks):
+        return _iter_translate(chunks, self.table)
+
+
+class _FusedPolyalphabetic(_PipelineStage):
+    """Vigenère and monoalphabetic stages combined into one table per
+    position of the combined key period, run as a single Vigenère pass.
+
+    Atbash upper-cases first, which can turn one character into two (ß
+    into SS) and shift the key phase of the rest, so with Atbash in the
+    group only ASCII messages take the fused pass.
+    """
+
+    __slots__ = ("tables", "exact")
+
+    def __init__(self, stages, tables):
+        super().__init__(stages)
+        self.tables = tables
+        self.exact = not any(
+            isinstance(stage.cipher, AtbashCipher) for stage, _ in stages
+        )
+
+    def apply(self, message):
+        if self.exact or message.isascii():
+            return _vigenere_translate(message, self.tables)
+        return super().apply(message)
+
+    def iter(self, chunks):
+        if self.exact:
+            return VigenereCipher._iter(chunks, self.tables)
+        return super().iter(chunks)
+
+
+class _FusedTransposition(_PipelineStage):
+    """Transpositions combined into one permutation, read as strided slices."""
+
+    __slots__ = ("keys",)
+
+    def __init__(self, stages):
+        super().__init__(stages)
+        self.keys = tuple(
+            (stage.cipher.key, tuple(stage.cipher.order)) for stage, _ in stages
+        )
+
+    def apply(self, message):
+        runs = _transposition_runs(len(message), self.keys)
+        return "".join(
+            (
+                message[start : start + step * (count - 1) + 1 : step]
+                if step
+                else " " * count
+            )
+            for start, step, count in runs
+        )
+
+    def iter(self, chunks):
+        # Like TranspositionCipher.iter_encrypt, every column needs the
+        # whole message
+        yield self.apply("".join(chunks))
+
+
+def _pipeline_kind(cipher, sign):
+    if isinstance(cipher, MONOALPHABETIC_CIPHERS):
+        return "translate"
+    if isinstance(cipher, VigenereCipher) and cipher.key:
+        return "translate"
+    if isinstance(cipher, TranspositionCipher) and cipher.key and sign > 0:
+        return "transpose"  # Decryption has to deal with ragged columns
+    return None
+
+
+def _fuse(stages):
+    """Turn ``(stage, sign)`` pairs into as few passes as possible."""
+    passes = []
+    for kind, group in itertools.groupby(
+        stages, lambda s: _pipeline_kind(getattr(s[0], "cipher", None), s[1])
+    ):
+        group = list(group)
+        if kind == "transpose":
+            passes.extend(_fuse_transpositions(group))
+        elif kind == "translate":
+            passes.append(_fuse_translation(group))
+        else:
+            passes.append(_PipelineStage(group))
+    return passes
+
+
+def _fuse_transpositions(group):
+    """Fuse runs of transpositions whose combined stride stays small."""
+    passes = []
+    start, stride = 0, 1
+    for index, (stage, _) in enumerate(group + [(None, 0)]):
+        columns = stage.cipher.key if stage else None
+        if stage and stride * columns <= MAX_FUSED_STRIDE:
+            stride *= columns
+            continue
+        if index - start > 1:
+            passes.append(_FusedTransposition(group[start:index]))
+        elif index > start:
+            passes.append(_PipelineStage(group[start:index]))
+        start, stride = index, columns or 1
+    return passes
+
+
+def _fuse_translation(group):
+    periods = [
+        len(stage.cipher.key)
+        for stage, _ in group
+        if isinstance(stage.cipher, VigenereCipher)
+    ]
+    if not periods:
+        funcs = [stage.encrypt if sign > 0 else stage.decrypt for stage, sign in group]
+        return _FusedTranslation(group, funcs)
+    period = math.lcm(*periods)
+    if period > MAX_FUSED_PERIOD:
+        return _PipelineStage(group)
+    # The functions for each stage at every position of the combined period
+    columns = []
+    for stage, sign in group:
+        if isinstance(stage.cipher, VigenereCipher):
+            tables = stage.cipher._tables(sign)
+            columns.append(
+                [
+                    functools.partial(_translate, table=tables[phase % len(tables)])
+                    for phase in range(period)
+                ]
+            )
+        else:
+            columns.append(
+                itertools.repeat(stage.encrypt if sign > 0 else stage.decrypt, period)
+            )
+    tables = [_TranslationTable(_chain_char, funcs) for funcs in zip(*columns)]
+    if any(table.ascii is None for table in tables):
+        # e.g. a substitution key with non-ASCII letters
+        return _PipelineStage(group)
+    return _FusedPolyalphabetic(group, tables)
+
+
+class Pipeline:
+    """Ciphers applied one after another, e.g.
+    ``Pipeline([AtbashCipher.with_key(), CaesarCipher.with_key(3)])``.
+
+    Stages are ``with_key`` ciphers or other pipelines. Encrypting runs them
+    in order and decrypting undoes them in reverse, with the same result as
+    running the stages one by one, but neighbouring stages are fused so the
+    message is not copied once per stage:
+
+    - Caesar, Affine, Substitution and Atbash stages become one
+      translation table.
+    - Vigenère stages, with any of those around them, become one Vigenère
+      pass whose period is the least common multiple of the key lengths.
+    - Transpositions become one permutation, read as strided slices of the
+      message (when encrypting).
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self._encrypt_passes = _fuse([(stage, 1) for stage in self.stages])
+        self._decrypt_passes = _fuse([(stage, -1) for stage in reversed(self.stages)])
+
+    def encrypt(self, message):
+        for step in self._encrypt_passes:
+            message = step.apply(message)
+        return message
+
+    def decrypt(self, message):
+        for step in self._decrypt_passes:
+            message = step.apply(message)
+        return message
+
+    def encrypt_batch(self, messages):
+        return map(self.encrypt, messages)
+
+    def decrypt_batch(self, messages):
+        return map(self.decrypt, messages)
+
+    def iter_encrypt(self, chunks):
+        for step in self._encrypt_passes:
+            chunks = step.iter(chunks)
+        return chunks
+
+    def iter_decrypt(self, chunks):
+        for step in self._decrypt_passes:
+            chunks = step.iter(chunks)
+        return chunks
+
+
+# Ciphers whose output for a piece of text does not depend on where that
+# piece sits in the message (Vigenere only needs pieces aligned to its key)
+PARALLEL_CIPHERS = (
+    CaesarCipher,
+    VigenereCipher,
+    SubstitutionCipher,
+    AffineCipher,
+    AtbashCipher,
+)
+PARALLEL_THRESHOLD = 8 << 20  # Shorter messages are not worth a process pool
+SHARDS_PER_WORKER = 4
+
+
+def _run_shard(cipher, action, shard):
+    return "".join(getattr(cipher, "iter_" + action)([shard]))
+
+
+def _run_parallel(cipher, action, message, workers, threshold, period=1):
+    if workers == 1 or not message or len(message) < threshold:
+        return [_run_shard(cipher, action, message)]
+    # Imported here so that plain use of the ciphers starts up quickly
+    import concurrent.futures
+
+    workers = workers or os.cpu_count() or 1
+    size = -(-len(message) // (workers * SHARDS_PER_WORKER))
+    size += -size % period  # Every shard starts at key position 0
+    shards = [message[i : i + size] for i in range(0, len(message), size)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(
+                _run_shard, itertools.repeat(cipher), itertools.repeat(action), shards
+            )
+        )
+
+
+def _parallel(cipher, action, workers, threshold):
+    if not isinstance(cipher, PARALLEL_CIPHERS):
+        raise TypeError(f"{type(cipher).__name__} cannot be split across processes.")
+    keyed = copy.copy(cipher)
+    keyed.message = ""  # Only the key is sent to the workers
+    period = (len(cipher.key) or 1) if isinstance(cipher, VigenereCipher) else 1
+    return "".join(
+        _run_parallel(keyed, action, cipher.message, workers, threshold, period)
+    )
+
+
+def parallel_encrypt(cipher, workers=None, threshold=PARALLEL_THRESHOLD):
+    """Encrypt ``cipher.message`` in shards across a process pool.
+
+    ``workers`` defaults to the number of CPUs; messages shorter than
+    ``threshold`` characters are encrypted in this process.
+    """
+    return _parallel(cipher, "encrypt", workers, threshold)
+
+
+def parallel_decrypt(cipher, workers=None, threshold=PARALLEL_THRESHOLD):
+    return _parallel(cipher, "decrypt", workers, threshold)
+
+
+def parallel_morse_encode(message, workers=None, threshold=PARALLEL_THRESHOLD):
+    results = _run_parallel(MorseCodeCipher, "encode", message, workers, threshold)
+    return " ".join(result for result in results if result)
+
+
+# Ciphers that map every byte of ASCII (or UTF-8) text to one byte
+BUFFER_CIPHERS = MONOALPHABETIC_CIPHERS + (VigenereCipher,)
+
+
+def _byte_tables(keyed, sign):
+    """``bytes.translate`` tables for a with_key cipher, one per key position."""
+    template = keyed.cipher
+    if isinstance(template, VigenereCipher):
+        if not template.key:
+            raise ValueError("Key must not be empty.")
+        return [table.ascii for table in template._tables(sign)]
+    if not isinstance(template, BUFFER_CIPHERS):
+        raise TypeError(f"{type(template).__name__} cannot work on byte buffers.")
+    # Monoalphabetic, so the cipher of every ASCII character is the table
+    characters = "".join(map(chr, range(128)))
+    mapped = keyed.encrypt(characters) if sign > 0 else keyed.decrypt(characters)
+    if len(mapped) != 128 or not mapped.isascii():
+        raise ValueError("The key maps letters outside ASCII.")
+    return [bytes.maketrans(characters.encode("ascii"), mapped.encode("ascii"))]
+
+
+def translate_buffer(keyed, sign, data, out=None, position=0, chunk_size=CHUNK_SIZE):
+    """Encrypt (sign 1) or decrypt (-1) ASCII or UTF-8 bytes without a copy.
+
+    ``data`` is anything with the buffer protocol: ``bytes``, ``bytearray``,
+    ``memoryview`` or an ``mmap``. The result goes to ``out`` if given, or
+    back into ``data`` itself, a chunk at a time, so the only extra memory
+    is two chunks however big the buffer is. Returns the buffer written to.
+
+    Works for Caesar, Affine, Atbash, Substitution and Vigenère ciphers.
+    Bytes outside ASCII are left alone, so UTF-8 text keeps its other
+    characters, but Vigenère counts its key positions in bytes: pass
+    ``position`` (where ``data`` starts in the whole message) to carry on
+    with the key from an earlier buffer.
+    """
+    tables = _byte_tables(keyed, sign)
+    period = len(tables)
+    phase = position % period
+    tables = tables[phase:] + tables[:phase]
+    block = max(chunk_size // period, 1) * period  # Whole key periods
+    with memoryview(data) as source_view, source_view.cast("B") as source:
+        target_buffer = data if out is None else out
+        with memoryview(target_buffer) as target_view, target_view.cast("B") as target:
+            if target.readonly:
+                raise TypeError("The output buffer is read-only.")
+            if len(target) < len(source):
+                raise ValueError("The output buffer is smaller than the input.")
+            for start in range(0, len(source), block):
+                piece = source[start : start + block]
+                written = target[start : start + len(piece)]
+                if period == 1:
+                    written[:] = piece.tobytes().translate(tables[0])
+                    continue
+                chunk = bytearray(piece)
+                for phase, table in enumerate(tables[: len(chunk)]):
+                    chunk[phase::period] = chunk[phase::period].translate(table)
+                written[:] = chunk
+    return target_buffer
@@ -0,0 +1,613 @@
+"""Recover keys from ciphertext produced by the ciphers in ciphers.py.
+
+The solvers score candidate keys against English letter statistics. They
+work from letter counts of the ciphertext, so the text is only scanned once
+no matter how many keys are tried, and only the winning key is used to
+decrypt.
+"""
+
+import array
+import collections
+import functools
+import itertools
+import math
+import mmap
+import operator
+import os
+import random
+import sys
+import time
+
+from ciphers import (
+    ALPHABET,
+    AffineCipher,
+    CaesarCipher,
+    SubstitutionCipher,
+    TranspositionCipher,
+    VigenereCipher,
+)
+
+# Relative frequency of each letter in English text, A to Z
+ENGLISH_FREQUENCIES = [
+    0.08167, 0.01492, 0.02782, 0.04253, 0.12702, 0.02228, 0.02015,
+    0.06094, 0.06966, 0.00153, 0.00772, 0.04025, 0.02406, 0.06749,
+    0.07507, 0.01929, 0.00095, 0.05987, 0.06327, 0.09056, 0.02758,
+    0.00978, 0.02360, 0.00150, 0.01974, 0.00074,
+]  # fmt: skip
+ENGLISH_LOG_PROBABILITIES = [math.log(p) for p in ENGLISH_FREQUENCIES]
+
+# Multipliers with an inverse mod 26, i.e. the usable affine keys
+AFFINE_MULTIPLIERS = [a for a in range(1, 26) if math.gcd(a, 26) == 1]
+
+CrackResult = collections.namedtuple(
+    "CrackResult", "key plaintext ranking timings", defaults=(None,)
+)
+CrackResult.__doc__ = """Best key, the text decrypted with it, and every
+candidate as ``(key, score)`` pairs, best first. Some solvers also report
+how long their search took in ``timings``."""
+
+# log10 probability of every quadgram AAAA..ZZZZ as a flat float32 array,
+# built with build_quadgram_table from 1.2 MB of public-domain English prose
+# from Project Gutenberg: Botchan (Natsume Soseki, tr. Yasotaro Morri), the
+# Library of Congress Workshop on Electronic Texts, and Newton's Opticks
+QUADGRAM_PATH = os.path.join(os.path.dirname(__file__), "data", "quadgrams.bin")
+
+# Perturbations in a row without a better key before a climb gives up
+PATIENCE = 10
+
+# Byte value -> letter index 0-25, anything that is not a letter -> 26
+_LETTER_INDEX = bytearray([26]) * 256
+for _index, _letter in enumerate(ALPHABET.encode("ascii")):
+    _LETTER_INDEX[_letter] = _LETTER_INDEX[_letter + 32] = _index
+_LETTER_INDEX = bytes(_LETTER_INDEX)
+# Letter index -> 1, anything else -> 0
+_LETTER_MASK = bytes([1] * 26 + [0] * 230)
+
+
+def letter_counts(text, chunk_size=1 << 20):
+    """Occurrences of each letter A-Z in ``text``, ignoring case."""
+    counts = [0] * 26
+    # Upper-casing a chunk at a time keeps the copy small and cache-friendly
+    for start in range(0, len(text), chunk_size):
+        chunk = text[start : start + chunk_size].upper()
+        for index, letter in enumerate(ALPHABET):
+            counts[index] += chunk.count(letter)
+    return counts
+
+
+def log_likelihood(counts, permutation):
+    """Log-probability of the counts as English once ``permutation`` is
+    applied (``permutation[c]`` is the plaintext letter for ciphertext
+    letter ``c``). Higher is better."""
+    return sum(
+        n * ENGLISH_LOG_PROBABILITIES[permutation[c]] for c, n in enumerate(counts)
+    )
+
+
+def chi_squared(counts, permutation):
+    """Chi-squared distance from English letter frequencies. Lower is better."""
+    total = sum(counts) or 1
+    observed = [0] * 26
+    for c, n in enumerate(counts):
+        observed[permutation[c]] = n
+    return sum(
+        (o - total * p) ** 2 / (total * p)
+        for o, p in zip(observed, ENGLISH_FREQUENCIES)
+    )
+
+
+SCORERS = {"loglik": (log_likelihood, True), "chi2": (chi_squared, False)}
+
+
+def _rank(counts, candidates, scoring):
+    scorer, higher_is_better = SCORERS[scoring]
+    ranking = [(key, scorer(counts, permutation)) for key, permutation in candidates]
+    ranking.sort(key=lambda item: item[1], reverse=higher_is_better)
+    return ranking
+
+
+def _caesar_candidates():
+    return ((shift, [(c - shift) % 26 for c in range(26)]) for shift in range(26))
+
+
+def crack_caesar(ciphertext, scoring="loglik"):
+    """Find the shift used by ``CaesarCipher`` to produce ``ciphertext``."""
+    ranking = _rank(letter_counts(ciphertext), _caesar_candidates(), scoring)
+    shift = ranking[0][0]
+    return CrackResult(shift, CaesarCipher(ciphertext, shift).decrypt(), ranking)
+
+
+def crack_affine(ciphertext, scoring="loglik", multipliers=AFFINE_MULTIPLIERS):
+    """Find the ``(a, shift)`` pair used by ``AffineCipher``.
+
+    ``AffineCipher`` always uses ``a = 5``; pass ``multipliers=[5]`` to only
+    search its shifts.
+    """
+    candidates = (
+        ((a, shift), [pow(a, -1, 26) * (c - shift) % 26 for c in range(26)])
+        for a in multipliers
+        for shift in range(26)
+    )
+    ranking = _rank(letter_counts(ciphertext), candidates, scoring)
+    a, shift = ranking[0][0]
+    cipher = AffineCipher(ciphertext, shift)
+    cipher.a = a
+    return CrackResult((a, shift), cipher.decrypt(), ranking)
+
+
+def letter_indices(text):
+    """``text`` as bytes of letter indices (0-25), one per character, with
+    26 standing for anything that is not an ASCII letter."""
+    return text.encode("ascii", "replace").translate(_LETTER_INDEX)
+
+
+def coincidence_rates(indices, max_period):
+    """Fraction of letter pairs ``d`` apart that are the same letter, for
+    every ``d`` from 1 to ``max_period``.
+
+    The text is compared with a shifted copy of itself as big integers (one
+    byte per character), so each distance costs a few C-level passes.
+    """
+    length = len(indices)
+    letters = int.from_bytes(indices, "big")
+    # Non-letters are 26 on one side and 27 on the other so they never match
+    others = int.from_bytes(indices.replace(b"\x1a", b"\x1b"), "big")
+    mask = int.from_bytes(indices.translate(_LETTER_MASK), "big")
+    rates = {}
+    for distance in range(1, min(max_period, length - 1) + 1):
+        low = (1 << 8 * (length - distance)) - 1
+        matches = ((letters >> 8 * distance) ^ (others & low)).to_bytes(
+            length - distance, "big"
+        )
+        pairs = ((mask >> 8 * distance) & mask & low).bit_count()
+        rates[distance] = matches.count(0) / pairs if pairs else 0.0
+    return rates
+
+
+def _column_key(indices, period):
+    """Best Caesar shift for each key position, and the summed log-likelihood."""
+    key, total = [], 0.0
+    for column in range(period):
+        stride = indices[column::period]
+        counts = [stride.count(letter) for letter in range(26)]
+        shift, score = _rank(counts, _caesar_candidates(), "loglik")[0]
+        key.append(ALPHABET[shift])
+        total += score
+    return "".join(key), total
+
+
+def _shortest_repeat(key):
+    """``"LEMONLEMON"`` -> ``"LEMON"``."""
+    for length in range(1, len(key)):
+        if len(key) % length == 0 and key == key[:length] * (len(key) // length):
+            return key[:length]
+    return key
+
+
+def crack_vigenere(ciphertext, max_period=30, time_budget=None, sample_size=1 << 20):
+    """Find the key used by ``VigenereCipher`` to produce ``ciphertext``.
+
+    Candidate key lengths are ordered by how often letters repeat at their
+    multiples (the index of coincidence of the columns), then each column is
+    solved as a Caesar cipher. Keys are ranked by log-likelihood less
+    ``log(26)`` per key letter, so a key repeated twice does not beat itself.
+
+    Only the first ``sample_size`` characters are analysed. Once
+    ``time_budget`` seconds have passed no further key lengths are tried.
+    """
+    started = time.perf_counter()
+    indices = letter_indices(ciphertext[:sample_size])
+    rates = coincidence_rates(indices, max_period)
+    periods = range(1, max(rates, default=1) + 1)
+
+    def coincidence(period):
+        multiples = range(period, len(rates) + 1, period)
+        return sum(rates[d] for d in multiples) / len(multiples) if multiples else 0.0
+
+    order = []
+    for period in sorted(periods, key=coincidence, reverse=True):
+        # Multiples of the key length score about as well as the length
+        # itself, so the shortest divisor that keeps up is tried first
+        threshold = 0.9 * coincidence(period)
+        for divisor in range(1, period + 1):
+            if period % divisor == 0 and coincidence(divisor) >= threshold:
+                break
+        order.extend(p for p in (divisor, period) if p not in order)
+    ranking, timings = [], {}
+    for period in order:
+        if timings and time_budget is not None:
+            if time.perf_counter() - started > time_budget:
+                break
+        period_started = time.perf_counter()
+        key, score = _column_key(indices, period)
+        key = _shortest_repeat(key)
+        if key not in (ranked for ranked, _ in ranking):
+            ranking.append((key, score - len(key) * math.log(26)))
+        timings[period] = time.perf_counter() - period_started
+    ranking.sort(key=lambda item: item[1], reverse=True)
+    key = ranking[0][0]
+    plaintext = VigenereCipher(ciphertext, key).decrypt()
+    return CrackResult(key, plaintext, ranking, timings)
+
+
+def _quadgram_codes(letters):
+    """Index into the quadgram table of every 4-letter window of ``letters``."""
+    return (
+        ((a * 26 + b) * 26 + c) * 26 + d
+        for a, b, c, d in zip(letters, letters[1:], letters[2:], letters[3:])
+    )
+
+
+def build_quadgram_table(corpus, path=QUADGRAM_PATH):
+    """Count the quadgrams of an English ``corpus`` and write the table that
+    ``load_quadgram_table`` reads. Unseen quadgrams get a floor value."""
+    letters = letter_indices(corpus).replace(b"\x1a", b"")
+    counts = collections.Counter(_quadgram_codes(letters))
+    total = sum(counts.values())
+    table = array.array("f", [math.log10(0.01 / total)]) * 26**4
+    for code, count in counts.items():
+        table[code] = math.log10(count / total)
+    if sys.byteorder == "big":
+        table.byteswap()  # The file is always little-endian
+    with open(path, "wb") as file:
+        table.tofile(file)
+
+
+@functools.lru_cache(maxsize=None)
+def load_quadgram_table(path=QUADGRAM_PATH):
+    """Memory-map the quadgram table; pages are only read as they are used."""
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if sys.byteorder == "little":
+        return memoryview(mapped).cast("f")
+    table = array.array("f", mapped)
+    table.byteswap()
+    return table
+
+
+class _QuadgramScorer:
+    """Scores decryption keys from the ciphertext's quadgram counts.
+
+    A key is a list mapping each ciphertext letter to a plaintext letter.
+    Swapping two letters of the key only changes the quadgrams containing
+    them, so ``swap_gain`` just rescores those instead of decrypting again.
+    """
+
+    def __init__(self, letters, table):
+        counts = collections.Counter(
+            zip(letters, letters[1:], letters[2:], letters[3:])
+        )
+        self.quadgrams = list(counts)
+        self.counts = list(counts.values())
+        self.table = table
+        self.containing = [[] for _ in range(26)]
+        for position, quadgram in enumerate(self.quadgrams):
+            for letter in set(quadgram):
+                self.containing[letter].append(position)
+        self._affected = {}
+
+    def _fitness(self, key, positions):
+        table, quadgrams, counts = self.table, self.quadgrams, self.counts
+        total = 0.0
+        for position in positions:
+            a, b, c, d = quadgrams[position]
+            code = ((key[a] * 26 + key[b]) * 26 + key[c]) * 26 + key[d]
+            total += counts[position] * table[code]
+        return total
+
+    def score(self, key):
+        return self._fitness(key, range(len(self.quadgrams)))
+
+    def swap_gain(self, key, x, y):
+        """Change in score from swapping ``key[x]`` and ``key[y]``."""
+        affected = self._affected.get((x, y))
+        if affected is None:
+            affected = self._affected[x, y] = sorted(
+                set(self.containing[x]) | set(self.containing[y])
+            )
+        before = self._fitness(key, affected)
+        key[x], key[y] = key[y], key[x]
+        after = self._fitness(key, affected)
+        key[x], key[y] = key[y], key[x]
+        return after - before
+
+
+def _ascend(scorer, key, score):
+    """Swap letters of ``key`` in place while any swap improves it.
+
+    Returns the final score and the number of swaps tried.
+    """
+    iterations = 0
+    improved = True
+    while improved:
+        improved = False
+        for x in range(26):
+            for y in range(x + 1, 26):
+                iterations += 1
+                gain = scorer.swap_gain(key, x, y)
+                if gain > 0:
+                    key[x], key[y] = key[y], key[x]
+                    score += gain
+                    improved = True
+    return score, iterations
+
+
+def _climb(letters, seed, table_path, patience):
+    """One run from a random key.
+
+    Climbs to a local optimum, then keeps perturbing the best key found
+    with a few random swaps and climbing again, until ``patience``
+    perturbations in a row fail to improve it. Returns the key, its score
+    and the number of swaps tried.
+    """
+    scorer = _QuadgramScorer(letters, load_quadgram_table(table_path))
+    rng = random.Random(seed)
+    best_key = list(range(26))
+    rng.shuffle(best_key)
+    best, iterations = _ascend(scorer, best_key, scorer.score(best_key))
+    failures = 0
+    while failures < patience:
+        key = best_key[:]
+        for _ in range(rng.randint(2, 4)):
+            x, y = rng.sample(range(26), 2)
+            key[x], key[y] = key[y], key[x]
+        score, tried = _ascend(scorer, key, scorer.score(key))
+        iterations += tried
+        if score > best:
+            best_key, best, failures = key, score, 0
+        else:
+            failures += 1
+    return best_key, best, iterations
+
+
+def crack_substitution(
+    ciphertext,
+    restarts=4,
+    workers=None,
+    sample_size=2000,
+    seed=None,
+    table_path=QUADGRAM_PATH,
+    patience=PATIENCE,
+):
+    """Find the key used by ``SubstitutionCipher`` to produce ``ciphertext``.
+
+    Runs ``restarts`` hill climbs over letter swaps from random keys, scored
+    by quadgram log-probabilities of the first ``sample_size`` letters, in a
+    pool of ``workers`` processes (one process if ``workers`` is 1). Each
+    climb escapes local optima by perturbing its best key and climbing
+    again, giving up after ``patience`` perturbations without a gain.
+    ``timings`` holds the wall time, swaps tried and swaps per second.
+    """
+    letters = letter_indices(ciphertext).replace(b"\x1a", b"")[:sample_size]
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(64) for _ in range(restarts)]
+    args = (
+        [letters] * restarts,
+        seeds,
+        [table_path] * restarts,
+        [patience] * restarts,
+    )
+    started = time.perf_counter()
+    if workers == 1:
+        runs = list(map(_climb, *args))
+    else:
+        # Imported here so that the other solvers start up quickly
+        import concurrent.futures
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(_climb, *args))
+    seconds = time.perf_counter() - started
+
+    ranking = {}
+    for decryption, score, _ in runs:
+        # decryption maps ciphertext -> plaintext; the cipher key is the reverse
+        key = [""] * 26
+        for cipher_letter, plain_letter in enumerate(decryption):
+            key[plain_letter] = ALPHABET[cipher_letter]
+        ranking["".join(key)] = score
+    ranking = sorted(ranking.items(), key=lambda item: item[1], reverse=True)
+    key = ranking[0][0]
+    iterations = sum(run[2] for run in runs)
+    timings = {
+        "seconds": seconds,
+        "iterations": iterations,
+        "iterations_per_second": iterations / seconds if seconds else 0.0,
+    }
+    plaintext = SubstitutionCipher(ciphertext, key).decrypt()
+    return CrackResult(key, plaintext, ranking, timings)
+
+
+@functools.lru_cache(maxsize=None)
+def load_bigram_table(path=QUADGRAM_PATH):
+    """log10 probability of every pair of letter indices 0-26, at
+    ``first * 27 + second``, summed from the quadgram table. A pair with a
+    non-letter gets the probability of an average pair."""
+    quadgrams = load_quadgram_table(path)
+    table = [math.log10(1 / 26**2)] * 27**2
+    for pair in range(26**2):
+        first, second = divmod(pair, 26)
+        window = quadgrams[pair * 26**2 : (pair + 1) * 26**2]
+        table[first * 27 + second] = math.log10(sum(map((10.0).__pow__, window)))
+    return table
+
+
+def _adjacency(indices, columns, sample_rows, bigrams):
+    """Bigram score of every two ciphertext columns read side by side, over
+    the first ``sample_rows`` rows of the grid."""
+    rows = len(indices) // columns
+    blocks = [indices[k * rows : k * rows + sample_rows] for k in range(columns)]
+    return [
+        [
+            sum(map(bigrams.__getitem__, map(operator.add, map((27).__mul__, a), b)))
+            for b in blocks
+        ]
+        for a in blocks
+    ]
+
+
+_stop = None  # Event shared by the processes of a crack_transposition run
+
+
+def _set_stop(event):
+    global _stop
+    _stop = event
+
+
+def _search_columns(adjacency, prefix, target, keep=5):
+    """Best orders of the ciphertext columns starting with ``prefix`` (a
+    tuple of columns, or None for only the order they are in).
+
+    An order is scored by adding up the adjacency of each column and the
+    next, so no text is rebuilt. Returns the ``keep`` best ``(score,
+    order)`` pairs and how many orders were tried. Stops once a score
+    reaches ``target``, or another process has stopped the run.
+    """
+    columns = len(adjacency)
+    if prefix is None:
+        order = tuple(range(columns))
+        return [(sum(adjacency[a][a + 1] for a in order[:-1]), order)], 1
+    rest = [column for column in range(columns) if column not in prefix]
+    base = sum(adjacency[a][b] for a, b in zip(prefix, prefix[1:]))
+    last = adjacency[prefix[-1]] if prefix else [0.0] * columns
+    best = []
+    tried = 0
+    for tried, order in enumerate(itertools.permutations(rest), 1):
+        score = base + last[order[0]]
+        for a, b in zip(order, order[1:]):
+            score += adjacency[a][b]
+        if len(best) < keep or score > best[0][0]:
+            best.append((score, prefix + order))
+            best.sort()
+            del best[:-keep]
+            if target is not None and score >= target:
+                break
+        if not tried % 4096 and _stop is not None and _stop.is_set():
+            break
+    return best, tried
+
+
+@functools.lru_cache(maxsize=64)
+def _grid_positions(columns, sample_rows):
+    """Row and column of the first ``sample_rows`` rows of plaintext."""
+    count = sample_rows * columns
+    return [i // columns for i in range(count)], [i % columns for i in range(count)]
+
+
+def _quadgram_fitness(indices, order, sample_rows, table):
+    """Mean quadgram log10 probability of the letters of the plaintext that
+    reading the columns in ``order`` gives, gathered straight from the
+    ciphertext."""
+    columns = len(order)
+    rows = len(indices) // columns
+    row_of, column_of = _grid_positions(columns, sample_rows)
+    offsets = [block * rows for block in order]
+    positions = map(operator.add, row_of, map(offsets.__getitem__, column_of))
+    letters = bytes(map(indices.__getitem__, positions)).replace(b"\x1a", b"")
+    if len(letters) < 4:
+        return float("-inf")
+    codes = _quadgram_codes(letters)
+    return sum(map(table.__getitem__, codes)) / (len(letters) - 3)
+
+
+def crack_transposition(
+    ciphertext,
+    max_columns=20,
+    max_permuted=8,
+    workers=None,
+    threshold=None,
+    sample_size=2000,
+    table_path=QUADGRAM_PATH,
+):
+    """Find a key that undoes ``TranspositionCipher`` on ``ciphertext``.
+
+    Tries every column count up to ``max_columns`` that the length divides
+    (the cipher pads to a whole grid), with the columns in order and, up to
+    ``max_permuted`` columns, in every order as keyed transposition uses.
+    Orders are scored by English bigrams of neighbouring columns over the
+    first ``sample_size`` characters and the best few rescored by
+    quadgrams. The key is a word that sorts into the winning order, to use
+    with ``keyed=True`` (it works unkeyed too when the order is natural).
+
+    The orders are split between a pool of ``workers`` processes (one
+    process if ``workers`` is 1). A run stops early once an order averages
+    ``threshold`` per bigram (log10; English text with spaces scores about
+    -2.5 and shuffled text about -2.8). ``timings`` holds the wall time, the
+    orders tried and orders per second.
+    """
+    indices = letter_indices(ciphertext)
+    length = len(indices)
+    bigrams = load_bigram_table(table_path)
+    units = []
+    for columns in range(2, min(max_columns, length) + 1):
+        if length % columns:
+            continue
+        sample_rows = min(length // columns, max(sample_size // columns, 1))
+        adjacency = _adjacency(indices, columns, sample_rows, bigrams)
+        target = None
+        if threshold is not None:
+            target = threshold * sample_rows * (columns - 1)
+        if columns > max_permuted:
+            prefixes = [None]
+        elif columns > 4:
+            prefixes = [(first,) for first in range(columns)]
+        else:
+            prefixes = [()]
+        pairs = sample_rows * (columns - 1)
+        units.extend((pairs, (adjacency, prefix, target)) for prefix in prefixes)
+
+    started = time.perf_counter()
+    results = []
+    if workers == 1 or len(units) < 2:
+        _set_stop(None)
+        for pairs, unit in units:
+            best, tried = _search_columns(*unit)
+            results.append((pairs, best, tried))
+            if unit[2] is not None and best[-1][0] >= unit[2]:
+                break
+    else:
+        # Imported here so that the other solvers start up quickly
+        import concurrent.futures
+        import multiprocessing
+
+        stop = multiprocessing.Event()
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_set_stop, initargs=(stop,)
+        ) as pool:
+            futures = {
+                pool.submit(_search_columns, *unit): (pairs, unit[2])
+                for pairs, unit in units
+            }
+            for future in concurrent.futures.as_completed(futures):
+                best, tried = future.result()
+                pairs, target = futures[future]
+                results.append((pairs, best, tried))
+                if target is not None and best[-1][0] >= target:
+                    stop.set()
+                    for pending in futures:
+                        pending.cancel()
+                    break
+    seconds = time.perf_counter() - started
+
+    quadgrams = load_quadgram_table(table_path)
+    ranking = {}
+    candidates = sorted(
+        ((score / pairs, order) for pairs, best, _ in results for score, order in best),
+        reverse=True,
+    )
+    for _, order in candidates[:20]:
+        columns = len(order)
+        sample_rows = min(length // columns, max(sample_size // columns, 1))
+        key = "".join(ALPHABET[min(block, 25)] for block in order)
+        ranking[key] = _quadgram_fitness(indices, order, sample_rows, quadgrams)
+    ranking = sorted(ranking.items(), key=lambda item: item[1], reverse=True)
+    tried = sum(tried for _, _, tried in results)
+    timings = {
+        "seconds": seconds,
+        "candidates": tried,
+        "candidates_per_second": tried / seconds if seconds else 0.0,
+    }
+    if not ranking:
+        return CrackResult(None, ciphertext, ranking, timings)
+    key = ranking[0][0]
+    plaintext = TranspositionCipher(ciphertext, key, keyed=True).decrypt()
+    return CrackResult(key, plaintext, ranking, timings)
@@ -0,0 +1,82 @@
+"""Times switching between cipher screens in the GUI.
+
+Run with ``python gui_benchmark.py`` (needs a display). Each switch goes
+back to the cipher list and opens the next cipher, the same as clicking
+through the app. The widget count and the Python memory in use are
+compared before and after, and should stay flat since every screen is
+only built once.
+"""
+
+import argparse
+import itertools
+import sys
+import time
+import tracemalloc
+
+import cipher_cat
+
+CIPHERS = [
+    "Caesar Cipher",
+    "Vigenere Cipher",
+    "Substitution Cipher",
+    "Affine Cipher",
+    "Transposition Cipher",
+    "Hill Cipher",
+    "Playfair Cipher",
+    "Morse Code",
+    "Cipher Chain",
+]
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def switch(cipher_type):
+    cipher_cat.go_back()
+    cipher_cat.select_cipher(cipher_type)
+    cipher_cat.cipher_window.update_idletasks()
+
+
+def bench_switch(count):
+    window = cipher_cat.build_initial_window()
+    # Warm up: build every screen once and load the images
+    for cipher_type in CIPHERS:
+        switch(cipher_type)
+    cipher_cat.message_var.set("The message should survive every switch")
+
+    tracemalloc.start()
+    widgets_before = count_widgets(window)
+    memory_before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for cipher_type in itertools.islice(itertools.cycle(CIPHERS), count):
+        switch(cipher_type)
+    elapsed = time.perf_counter() - start
+    widgets_after = count_widgets(window)
+    memory_after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{count} switches in {elapsed:.2f} s ({elapsed / count * 1000:.2f} ms each)")
+    print(f"widgets: {widgets_before} -> {widgets_after}")
+    print(
+        f"Python memory: {memory_before / 1024:.1f} KiB -> {memory_after / 1024:.1f} KiB"
+    )
+    message = cipher_cat.message_var.get()
+    window.destroy()
+
+    ok = widgets_after == widgets_before
+    ok = ok and memory_after - memory_before < 64 << 10
+    ok = ok and message == "The message should survive every switch"
+    print("OK" if ok else "FAILED: widgets, memory or the message changed")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--switches", type=int, default=1000)
+    args = parser.parse_args()
+    return 0 if bench_switch(args.switches) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""Opt-in timing of the cipher calls in ciphers.py.
+
+    import instrumentation
+
+    instrumentation.enable(instrumentation.JSONLinesSink(open("ops.jsonl", "a")))
+    ...
+    print(instrumentation.metrics.prometheus())
+    instrumentation.disable()
+
+``enable`` wraps encrypt/decrypt (encode/decode for Morse code) and their
+batch, streaming and buffer versions on every cipher class, KeyedCipher and
+Pipeline; ``disable`` puts the original methods back, so nothing is
+slowed down unless it is enabled. Each finished call is added to the
+counters in ``metrics`` and passed to the sinks, which are any callables
+taking an Operation.
+
+Sizes are counted in characters of input, which is the same as bytes for
+ASCII text and keeps recording a call O(1). A call made from inside another
+recorded call (e.g. Morse ``iter_encode`` calling ``encode``) only counts
+towards the outer one. A stream is recorded when it has been read to the
+end, with the time spent producing its pieces.
+"""
+
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+import ciphers
+
+
+class Operation(collections.namedtuple("Operation", "cipher direction size seconds")):
+    """One recorded call: cipher class name, direction, characters in and
+    wall time."""
+
+    __slots__ = ()
+
+    @property
+    def mb_per_s(self):
+        return self.size / self.seconds / 1e6 if self.seconds else 0.0
+
+    def describe(self):
+        return (
+            f"{self.cipher} {self.direction}: {self.size:,} characters in "
+            f"{self.seconds * 1000:.2f} ms ({self.mb_per_s:.1f} MB/s)"
+        )
+
+
+class Metrics:
+    """Call counts, sizes and time per (cipher, direction), and the sinks."""
+
+    def __init__(self):
+        self.counters = {}  # (cipher, direction) -> [calls, size, seconds]
+        self.last = None
+        self.sinks = []
+        self._lock = threading.Lock()
+
+    def record(self, operation):
+        with self._lock:
+            counter = self.counters.get(operation[:2])
+            if counter is None:
+                counter = self.counters[operation[:2]] = [0, 0, 0.0]
+            counter[0] += 1
+            counter[1] += operation.size
+            counter[2] += operation.seconds
+            self.last = operation
+        for sink in self.sinks:
+            sink(operation)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.last = None
+
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self.counters.items())
+        return [
+            {
+                "cipher": cipher,
+                "direction": direction,
+                "calls": calls,
+                "size": size,
+                "seconds": seconds,
+                "mb_per_s": size / seconds / 1e6 if seconds else 0.0,
+            }
+            for (cipher, direction), (calls, size, seconds) in items
+        ]
+
+    def prometheus(self):
+        """The counters in the Prometheus text exposition format."""
+        families = [
+            ("cipher_calls_total", "calls", "Cipher calls."),
+            (
+                "cipher_input_characters_total",
+                "size",
+                "Characters passed to cipher calls.",
+            ),
+            ("cipher_seconds_total", "seconds", "Wall time spent in cipher calls."),
+        ]
+        snapshot = self.snapshot()
+        lines = []
+        for name, field, help_text in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for row in snapshot:
+                labels = f'cipher="{row["cipher"]}",direction="{row["direction"]}"'
+                lines.append(f"{name}{{{labels}}} {row[field]}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class JSONLinesSink:
+    """Writes every operation to a text file as one JSON object per line."""
+
+    def __init__(self, file):
+        self.file = file
+        self._lock = threading.Lock()
+
+    def __call__(self, operation):
+        line = json.dumps(dict(operation._asdict(), mb_per_s=operation.mb_per_s))
+        with self._lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+
+class PrometheusFileSink:
+    """Keeps a Prometheus text file of the counters up to date, e.g. for the
+    node exporter's textfile collector. The file is rewritten at most every
+    ``interval`` seconds, and replaced atomically."""
+
+    def __init__(self, path, interval=10.0, registry=None):
+        self.path = path
+        self.interval = interval
+        self.registry = registry or metrics
+        self._written = float("-inf")
+
+    def __call__(self, operation):
+        if time.monotonic() - self._written >= self.interval:
+            self.write()
+
+    def write(self):
+        self._written = time.monotonic()
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.registry.prometheus())
+        os.replace(temporary, self.path)
+
+
+_state = threading.local()  # .busy while inside a recorded call
+_originals = []  # (class, method name, original attribute) while enabled
+
+
+def _call(method, args):
+    """method(*args) with nested recording turned off."""
+    busy, _state.busy = getattr(_state, "busy", False), True
+    try:
+        return method(*args)
+    finally:
+        _state.busy = busy
+
+
+def _counted(items, size):
+    for item in items:
+        size[0] += len(item)
+        yield item
+
+
+def _timed_steps(iterator, cipher, direction, size, seconds):
+    while True:
+        start = time.perf_counter()
+        busy, _state.busy = getattr(_state, "busy", False), True
+        try:
+            item = next(iterator)
+        except StopIteration:
+            break
+        finally:
+            _state.busy = busy
+            seconds += time.perf_counter() - start
+        yield item
+    metrics.record(Operation(cipher, direction, size[0], seconds))
+
+
+def _cipher_name(obj):
+    if isinstance(obj, ciphers.KeyedCipher):
+        obj = obj.cipher
+    return type(obj).__name__
+
+
+def _wrap_call(method, direction, name, size):
+    """Wrap a method taking one message; name and size are read from args."""
+
+    @functools.wraps(method)
+    def wrapper(*args):
+        if getattr(_state, "busy", False):
+            return method(*args)
+        start = time.perf_counter()
+        result = _call(method, args)
+        seconds = time.perf_counter() - start
+        metrics.record(Operation(name(args), direction, size(args), seconds))
+        return result
+
+    return wrapper
+
+
+def _wrap_iter(method, direction, name, index):
+    """Wrap a method taking an iterable of messages or chunks at ``index``."""
+
+    @functools.wraps(method)
+    def wrapper(*args):
+        if getattr(_state, "busy", False):
+            return method(*args)
+        size = [0]
+        args = (*args[:index], _counted(args[index], size), *args[index + 1 :])
+        start = time.perf_counter()
+        result = _call(method, args)
+        seconds = time.perf_counter() - start
+        if iter(result) is not result:
+            # A list (e.g. MorseCodeCipher.encode_many), already done
+            metrics.record(Operation(name(args), direction, size[0], seconds))
+            return result
+        return _timed_steps(result, name(args), direction, size, seconds)
+
+    return wrapper
+
+
+def _wrap_quiet(method, *details):
+    """Wrap a method so the cipher calls it makes are not recorded."""
+
+    @functools.wraps(method)
+    def wrapper(*args):
+        return _call(method, args)
+
+    return wrapper
+
+
+def _self_name(args):
+    return _cipher_name(args[0])
+
+
+def _morse_name(args):
+    return "MorseCodeCipher"
+
+
+def _live_name(args):
+    return "LiveEncrypter"
+
+
+def _message_size(args):
+    return len(args[0].message)
+
+
+def _argument_size(args):
+    return len(args[1])
+
+
+def _morse_size(args):
+    return len(args[0])
+
+
+def _patches():
+    """(class, method, wrapper, direction, cipher name, size or index) for
+    everything instrumented."""
+    classic = (
+        ciphers.CaesarCipher,
+        ciphers.VigenereCipher,
+        ciphers.SubstitutionCipher,
+        ciphers.AffineCipher,
+        ciphers.TranspositionCipher,
+        ciphers.AtbashCipher,
+        ciphers.HillCipher,
+        ciphers.PlayfairCipher,
+    )
+    for direction in ("encrypt", "decrypt"):
+        for cls in classic:
+            yield cls, direction, _wrap_call, direction, _self_name, _message_size
+            yield cls, "iter_" + direction, _wrap_iter, direction, _self_name, 1
+        for cls in (ciphers.KeyedCipher, ciphers.Pipeline):
+            yield cls, direction, _wrap_call, direction, _self_name, _argument_size
+            for name in (direction + "_batch", "iter_" + direction):
+                yield cls, name, _wrap_iter, direction, _self_name, 1
+        cls = ciphers.KeyedCipher
+        yield cls, direction + "_buffer", _wrap_call, direction, _self_name, _argument_size
+    # Building a pipeline runs its stages over every ASCII character
+    yield ciphers.Pipeline, "__init__", _wrap_quiet
+    yield ciphers.LiveEncrypter, "update", _wrap_call, "live", _live_name, _argument_size
+    for direction in ("encode", "decode"):
+        cls = ciphers.MorseCodeCipher
+        yield cls, direction, _wrap_call, direction, _morse_name, _morse_size
+        for name in (direction + "_many", "iter_" + direction):
+            yield cls, name, _wrap_iter, direction, _morse_name, 0
+
+
+def enable(*sinks):
+    """Start recording cipher calls, adding any sinks; returns ``metrics``."""
+    metrics.sinks.extend(sinks)
+    if _originals:
+        return metrics
+    for cls, name, wrap, *details in _patches():
+        original = vars(cls)[name]
+        if isinstance(original, staticmethod):
+            replacement = staticmethod(wrap(original.__func__, *details))
+        else:
+            replacement = wrap(original, *details)
+        _originals.append((cls, name, original))
+        setattr(cls, name, replacement)
+    return metrics
+
+
+def disable():
+    """Put the original methods back and drop the sinks (the counters are
+    kept until ``metrics.reset()``)."""
+    while _originals:
+        cls, name, original = _originals.pop()
+        setattr(cls, name, original)
+    metrics.sinks.clear()
+
+
+def enabled():
+    return bool(_originals)
@@ -0,0 +1,320 @@
+"""Remembers cipher results between runs.
+
+    cache = ResultCache()
+    key = ResultKey("Vigenere Cipher", "Encrypt", "LEMON", message_digest(message))
+    result = cache.get(key)
+    if result is None:
+        result = VigenereCipher(message, "LEMON").encrypt()
+        cache.put(key, result)
+    cache.record(key, message, result)
+
+Results are keyed by cipher, direction, key and a hash of the message, so a
+lookup never reads the message itself: once the digest is known, a hit
+costs a dictionary lookup whatever the size of the message. The most
+recently used results are kept in memory up to ``memory_size`` characters.
+Every result is also written to a SQLite database in WAL mode, so several
+processes can share it and write to it at once; it keeps at most
+``disk_size`` characters of results, dropping the least recently used.
+
+``record`` adds an operation to the history, which keeps the start of the
+message and result for ``history`` to search. The cache is only an
+optimisation: if the database cannot be opened or written, it carries on
+in memory. The database is only touched with its own lock held, so a
+thread looking in memory never waits for another one writing to disk.
+"""
+
+import collections
+import contextlib
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+PREVIEW = 200  # Characters of the message and result kept in the history
+HISTORY_LIMIT = 1000  # History entries kept, oldest dropped first
+BUSY_TIMEOUT = 10.0  # Seconds to wait for another process writing the store
+DIGEST_CHUNK = 1 << 20  # Characters encoded at a time while hashing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    cipher TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    key TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (cipher, direction, key, digest)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+-- Running total of results.size, so a put does not have to add them up
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage SELECT 0, total(size) FROM results;
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    time REAL NOT NULL,
+    cipher TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    key TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    message TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+"""
+
+
+class ResultKey(collections.namedtuple("ResultKey", "cipher direction key digest")):
+    """What a result depends on; ``digest`` comes from ``message_digest``."""
+
+    __slots__ = ()
+
+
+class HistoryEntry(
+    collections.namedtuple(
+        "HistoryEntry", "id time cipher direction key digest message result"
+    )
+):
+    """One recorded operation, with the start of its message and result."""
+
+    __slots__ = ()
+
+    @property
+    def result_key(self):
+        return ResultKey(self.cipher, self.direction, self.key, self.digest)
+
+    def matches(self, search):
+        """Whether ``history(search)`` would find this entry."""
+        search = search.lower()
+        return any(
+            search in field.lower()
+            for field in (self.cipher, self.key, self.message, self.result)
+        )
+
+
+def history_entry(key, message, result):
+    """The HistoryEntry for an operation done now."""
+    return HistoryEntry(None, time.time(), *key, message[:PREVIEW], result[:PREVIEW])
+
+
+def message_digest(message):
+    """Hash of a message for ResultKey, hashed a chunk at a time."""
+    digest = hashlib.blake2b(digest_size=16)
+    for start in range(0, len(message), DIGEST_CHUNK):
+        piece = message[start : start + DIGEST_CHUNK]
+        digest.update(piece.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+def default_path():
+    """Per-user location of the result store."""
+    base = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(base, "cipher_cat", "results.sqlite3")
+
+
+class ResultCache:
+    """In-memory LRU of results in front of a shared SQLite store.
+
+    ``path`` is None for the default store, or False to keep results in
+    memory only.
+    """
+
+    def __init__(self, path=None, memory_size=64 << 20, disk_size=256 << 20):
+        self.path = default_path() if path is None else path
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory = collections.OrderedDict()  # ResultKey -> result
+        self.memory_used = 0
+        self._lock = threading.Lock()  # For the in-memory results
+        self._db_lock = threading.Lock()
+        self._db = None
+        if self.path:
+            try:
+                self._db = self._connect()
+            except (OSError, sqlite3.Error):
+                pass  # Caching is only an optimisation
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Transactions are begun by _write, see there
+        db = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        try:
+            # WAL lets readers carry on while another instance writes
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(f"BEGIN IMMEDIATE; {SCHEMA} COMMIT;")
+        except sqlite3.Error:
+            db.close()
+            raise
+        return db
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    @contextlib.contextmanager
+    def _write(self):
+        """A write transaction, with ``_db_lock`` held.
+
+        It takes the write lock of the database at the start, so reading
+        and then writing in it cannot fail half way because another
+        process wrote in between.
+        """
+        with self._db_lock:
+            if self._db is None:
+                raise sqlite3.OperationalError("The store is closed.")
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def peek(self, key):
+        """The result for a ResultKey if it is in memory, or None."""
+        with self._lock:
+            result = self.memory.get(key)
+            if result is not None:
+                self.memory.move_to_end(key)
+            return result
+
+    def get(self, key):
+        """The cached result for a ResultKey, or None."""
+        result = self.peek(key)
+        if result is not None or self._db is None:
+            return result
+        # Read without the write lock, so other processes can read at once
+        with self._db_lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT result FROM results WHERE cipher = ? AND "
+                    "direction = ? AND key = ? AND digest = ?",
+                    key,
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None:
+            return None
+        try:
+            with self._write() as db:
+                db.execute(
+                    "UPDATE results SET used = ? WHERE cipher = ? AND "
+                    "direction = ? AND key = ? AND digest = ?",
+                    (time.time(), *key),
+                )
+        except sqlite3.Error:
+            pass  # Only makes it less likely to be evicted
+        with self._lock:
+            self._remember(key, row[0])
+        return row[0]
+
+    def put(self, key, result):
+        with self._lock:
+            self._remember(key, result)
+        if self._db is None or len(result) > self.disk_size:
+            return
+        try:
+            with self._write() as db:
+                row = db.execute(
+                    "SELECT size FROM results WHERE cipher = ? AND "
+                    "direction = ? AND key = ? AND digest = ?",
+                    key,
+                ).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*key, result, len(result), time.time()),
+                )
+                added = len(result) - (row[0] if row else 0)
+                # Not UPDATE ... RETURNING, which needs SQLite 3.35
+                db.execute("UPDATE usage SET size = size + ?", (added,))
+                (used,) = db.execute("SELECT size FROM usage").fetchone()
+                if used > self.disk_size:
+                    self._evict(db, used)
+        except sqlite3.Error:
+            pass  # Still cached in memory
+
+    def _remember(self, key, result):
+        """Add to the in-memory LRU, dropping the oldest to make room."""
+        if key in self.memory:
+            self.memory_used -= len(self.memory.pop(key))
+        if len(result) > self.memory_size:
+            return
+        self.memory[key] = result
+        self.memory_used += len(result)
+        while self.memory_used > self.memory_size:
+            self.memory_used -= len(self.memory.popitem(last=False)[1])
+
+    def _evict(self, db, used):
+        """Drop the least recently used results over ``disk_size``."""
+        doomed = []
+        for rowid, size in db.execute("SELECT rowid, size FROM results ORDER BY used"):
+            if used <= self.disk_size:
+                break
+            doomed.append((rowid,))
+            used -= size
+        db.executemany("DELETE FROM results WHERE rowid = ?", doomed)
+        db.execute("UPDATE usage SET size = ?", (used,))
+
+    def record(self, key, message, result):
+        """Add an operation to the history and return its HistoryEntry."""
+        entry = history_entry(key, message, result)
+        if self._db is None:
+            return entry
+        try:
+            with self._write() as db:
+                cursor = db.execute(
+                    "INSERT INTO history (time, cipher, direction, key, "
+                    "digest, message, result) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    entry[1:],
+                )
+                db.execute(
+                    "DELETE FROM history WHERE id <= ?",
+                    (cursor.lastrowid - HISTORY_LIMIT,),
+                )
+        except sqlite3.Error:
+            return entry
+        return entry._replace(id=cursor.lastrowid)
+
+    def history(self, search="", limit=HISTORY_LIMIT):
+        """Newest first, the entries whose cipher, key, message or result
+        contains ``search`` (ignoring case for ASCII letters)."""
+        pattern = "%{}%".format(
+            search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        with self._db_lock:
+            if self._db is None:
+                return []
+            try:
+                rows = self._db.execute(
+                    "SELECT * FROM history WHERE cipher LIKE :p ESCAPE '\\' OR "
+                    "key LIKE :p ESCAPE '\\' OR message LIKE :p ESCAPE '\\' OR "
+                    "result LIKE :p ESCAPE '\\' ORDER BY id DESC LIMIT :limit",
+                    {"p": pattern, "limit": limit},
+                ).fetchall()
+            except sqlite3.Error:
+                return []
+        return [HistoryEntry(*row) for row in rows]
+
+    def clear_history(self):
+        try:
+            with self._write() as db:
+                db.execute("DELETE FROM history")
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,58 @@
+import tracemalloc
+
+import pytest
+
+import ciphers
+
+SIZE = 4 << 20
+CASES = {
+    "caesar": lambda: ciphers.CaesarCipher.with_key(3),
+    "affine": lambda: ciphers.AffineCipher.with_key(7),
+    "atbash": ciphers.AtbashCipher.with_key,
+    "substitution": lambda: ciphers.SubstitutionCipher.with_key(
+        "QWERTYUIOPASDFGHJKLZXCVBNM"
+    ),
+    "vigenere": lambda: ciphers.VigenereCipher.with_key("LEMON"),
+}
+TEXT = b"The quick brown fox jumps over the lazy dog, 0123456789!\n"
+
+
+def traced_peak(function):
+    """Memory allocated by ``function`` at its peak, beyond what was
+    allocated before it ran."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        function()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("name", CASES)
+@pytest.mark.parametrize("direction", ["encrypt", "decrypt"])
+def test_buffer_matches_str_api(name, direction):
+    keyed = CASES[name]()
+    data = bytearray(TEXT * 1000)
+    expected = getattr(keyed, direction)(data.decode("ascii"))
+    getattr(keyed, direction + "_buffer")(data)
+    assert data.decode("ascii") == expected
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_in_place_memory(name):
+    keyed = CASES[name]()
+    keyed.encrypt_buffer(bytearray(TEXT))  # Build the tables first
+    data = bytearray(TEXT * (SIZE // len(TEXT)))
+    # The input is about the only memory in use while it is encrypted
+    assert traced_peak(lambda: keyed.encrypt_buffer(data)) < 0.05 * len(data)
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_out_buffer_memory(name):
+    keyed = CASES[name]()
+    keyed.encrypt_buffer(bytearray(TEXT))
+    data = bytes(TEXT * (SIZE // len(TEXT)))
+    out = bytearray(len(data))
+    assert traced_peak(lambda: keyed.encrypt_buffer(data, out)) < 0.05 * len(data)
+    assert out == keyed.encrypt(data.decode("ascii")).encode("ascii")
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from ciphers import (
+    ALPHABET,
+    AffineCipher,
+    CaesarCipher,
+    SubstitutionCipher,
+    TranspositionCipher,
+    VigenereCipher,
+)
+from cryptanalysis import (
+    crack_affine,
+    crack_caesar,
+    crack_substitution,
+    crack_transposition,
+    crack_vigenere,
+    letter_indices,
+    load_quadgram_table,
+)
+
+# Not in the texts data/quadgrams.bin was built from (Lewis Carroll, Alice's
+# Adventures in Wonderland, public domain)
+HELD_OUT = (
+    "Alice was beginning to get very tired of sitting by her sister on the "
+    "bank, and of having nothing to do: once or twice she had peeped into the "
+    "book her sister was reading, but it had no pictures or conversations in "
+    "it, and what is the use of a book, thought Alice, without pictures or "
+    "conversations? So she was considering in her own mind (as well as she "
+    "could, for the hot day made her feel very sleepy and stupid), whether the "
+    "pleasure of making a daisy-chain would be worth the trouble of getting up "
+    "and picking the daisies, when suddenly a White Rabbit with pink eyes ran "
+    "close by her."
+)
+
+
+def quadgram_score(text):
+    table = load_quadgram_table()
+    letters = letter_indices(text).replace(b"\x1a", b"")
+    codes = (
+        ((a * 26 + b) * 26 + c) * 26 + d
+        for a, b, c, d in zip(letters, letters[1:], letters[2:], letters[3:])
+    )
+    return sum(map(table.__getitem__, codes)) / (len(letters) - 3)
+
+
+def test_table_prefers_held_out_english():
+    shuffled = list(HELD_OUT)
+    random.Random(0).shuffle(shuffled)
+    assert quadgram_score(HELD_OUT) > quadgram_score("".join(shuffled)) + 1
+
+
+def test_crack_substitution_on_held_out_text():
+    key = list(ALPHABET)
+    random.Random(1).shuffle(key)
+    key = "".join(key)
+    secret = SubstitutionCipher(HELD_OUT, key).encrypt()
+    result = crack_substitution(secret, restarts=2, workers=1, seed=0)
+    # Letters missing from the text (J, Q, X and Z) can go anywhere in the key
+    assert result.plaintext.upper() == HELD_OUT.upper()
+
+
+@pytest.mark.parametrize("scoring", ["loglik", "chi2"])
+@pytest.mark.parametrize("shift", [1, 11, 25])
+def test_crack_caesar(shift, scoring):
+    secret = CaesarCipher(HELD_OUT, shift).encrypt()
+    result = crack_caesar(secret, scoring)
+    assert result.key == shift
+    assert result.plaintext == HELD_OUT
+
+
+@pytest.mark.parametrize("scoring", ["loglik", "chi2"])
+@pytest.mark.parametrize("a, shift", [(5, 0), (5, 19), (7, 3), (25, 12)])
+def test_crack_affine(a, shift, scoring):
+    cipher = AffineCipher(HELD_OUT, shift)
+    cipher.a = a  # AffineCipher itself always uses 5
+    result = crack_affine(cipher.encrypt(), scoring)
+    assert result.key == (a, shift)
+    assert result.plaintext == HELD_OUT
+
+
+@pytest.mark.parametrize("key", ["K", "LEMON", "CRYPTOGRAPHY"])
+def test_crack_vigenere(key):
+    secret = VigenereCipher(HELD_OUT, key).encrypt()
+    result = crack_vigenere(secret)
+    assert result.key == key
+    assert result.plaintext == HELD_OUT
+
+
+@pytest.mark.parametrize(
+    "key, keyed", [("KEY", True), ("ZEBRAS", True), ("ABCDEFGHIJ", False)]
+)
+def test_crack_transposition(key, keyed):
+    secret = TranspositionCipher(HELD_OUT, key, keyed).encrypt()
+    result = crack_transposition(secret, workers=1)
+    # The key found is a word with the same column order
+    assert TranspositionCipher("", result.key, True).order == (
+        TranspositionCipher("", key, keyed).order
+    )
+    assert result.plaintext.rstrip() == HELD_OUT
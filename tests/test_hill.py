@@ -0,0 +1,27 @@
+import pytest
+
+from ciphers import HillCipher
+
+KEY = "GYBNQKURP"
+
+
+def test_known_vector():
+    assert HillCipher("ACT", KEY).encrypt() == "POH"
+    assert HillCipher("POH", KEY).decrypt() == "ACT"
+
+
+def test_round_trip_keeps_punctuation():
+    secret = HillCipher("Act, now!", KEY).encrypt()
+    assert secret == "POH, UPW!"
+    assert HillCipher(secret, KEY).decrypt() == "ACT, NOW!"
+
+
+def test_short_last_block_is_padded_with_x():
+    secret = HillCipher("ACTN", KEY).encrypt()
+    assert secret.startswith("POH") and len(secret) == 6
+    assert HillCipher(secret, KEY).decrypt() == "ACTNXX"
+
+
+def test_key_that_is_not_invertible():
+    with pytest.raises(ValueError):
+        HillCipher("ACT", "AAAAAAAAA")
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+import ciphers
+from test_streaming import CHARACTERS
+
+CIPHERS = {
+    "caesar": ciphers.CaesarCipher.with_key(3),
+    "vigenere": ciphers.VigenereCipher.with_key("LEMON"),
+    "substitution": ciphers.SubstitutionCipher.with_key("QWERTYUIOPASDFGHJKLZXCVBNM"),
+    "affine": ciphers.AffineCipher.with_key(7),
+    "transposition": ciphers.TranspositionCipher.with_key("ZEBRAS"),
+    "keyed transposition": ciphers.TranspositionCipher.with_key("ZEBRAS", True),
+    "atbash": ciphers.AtbashCipher.with_key(),
+    "hill": ciphers.HillCipher.with_key("GYBNQKURP"),
+    "playfair": ciphers.PlayfairCipher.with_key("MONARCHY"),
+    "morse": ciphers.MorseCodeCipher,
+}
+
+
+def random_edit(rng, message):
+    """``message`` with a random span inserted, deleted or replaced, and the
+    ``start`` and ``tail`` of the change."""
+    start = rng.randrange(len(message) + 1)
+    end = rng.randrange(start, min(start + 20, len(message)) + 1)
+    text = "".join(rng.choices(CHARACTERS, k=rng.randint(1, 20)))
+    kind = rng.choice(["insert", "delete", "replace"])
+    if kind == "insert":
+        end = start
+    elif kind == "delete":
+        text = ""
+    return message[:start] + text + message[end:], start, len(message) - end
+
+
+def full_encryption(cipher, message):
+    if cipher is ciphers.MorseCodeCipher:
+        return ciphers.MorseCodeCipher.encode(message)
+    return cipher.encrypt(message)
+
+
+@pytest.mark.parametrize("hinted", [False, True])
+@pytest.mark.parametrize("name", CIPHERS)
+@pytest.mark.parametrize("seed", range(5))
+def test_live_result_equals_full_encryption(name, seed, hinted):
+    rng = random.Random(seed)
+    cipher = CIPHERS[name]
+    live = ciphers.LiveEncrypter(cipher)
+    message = ""
+    shown = ""
+    for _ in range(100):
+        message, start, tail = random_edit(rng, message)
+        if hinted:
+            edits = live.update(message, start, tail)
+        else:
+            edits = live.update(message)
+        for begin, end, text in edits:
+            shown = shown[:begin] + text + shown[end:]
+        assert shown == full_encryption(cipher, message)
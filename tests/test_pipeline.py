@@ -0,0 +1,94 @@
+import random
+import string
+import types
+
+import pytest
+
+import ciphers
+from test_streaming import random_chunks, random_message
+
+# Morse has no with_key, so it joins a chain through this stand-in
+MORSE = types.SimpleNamespace(
+    encrypt=ciphers.MorseCodeCipher.encode,
+    decrypt=ciphers.MorseCodeCipher.decode,
+    iter_encrypt=ciphers.MorseCodeCipher.iter_encode,
+    iter_decrypt=ciphers.MorseCodeCipher.iter_decode,
+)
+
+
+def random_word(rng, longest):
+    return "".join(rng.choices(string.ascii_uppercase, k=rng.randint(1, longest)))
+
+
+def random_stage(rng, kind, depth=0):
+    if kind == "caesar":
+        return ciphers.CaesarCipher.with_key(rng.randrange(-30, 30))
+    if kind == "vigenere":
+        return ciphers.VigenereCipher.with_key(random_word(rng, 12))
+    if kind == "affine":
+        return ciphers.AffineCipher.with_key(rng.randrange(30))
+    if kind == "substitution":
+        key = rng.sample(string.ascii_uppercase, 26)
+        return ciphers.SubstitutionCipher.with_key("".join(key))
+    if kind == "transposition":
+        keyed = rng.random() < 0.5
+        return ciphers.TranspositionCipher.with_key(random_word(rng, 10), keyed)
+    if kind == "atbash":
+        return ciphers.AtbashCipher.with_key()
+    if kind == "morse":
+        return MORSE
+    return ciphers.Pipeline(random_stages(rng, depth + 1))
+
+
+def random_stages(rng, depth=0):
+    kinds = ["caesar", "vigenere", "affine", "substitution", "transposition"]
+    kinds += ["atbash"] + ["morse", "pipeline"] * (depth == 0)
+    stages = []
+    kind = None
+    while len(stages) < rng.randint(1, 8):
+        # Runs of one kind are likely, so the fused passes get exercised
+        if kind is None or rng.random() < 0.5:
+            kind = rng.choice(kinds)
+        stages.append(random_stage(rng, kind, depth))
+    return stages
+
+
+def one_by_one(stages, message, direction):
+    if direction == "decrypt":
+        stages = reversed(stages)
+    for stage in stages:
+        message = getattr(stage, direction)(message)
+    return message
+
+
+def outcome(function, *args):
+    """The result of a call, or ValueError if it raised one (e.g. decrypting
+    text shorter than a transposition key)."""
+    try:
+        return function(*args)
+    except ValueError:
+        return ValueError
+
+
+def check_equivalent(rng, stages):
+    pipeline = ciphers.Pipeline(stages)
+    message = random_message(rng)
+    for direction in ("encrypt", "decrypt"):
+        expected = outcome(one_by_one, stages, message, direction)
+        assert outcome(getattr(pipeline, direction), message) == expected
+        streamed = getattr(pipeline, "iter_" + direction)
+        chunks = random_chunks(rng, message)
+        assert outcome(lambda: "".join(streamed(chunks))) == expected
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_pipeline_equals_stages_one_by_one(seed):
+    rng = random.Random(seed)
+    check_equivalent(rng, random_stages(rng))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_fused_transpositions_equal_stages_one_by_one(seed):
+    rng = random.Random(seed)
+    stages = [random_stage(rng, "transposition") for _ in range(rng.randint(2, 5))]
+    check_equivalent(rng, stages)
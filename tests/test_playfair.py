@@ -0,0 +1,31 @@
+import pytest
+
+from ciphers import PlayfairCipher
+
+KEY = "MONARCHY"
+
+
+def test_known_vector():
+    assert PlayfairCipher("instruments", KEY).encrypt() == "GATLMZCLRQXA"
+    assert PlayfairCipher("GATLMZCLRQXA", KEY).decrypt() == "INSTRUMENTSX"
+
+
+def test_repeated_letters_are_split_with_x():
+    secret = PlayfairCipher("balloon", KEY).encrypt()
+    assert PlayfairCipher(secret, KEY).decrypt() == "BALXLOON"
+
+
+def test_repeated_x_is_split_with_q():
+    secret = PlayfairCipher("xxa", KEY).encrypt()
+    assert PlayfairCipher(secret, KEY).decrypt() == "XQXA"
+
+
+def test_odd_length_is_padded():
+    secret = PlayfairCipher("Hide the gold", KEY).encrypt()
+    assert secret == "BFCK PDF IMPBZ"
+    assert PlayfairCipher(secret, KEY).decrypt() == "HIDE THE GOLDX"
+
+
+def test_odd_length_ciphertext():
+    with pytest.raises(ValueError):
+        PlayfairCipher("GAT", KEY).decrypt()
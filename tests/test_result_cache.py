@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+
+from result_cache import ResultCache, ResultKey
+
+
+def key(name):
+    return ResultKey("Caesar Cipher", "Encrypt", name, "digest")
+
+
+def stored_size(cache):
+    """The running total and the actual size of the stored results."""
+    with cache._db_lock:
+        (used,) = cache._db.execute("SELECT size FROM usage").fetchone()
+        (total,) = cache._db.execute("SELECT total(size) FROM results").fetchone()
+    return used, total
+
+
+def test_running_total_follows_puts_and_evictions(tmp_path):
+    cache = ResultCache(tmp_path / "results.sqlite3", memory_size=0, disk_size=1000)
+    for i in range(30):
+        cache.put(key(str(i)), "x" * 100)
+    cache.put(key("29"), "y" * 50)  # Replaces a result
+    assert stored_size(cache) == (950, 950)
+    assert cache.get(key("0")) is None  # Least recently used, evicted
+    assert cache.get(key("29")) == "y" * 50
+    cache.close()
+
+    cache = ResultCache(tmp_path / "results.sqlite3", memory_size=0, disk_size=1000)
+    assert stored_size(cache) == (950, 950)
+    cache.close()
+
+
+def test_total_starts_from_existing_results(tmp_path):
+    cache = ResultCache(tmp_path / "results.sqlite3", memory_size=0)
+    cache.put(key("a"), "abc")
+    with cache._db_lock:
+        cache._db.execute("DROP TABLE usage")  # As in a store from before it
+    cache.close()
+    cache = ResultCache(tmp_path / "results.sqlite3", memory_size=0)
+    assert stored_size(cache) == (3, 3)
+    cache.close()
+
+
+def test_peek_does_not_wait_for_the_store(tmp_path):
+    cache = ResultCache(tmp_path / "results.sqlite3")
+    cache.put(key("a"), "abc")
+    with cache._db_lock:  # As if another thread were writing
+        found = []
+        thread = threading.Thread(target=lambda: found.append(cache.peek(key("a"))))
+        thread.start()
+        thread.join(5)
+        assert found == ["abc"]
+    cache.close()
+
+
+def test_record_returns_entry_found_by_history(tmp_path):
+    cache = ResultCache(tmp_path / "results.sqlite3")
+    entry = cache.record(key("3"), "hello world", "khoor zruog")
+    assert entry.id is not None
+    assert entry.matches("ZRUOG") and not entry.matches("nothing")
+    assert cache.history("zruog") == [entry]
+    cache.close()
+
+
+def test_lookup_does_not_wait_for_another_writer(tmp_path):
+    path = tmp_path / "results.sqlite3"
+    cache = ResultCache(path, memory_size=0)
+    cache.put(key("a"), "abc")
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")  # Another process writing
+    try:
+        started = time.perf_counter()
+        assert cache.get(key("b")) is None
+        assert time.perf_counter() - started < 1
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+    assert cache.get(key("a")) == "abc"
+    cache.close()
@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+
+import cipher_server
+import ciphers
+
+
+async def with_client(test, **options):
+    server = cipher_server.CipherServer(**options)
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    client = await cipher_server.CipherClient.connect(port=port)
+    try:
+        return await asyncio.wait_for(test(client), 10)
+    finally:
+        await client.close()
+        listener.close()
+        server.close()
+
+
+async def collect(client, chunks, **request):
+    return "".join([piece async for piece in client.stream(chunks, **request)])
+
+
+def test_stream_round_trip():
+    async def test(client):
+        request = {"cipher": "vigenere", "key": "LEMON"}
+        secret = await collect(
+            client, ["attack ", "at ", "dawn"], **request, action="encrypt"
+        )
+        plain = await collect(client, [secret], **request, action="decrypt")
+        return secret, plain
+
+    secret = ciphers.VigenereCipher("attack at dawn", "LEMON").encrypt()
+    assert asyncio.run(with_client(test)) == (secret, "attack at dawn")
+
+
+@pytest.mark.parametrize(
+    "request_fields",
+    [
+        {"cipher": "hill", "key": "HILL"},  # Fails on the short last block
+        {"cipher": "playfair", "key": "MONARCHY"},
+        {"cipher": "transposition", "key": "ZEBRAS", "keyed": True},
+    ],
+)
+def test_stream_error_after_whole_body(request_fields):
+    async def test(client):
+        with pytest.raises(ValueError):
+            await collect(client, ["A", "B", "C"], **request_fields, action="decrypt")
+        # The connection is still usable afterwards
+        return await client.request(
+            cipher="caesar", shift=3, action="encrypt", message="abc"
+        )
+
+    assert asyncio.run(with_client(test)) == "def"
+
+
+def test_batches_are_capped_by_characters():
+    async def test(client):
+        messages = ["x" * 900 + str(n) for n in range(40)]
+        results = await asyncio.gather(
+            *(
+                client.request(cipher="caesar", shift=1, action="encrypt", message=m)
+                for m in messages
+            )
+        )
+        assert results == [ciphers.CaesarCipher(m, 1).encrypt() for m in messages]
+        return (await client.stats())["batches"]
+
+    # At most 10 messages of about 900 characters fit in a batch
+    assert asyncio.run(with_client(test, large=10_000)) >= 4
+
+
+@pytest.mark.parametrize("cipher", ["caesar", "transposition"])
+def test_client_leaving_mid_stream(cipher):
+    finished = []
+
+    async def test(client):
+        server = cipher_server.CipherServer()
+        handle = server.handle
+
+        async def counted(reader, writer):
+            await handle(reader, writer)
+            finished.append(True)
+
+        listener = await asyncio.start_server(counted, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        request = {"id": 1, "stream": True, "cipher": cipher, "action": "encrypt"}
+        request.update(shift=3, key="ZEBRAS")
+        for _ in range(6):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            frames = [json.dumps(request).encode()]
+            frames += [b"attack at dawn " * 1000] * 2 * cipher_server.STREAM_BUFFER
+            for frame in frames:
+                writer.write(cipher_server.FRAME_HEADER.pack(len(frame)) + frame)
+            writer.write(cipher_server.FRAME_HEADER.pack(100))  # Cut off
+            await writer.drain()
+            writer.close()
+        while len(finished) < 6:
+            await asyncio.sleep(0.01)
+        listener.close()
+        server.close()
+        # Other clients can still stream
+        return await collect(
+            client,
+            ["attack ", "at ", "dawn"],
+            cipher="caesar",
+            shift=3,
+            action="encrypt",
+        )
+
+    assert asyncio.run(with_client(test)) == "dwwdfn dw gdzq"
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+import ciphers
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+CHARACTERS = ALPHABET * 4 + "     .,;!?'\n0123456789éßΩ…"
+
+CIPHERS = {
+    "caesar": ciphers.CaesarCipher("", 3),
+    "vigenere": ciphers.VigenereCipher("", "LEMON"),
+    "substitution": ciphers.SubstitutionCipher("", "QWERTYUIOPASDFGHJKLZXCVBNM"),
+    "affine": ciphers.AffineCipher("", 7),
+    "transposition": ciphers.TranspositionCipher("", "ZEBRAS"),
+    "keyed transposition": ciphers.TranspositionCipher("", "ZEBRAS", keyed=True),
+    "atbash": ciphers.AtbashCipher(""),
+    "hill": ciphers.HillCipher("", "GYBNQKURP"),
+    "playfair": ciphers.PlayfairCipher("", "MONARCHY"),
+}
+
+
+def random_message(rng):
+    length = rng.choice([0, 1, 5, 100, rng.randrange(10_000)])
+    return "".join(rng.choices(CHARACTERS, k=length))
+
+
+def random_chunks(rng, text):
+    """``text`` cut at random places, sometimes into empty chunks."""
+    cuts = sorted(rng.randrange(len(text) + 1) for _ in range(rng.randrange(20)))
+    return [text[start:end] for start, end in zip([0, *cuts], [*cuts, len(text)])]
+
+
+def one_shot(cipher, message, direction):
+    cipher.message = message
+    return getattr(cipher, direction)()
+
+
+@pytest.mark.parametrize("name", CIPHERS)
+@pytest.mark.parametrize("seed", range(20))
+def test_streamed_equals_one_shot(name, seed):
+    rng = random.Random(seed)
+    cipher = CIPHERS[name]
+    message = random_message(rng)
+    encrypted = one_shot(cipher, message, "encrypt")
+    streamed = cipher.iter_encrypt(random_chunks(rng, message))
+    assert "".join(streamed) == encrypted
+    decrypted = one_shot(cipher, encrypted, "decrypt")
+    streamed = cipher.iter_decrypt(random_chunks(rng, encrypted))
+    assert "".join(streamed) == decrypted
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_morse_streamed_equals_one_shot(seed):
+    rng = random.Random(seed)
+    message = random_message(rng)
+    morse = ciphers.MorseCodeCipher
+    encoded = morse.encode(message)
+    assert "".join(morse.iter_encode(random_chunks(rng, message))) == encoded
+    streamed = morse.iter_decode(random_chunks(rng, encoded))
+    assert "".join(streamed) == morse.decode(encoded)
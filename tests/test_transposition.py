@@ -0,0 +1,46 @@
+import random
+import string
+
+import pytest
+
+from ciphers import TranspositionCipher
+
+CHARACTERS = string.ascii_letters + string.digits + " .,!?\n" + "éßΩ…中文"
+
+
+def padded(message, columns):
+    """The message with the spaces encryption adds to fill the last row."""
+    return message.ljust(-(-len(message) // columns) * columns)
+
+
+@pytest.mark.parametrize("keyed", [False, True])
+@pytest.mark.parametrize("seed", range(50))
+def test_round_trip(keyed, seed):
+    rng = random.Random(seed)
+    message = "".join(rng.choices(CHARACTERS, k=rng.randrange(200)))
+    # Keys from one column to longer than the message
+    key = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(1, 30)))
+    encrypted = TranspositionCipher(message, key, keyed).encrypt()
+    decrypted = TranspositionCipher(encrypted, key, keyed).decrypt()
+    assert decrypted == padded(message, len(key))
+
+
+@pytest.mark.parametrize("keyed", [False, True])
+@pytest.mark.parametrize("key", ["A", "KEY", "ZEBRAS", "LONGERTHANTHEMESSAGE"])
+def test_empty_message(keyed, key):
+    assert TranspositionCipher("", key, keyed).encrypt() == ""
+    assert TranspositionCipher("", key, keyed).decrypt() == ""
+
+
+@pytest.mark.parametrize("keyed", [False, True])
+def test_key_longer_than_message(keyed):
+    cipher = TranspositionCipher.with_key("LONGERTHANTHEMESSAGE", keyed)
+    encrypted = cipher.encrypt("naïve café")
+    assert len(encrypted) == 20
+    assert cipher.decrypt(encrypted) == "naïve café".ljust(20)
+
+
+def test_keyed_reads_columns_in_key_order():
+    # Under ZEBRAS the columns are read in the order A B E R S Z
+    encrypted = TranspositionCipher("WEAREDISCOVERED", "ZEBRAS", True).encrypt()
+    assert encrypted == "EV ACDESERO DE WIR"